@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logg
+from tri import TriangleSweep
+from compact import CompactDCEL
+
+def dumps(dcel):
+	"""
+	Serializes a DCEL (of either backend) to bytes.
+	"""
+	if not isinstance(dcel, CompactDCEL):
+		dcel = CompactDCEL.from_dcel(dcel)
+	return dcel.to_bytes()
+
+def loads(data, compact = False):
+	"""
+	Reads a DCEL written by dumps. It comes back as a
+	CompactDCEL if 'compact' is set, or as a DCEL of
+	Vertex and ConnEdge objects otherwise.
+	"""
+	r = CompactDCEL.from_bytes(data)
+	if compact:
+		return r
+	return r.to_dcel()
+
+def _triangulate_bytes(data):
+	# This runs in a worker: the DCEL crosses the process
+	# boundary as flat arrays both ways.
+	d = CompactDCEL.from_bytes(data)
+	return TriangleSweep.triangulate(d).to_bytes()
+
+def _triangulate_copy(dcel):
+	# What a worker does, in this process: the result is a copy
+	# of the input, of the same backend, as from the pool.
+	data = _triangulate_bytes(dumps(dcel))
+	return loads(data, isinstance(dcel, CompactDCEL))
+
+def _submit_all(pool, dcels):
+	futures = {}
+	for i in range(len(dcels)):
+		futures[pool.submit(_triangulate_bytes, dumps(dcels[i]))] = i
+	return futures
+
+def triangulate_many(dcels, workers = None):
+	"""
+	Triangulates independent polygons on a pool of worker processes.
+
+	Args:
+		dcels (list of DCELs, of either backend)
+		workers (number of processes; None for one per core,
+			1 to run in this process)
+	Returns:
+		The triangulated DCELs, in the order of 'dcels'. Each one
+		is a new DCEL with the backend of its input; the inputs
+		are never modified, with or without a pool.
+	"""
+	l = logg.get("BATCH")
+	dcels = list(dcels)
+	if workers == 1:
+		r = [_triangulate_copy(d) for d in dcels]
+	else:
+		r = [None]*len(dcels)
+		with ProcessPoolExecutor(max_workers = workers) as pool:
+			futures = _submit_all(pool, dcels)
+			for future in as_completed(futures):
+				i = futures[future]
+				r[i] = loads(future.result(), isinstance(dcels[i], CompactDCEL))
+	l.info("Triangulated %d polygons", len(r))
+	return r
+
+def triangulate_completed(dcels, workers = None):
+	"""
+	Like triangulate_many, but yields (index, DCEL) pairs
+	as soon as each polygon is done. The DCELs are new, as from
+	triangulate_many; with 'workers' 1 they come in order, from
+	this process.
+	"""
+	dcels = list(dcels)
+	if workers == 1:
+		for i in range(len(dcels)):
+			yield i, _triangulate_copy(dcels[i])
+		return
+	with ProcessPoolExecutor(max_workers = workers) as pool:
+		futures = _submit_all(pool, dcels)
+		for future in as_completed(futures):
+			i = futures[future]
+			yield i, loads(future.result(), isinstance(dcels[i], CompactDCEL))
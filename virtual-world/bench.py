@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the triangulation and the DCEL, on the polygons
+of polygons.py.
+
+Per generator and size, it times (the best of --repeat runs) and
+measures the peak memory (with tracemalloc, in a separate run) of:
+
+	sweep		TriangleSweep.sweep on a fresh DCEL
+	insert		DCEL.insert of all diagonals of that triangulation
+	faces		DCEL.gen_face_data of the triangulated DCEL
+	from_svg	DCEL.from_svg of the polygon, written as an SVG
+
+The results are written as JSON with --out. Every result is
+compared with the same case in the --baseline (an earlier --out;
+bench_baseline.json, next to this file, unless told otherwise),
+and the exit code is 1 if one got slower or bigger by more than
+the --tolerance.
+
+By default it runs the sizes from 10 to 10000 vertices, which
+takes a minute or so. --large adds 100000 and 1000000: that takes
+hours on one core, most of it for the sweep at 1000000. Only the
+cases that were run are compared.
+
+	python bench.py --large
+	python bench.py --sizes 100000 --ops sweep,insert
+
+Record bench_baseline.json once on the machine the checks run on,
+
+	python bench.py --out bench_baseline.json
+
+since times only compare well on the machine they were taken on.
+Until there is one, nothing is compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import logg
+import polygons
+import svg
+import tri
+
+OPS = ['sweep', 'insert', 'faces', 'from_svg']
+SIZES = '10,100,1000,10000'
+LARGE = '100000,1000000'
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+def _dcel(outer, holes):
+	return tri.DCEL.from_rings([outer] + holes)
+
+def _setup(op, outer, holes, tmp):
+	"""
+	What 'op' needs before the clock starts: returns the
+	function to time and the number of operations it does.
+	"""
+	if op == 'sweep':
+		d = _dcel(outer, holes)
+		return tri.TriangleSweep(d).sweep, 1
+	if op == 'insert':
+		d = _dcel(outer, holes)
+		sweep = tri.TriangleSweep(d)
+		sweep.sweep()
+		# replay the diagonals on the same polygon, by vertex position
+		fresh = _dcel(outer, holes)
+		where = {}
+		for v in fresh.get_vertices():
+			where[(v.x, v.y)] = v
+		diagonals = [(where[(a.x, a.y)], where[(b.x, b.y)]) for a, b in sweep.diagonals]
+		def insert():
+			for a, b in diagonals:
+				fresh.insert(a, b)
+		return insert, len(diagonals)
+	if op == 'faces':
+		d = _dcel(outer, holes)
+		tri.TriangleSweep(d).sweep()
+		return d.gen_face_data, 1
+	if op == 'from_svg':
+		path = os.path.join(tmp, 'polygon.svg')
+		svg.write_rings(path, [outer] + holes)
+		return lambda: tri.DCEL.from_svg(path), 1
+	raise ValueError("Unknown benchmark '{}'".format(op))
+
+def run(op, generator, n, seed = 0, repeat = 3, memory = True, tmp = None):
+	"""
+	One benchmark: returns a dict with the case, the best time in
+	seconds, the peak memory in bytes (or None) and the number of
+	operations timed.
+	"""
+	outer, holes = polygons.GENERATORS[generator](n, seed)
+	tmp = tmp or tempfile.gettempdir()
+	best = None
+	for _ in range(repeat):
+		f, ops = _setup(op, outer, holes, tmp)
+		t = time.perf_counter()
+		f()
+		t = time.perf_counter() - t
+		best = t if best is None else min(best, t)
+	peak = None
+	if memory:
+		f, ops = _setup(op, outer, holes, tmp)
+		tracemalloc.start()
+		f()
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+	return {
+		'op': op, 'generator': generator, 'n': n, 'seed': seed,
+		'vertices': len(outer) + sum(len(h) for h in holes),
+		'time': best, 'peak': peak, 'ops': ops,
+	}
+
+def _key(r):
+	return (r['op'], r['generator'], r['n'], r['seed'])
+
+def compare(results, baseline, tolerance = 0.25, slack = 1e-3):
+	"""
+	The results that are worse than in 'baseline' (both lists of
+	run() dicts): slower by more than 'tolerance' (a fraction) and
+	'slack' seconds, or with a peak more than 'tolerance' bigger.
+	Returns a list of (result, base, what).
+	"""
+	base = {}
+	for b in baseline:
+		base[_key(b)] = b
+	r = []
+	for res in results:
+		b = base.get(_key(res))
+		if b is None:
+			continue
+		if res['time'] > b['time']*(1 + tolerance) + slack:
+			r += [(res, b, 'time')]
+		if res['peak'] is not None and b['peak'] is not None and res['peak'] > b['peak']*(1 + tolerance):
+			r += [(res, b, 'peak')]
+	return r
+
+def main(args):
+	p = argparse.ArgumentParser(description = "Benchmarks for the triangulation and the DCEL.")
+	p.add_argument('--sizes', default = SIZES, help = "comma-separated vertex counts")
+	p.add_argument('--large', action = 'store_true', help = "add the sizes " + LARGE)
+	p.add_argument('--generators', default = ','.join(polygons.GENERATORS),
+			help = "comma-separated, from polygons.GENERATORS")
+	p.add_argument('--ops', default = ','.join(OPS), help = "comma-separated, from " + ', '.join(OPS))
+	p.add_argument('--seed', type = int, default = 0)
+	p.add_argument('--repeat', type = int, default = 3)
+	p.add_argument('--no-memory', action = 'store_true', help = "skip the tracemalloc runs")
+	p.add_argument('--out', help = "write the results to this JSON file")
+	p.add_argument('--baseline', default = BASELINE,
+			help = "compare with the results in this JSON file, if there is one ('' for none)")
+	p.add_argument('--tolerance', type = float, default = 0.25)
+	a = p.parse_args(args)
+	logg.set_level('WARNING')
+	sizes = a.sizes + ',' + LARGE if a.large else a.sizes
+	# read before --out can write over it
+	baseline = None
+	if a.baseline and (a.baseline != BASELINE or os.path.exists(BASELINE)):
+		with open(a.baseline) as f:
+			baseline = json.load(f)['results']
+
+	results = []
+	with tempfile.TemporaryDirectory() as tmp:
+		for generator in a.generators.split(','):
+			for n in [int(float(s)) for s in sizes.split(',')]:
+				for op in a.ops.split(','):
+					res = run(op, generator, n, a.seed, a.repeat, not a.no_memory, tmp)
+					results += [res]
+					print("{op:<9}{generator:<8}{vertices:>9} vertices  {time:10.6f} s  {peak:>12} B".format(
+							**dict(res, peak = res['peak'] if res['peak'] is not None else '-')))
+					sys.stdout.flush()
+
+	if a.out:
+		data = {
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'results': results,
+		}
+		with open(a.out, 'w') as f:
+			json.dump(data, f, indent = '\t')
+
+	if baseline is not None:
+		worse = compare(results, baseline, a.tolerance)
+		for res, b, what in worse:
+			print("REGRESSION {} {} {}: {} {} -> {}".format(res['op'], res['generator'], res['n'], what, b[what], res[what]))
+		print("{} of {} results worse than the baseline".format(len(worse), len(results)))
+		return 1 if worse else 0
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import tempfile
+import logg
+import tri
+
+# the layout of an entry; entries of other formats are misses
+FORMAT = 2
+
+def _rings(rings):
+	return [[[float(v[0]), float(v[1])] for v in ring] for ring in rings]
+
+def from_environment():
+	"""
+	A TriangulationCache in the directory named by the variable
+	CATTERRORISER_TRI_CACHE ('default' for the default one, see
+	TriangulationCache), or None if it is not set or empty.
+	"""
+	directory = os.environ.get('CATTERRORISER_TRI_CACHE')
+	if not directory:
+		return None
+	if directory == 'default':
+		return TriangulationCache()
+	return TriangulationCache(os.path.expanduser(directory))
+
+def _default_directory():
+	base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(base, 'catterroriser', 'triangulations')
+
+class TriangulationCache:
+	"""
+	An on-disk cache of triangulation results.
+
+	Entries are content-addressed: the key is a hash of the
+	input vertex rings, tri.VERSION and FORMAT, so changing the
+	geometry (or the triangulation engine) simply misses the
+	cache. Each entry is a JSON file holding the rings and the
+	triangles, as indices into the vertices of the rings
+	concatenated in order.
+
+	The directory is kept below 'max_bytes' by removing the
+	least recently used entries; a hit refreshes an entry.
+	"""
+	def __init__(self, directory = None, max_bytes = 64*1024*1024):
+		self.directory = directory or _default_directory()
+		self.max_bytes = max_bytes
+		self.l = logg.get("CACHE")
+
+	def key(self, rings):
+		rings = _rings(rings)
+		h = hashlib.sha256()
+		h.update('{}/{}'.format(tri.VERSION, FORMAT).encode())
+		h.update(json.dumps(rings).encode())
+		return h.hexdigest()
+
+	def _path(self, key):
+		return os.path.join(self.directory, key + '.json')
+
+	def get(self, rings):
+		"""
+		Returns the entry for these rings as a dictionary with
+		'triangles', or None on a miss. The rings stored in the
+		entry have to be these, so a hash collision is a miss too.
+		"""
+		path = self._path(self.key(rings))
+		try:
+			with open(path) as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return None
+		if data.get('version') != tri.VERSION or data.get('format') != FORMAT:
+			return None
+		try:
+			if _rings(data['rings']) != _rings(rings):
+				self.l.warning("Entry %s is for other rings", path)
+				return None
+		except (KeyError, TypeError, IndexError):
+			return None
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+		self.l.debug("Hit %s", path)
+		return data
+
+	def put(self, rings, triangles):
+		key = self.key(rings)
+		data = {
+			'version' : tri.VERSION,
+			'format' : FORMAT,
+			'rings' : [[[v[0], v[1]] for v in ring] for ring in rings],
+			'triangles' : [list(t) for t in triangles]
+		}
+		tmp = None
+		try:
+			os.makedirs(self.directory, exist_ok = True)
+			# a file of its own, as other processes may be writing
+			# the same entry; the last os.replace wins
+			with tempfile.NamedTemporaryFile('w', dir = self.directory, prefix = key + '.',
+					suffix = '.tmp', delete = False) as f:
+				tmp = f.name
+				json.dump(data, f)
+			os.replace(tmp, self._path(key))
+		except OSError as e:
+			self.l.warning("Could not write cache entry: %s", e)
+			if tmp is not None:
+				try:
+					os.remove(tmp)
+				except OSError:
+					pass
+			return
+		self._evict()
+
+	def _evict(self):
+		entries = []
+		total = 0
+		for name in os.listdir(self.directory):
+			if not name.endswith('.json'):
+				continue
+			path = os.path.join(self.directory, name)
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue
+			entries += [(st.st_mtime, st.st_size, path)]
+			total += st.st_size
+		entries.sort()
+		while entries and total > self.max_bytes:
+			mtime, size, path = entries.pop(0)
+			try:
+				os.remove(path)
+			except OSError:
+				pass
+			total -= size
+			self.l.debug("Evicted %s", path)
+
+	def clear(self):
+		if not os.path.isdir(self.directory):
+			return
+		for name in os.listdir(self.directory):
+			if name.endswith('.json'):
+				os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+import struct
+import numpy as np
+from tri import DCEL, ConnEdge, Vertex, _find_corner
+
+# magic, version, vertex count, half-edge count, face count
+_HEADER = struct.Struct('<4sIIII')
+_MAGIC = b'DCEL'
+_VERSION = 1
+
+# vertices with more half-edges than this keep them in a list
+_FAN = 16
+
+class CompactVertex:
+	"""
+	A view on vertex 'i' of a CompactDCEL.
+
+	It behaves like a Vertex: it has x, y and e, and the
+	prev(), next() and help() lookups. Two views are equal
+	if they point to the same vertex of the same DCEL, so
+	they can be used as dictionary keys.
+	"""
+	__slots__ = ('d', 'i')
+
+	def __init__(self, d, i):
+		self.d = d
+		self.i = i
+
+	@property
+	def x(self):
+		return self.d.x[self.i]
+
+	@property
+	def y(self):
+		return self.d.y[self.i]
+
+	@property
+	def e(self):
+		return CompactEdge(self.d, self.d.vert_edge[self.i])
+
+	@e.setter
+	def e(self, edge):
+		self.d.vert_edge[self.i] = edge.i
+
+	def prev(self):
+		d = self.d
+		return CompactVertex(d, d.origin[d.prev[d.vert_edge[self.i]]])
+
+	def next(self):
+		d = self.d
+		return CompactVertex(d, d.origin[d.next[d.vert_edge[self.i]]])
+
+	def help(self):
+		h = self.d.helper[self.d.vert_edge[self.i]]
+		if h != -1:
+			return CompactVertex(self.d, h)
+
+	def __getitem__(self, idx):
+		if idx == 0:
+			return self.d.x[self.i]
+		elif idx == 1:
+			return self.d.y[self.i]
+		else:
+			raise IndexError()
+
+	def __eq__(self, other):
+		return isinstance(other, CompactVertex) and self.d is other.d and self.i == other.i
+
+	def __hash__(self):
+		return hash((id(self.d), self.i))
+
+	def __str__(self):
+		return "[{}, {}]".format(self.x, self.y)
+
+	def __repr__(self):
+		return "Vertex({}, {})".format(self.x, self.y)
+
+class CompactEdge:
+	"""
+	A view on half-edge 'i' of a CompactDCEL.
+
+	It has the same fields as a ConnEdge (origin, face, twin,
+	prev, next and helper), read from and written to the
+	arrays of the DCEL. A missing twin or helper is None.
+	"""
+	__slots__ = ('d', 'i')
+
+	def __init__(self, d, i):
+		self.d = d
+		self.i = i
+
+	@property
+	def origin(self):
+		return CompactVertex(self.d, self.d.origin[self.i])
+
+	@property
+	def face(self):
+		return self.d.face[self.i]
+
+	@face.setter
+	def face(self, face):
+		self.d.face[self.i] = face
+
+	@property
+	def twin(self):
+		t = self.d.twin[self.i]
+		if t != -1:
+			return CompactEdge(self.d, t)
+
+	@property
+	def prev(self):
+		return CompactEdge(self.d, self.d.prev[self.i])
+
+	@property
+	def next(self):
+		return CompactEdge(self.d, self.d.next[self.i])
+
+	@property
+	def helper(self):
+		h = self.d.helper[self.i]
+		if h != -1:
+			return CompactVertex(self.d, h)
+
+	@helper.setter
+	def helper(self, vertex):
+		self.d.helper[self.i] = -1 if vertex is None else vertex.i
+
+	def __eq__(self, other):
+		return isinstance(other, CompactEdge) and self.d is other.d and self.i == other.i
+
+	def __hash__(self):
+		return hash((id(self.d), self.i))
+
+	def __str__(self):
+		return "ConnEdge(from {}, face {})".format(self.origin, self.face)
+
+	def __repr__(self):
+		return str(self)
+
+class CompactDCEL(DCEL):
+	"""
+	A DCEL stored as a struct of arrays instead of a graph
+	of ConnEdge and Vertex objects.
+
+	Vertices and half-edges are integer handles into typed
+	arrays: 'x' and 'y' hold the coordinates (float64),
+	'origin', 'twin', 'next', 'prev', 'face' and 'helper'
+	describe the half-edges (int32, -1 for none), and
+	'vert_edge' holds one outgoing half-edge per vertex and
+	'face_edge' one half-edge per face label (-1 for none).
+
+	The rest of the code sees it through CompactVertex and
+	CompactEdge views, so TriangleSweep and vis.draw_DCEL
+	work on it as they do on a DCEL. The arrays pickle
+	as flat buffers, and nbytes() reports their size.
+	"""
+	def from_dcel(dcel):
+		"""
+		Copies any DCEL into a CompactDCEL, keeping the order
+		of its vertices and half-edges.
+		"""
+		verts = dcel.get_vertices()
+		vdex = {}
+		for i in range(len(verts)):
+			vdex[verts[i]] = i
+		edex = {}
+		for i in range(len(dcel.edges)):
+			edex[dcel.edges[i]] = i
+
+		r = CompactDCEL(verts)
+		for a in (r.origin, r.twin, r.next, r.prev, r.face, r.helper):
+			del a[:]
+		for e in dcel.edges:
+			r.origin.append(vdex[e.origin])
+			r.twin.append(-1 if e.twin is None else edex[e.twin])
+			r.next.append(edex[e.next])
+			r.prev.append(edex[e.prev])
+			r.face.append(e.face)
+			r.helper.append(-1)
+		for i in range(len(verts)):
+			r.vert_edge[i] = -1
+		# prefer a boundary half-edge, so rotating around the vertex works
+		for i in range(len(r.origin)):
+			v = r.origin[i]
+			if r.vert_edge[v] == -1 or r.twin[i] == -1:
+				r.vert_edge[v] = i
+		r.faces = dcel.faces
+		r._index_faces()
+		return r
+
+	def from_bytes(data):
+		"""
+		Reads a CompactDCEL written by to_bytes.
+		Raises a ValueError if the data is not such a DCEL.
+		"""
+		data = memoryview(data)
+		magic, version, nv, ne, faces = _HEADER.unpack_from(data)
+		if magic != _MAGIC or version != _VERSION:
+			raise ValueError("Not a serialized DCEL (version {})".format(_VERSION))
+		r = CompactDCEL([])
+		r.faces = faces
+		pos = _HEADER.size
+		for name, code, n in CompactDCEL._layout(nv, ne):
+			a = array(code)
+			size = a.itemsize*n
+			a.frombytes(data[pos:pos+size])
+			setattr(r, name, a)
+			pos += size
+		r.helper = array('i', [-1])*ne
+		r._index_faces()
+		return r
+
+	def _layout(nv, ne):
+		return [('x', 'd', nv), ('y', 'd', nv), ('vert_edge', 'i', nv),
+				('origin', 'i', ne), ('twin', 'i', ne), ('next', 'i', ne),
+				('prev', 'i', ne), ('face', 'i', ne)]
+
+	def __init__(self, vertices, update_vertices = True, holes = ()):
+		rings = [vertices] + list(holes)
+		self.faces = 1
+		self.x = array('d')
+		self.y = array('d')
+		self.next = array('i')
+		self.prev = array('i')
+		for ring in rings:
+			first = len(self.x)
+			n = len(ring)
+			self.x += array('d', [v[0] for v in ring])
+			self.y += array('d', [v[1] for v in ring])
+			self.next += array('i', [first + (i+1) % n for i in range(n)])
+			self.prev += array('i', [first + (i-1) % n for i in range(n)])
+		n = len(self.x)
+		self.vert_edge = array('i', range(n))
+		self.origin = array('i', range(n))
+		self.twin = array('i', [-1])*n
+		self.face = array('i', [0])*n
+		self.helper = array('i', [-1])*n
+		# per busy vertex, its half-edges in _around order
+		self._fans = {}
+		self._index_faces()
+
+	def _index_faces(self):
+		self.face_edge = array('i', [-1])*self.faces
+		for e in range(len(self.face) - 1, -1, -1):
+			self.face_edge[self.face[e]] = e
+
+	@property
+	def edges(self):
+		return [CompactEdge(self, i) for i in range(len(self.origin))]
+
+	def _around(self, v):
+		"""
+		The half-edges starting at vertex v, in O(degree): rotate
+		with prev -> twin until the boundary (or the start) is
+		reached, then the other way with twin -> next.
+		"""
+		e0 = self.vert_edge[v]
+		e = e0
+		while True:
+			yield e
+			e = self.twin[self.prev[e]]
+			if e == -1 or e == e0:
+				break
+		if e == e0:
+			return
+		e = self.twin[e0]
+		while e != -1:
+			e = self.next[e]
+			yield e
+			e = self.twin[e]
+
+	def _fan(self, v):
+		"""
+		The half-edges starting at vertex v, anti-clockwise from
+		its wall. Past _FAN of them the list is kept, and _link
+		keeps it in order, so they are not walked again.
+		"""
+		fan = self._fans.get(v)
+		if fan is None:
+			fan = list(self._around(v))
+			if len(fan) > _FAN:
+				self._fans[v] = fan
+		return fan
+
+	def _corner(self, v, p):
+		"""
+		As DCEL._corner: the index in _fan(v) of the half-edge
+		whose face corner the segment from v to P leaves
+		through, or -1. Returns the fan as well.
+		"""
+		fan = self._fan(v)
+		return _find_corner(len(fan), lambda i: CompactEdge(self, fan[i]), p), fan
+
+	def _link(self, s, t):
+		# as DCEL._link, on vertex and half-edge indices: returns
+		# the index of the left half-edge (the right one is next)
+		i, fan_s = self._corner(s, CompactVertex(self, t))
+		j, fan_t = self._corner(t, CompactVertex(self, s))
+		if i == -1 or j == -1:
+			raise ValueError("Cannot find a starter/ender-pair on the same face")
+		a = fan_s[i]
+		b = fan_t[j]
+
+		face = self.face[a]
+		l = len(self.origin)
+		r = l + 1
+		# left half-edge: src -> tgt, right half-edge: tgt -> src
+		self.origin.append(s)
+		self.origin.append(t)
+		self.face.append(face)
+		self.face.append(face)
+		self.twin.append(r)
+		self.twin.append(l)
+		self.prev.append(self.prev[a])
+		self.prev.append(self.prev[b])
+		self.next.append(b)
+		self.next.append(a)
+		self.helper.append(-1)
+		self.helper.append(-1)
+
+		self.next[self.prev[l]] = l
+		self.prev[self.next[l]] = l
+		self.next[self.prev[r]] = r
+		self.prev[self.next[r]] = r
+		if s in self._fans:
+			self._fans[s].insert(i + 1, l)
+		if t in self._fans:
+			self._fans[t].insert(j + 1, r)
+		return l
+
+	def insert(self, src, tgt):
+		# as DCEL.insert: walk both sides in lockstep and only
+		# relabel the smaller one
+		l = self._link(src.i, tgt.i)
+		r = l + 1
+		nxt = self.next
+		face = self.face
+		a = nxt[r]
+		b = nxt[l]
+		while True:
+			if a == r or a == l:
+				first, stop = r, a
+				break
+			if b == l or b == r:
+				first, stop = l, b
+				break
+			a = nxt[a]
+			b = nxt[b]
+
+		if stop == first:
+			old_face = face[first]
+			f = self.new_face()
+			self.face_edge.append(-1)
+			self.face_edge[old_face] = self.twin[first]
+		else:
+			old_face = face[nxt[first]]
+			f = face[nxt[self.twin[first]]]
+			face[l] = face[r] = f
+		e = first
+		while True:
+			face[e] = f
+			e = nxt[e]
+			if e == stop:
+				break
+		self.face_edge[f] = first
+		if self.face_edge[old_face] != -1 and face[self.face_edge[old_face]] != old_face:
+			# joined: what is left of the old face is not walkable
+			self.face_edge[old_face] = -1
+
+	def insert_many(self, diagonals):
+		# as DCEL.insert_many, on the arrays
+		first = len(self.origin)
+		for src, tgt in diagonals:
+			self._link(src.i, tgt.i)
+
+		face = self.face
+		nxt = self.next
+		claimed = set()
+		old = set()
+		seen = bytearray(len(self.origin) - first)
+		for e0 in range(first, len(self.origin)):
+			if seen[e0 - first]:
+				continue
+			f = face[e0]
+			if f in claimed:
+				f = self.new_face()
+				self.face_edge.append(-1)
+			claimed.add(f)
+			self.face_edge[f] = e0
+			e = e0
+			while True:
+				if e >= first:
+					seen[e - first] = 1
+				old.add(face[e])
+				face[e] = f
+				e = nxt[e]
+				if e == e0:
+					break
+		for f in old - claimed:
+			# joined into another face
+			self.face_edge[f] = -1
+		return list(claimed)
+
+	def get_vertices(self):
+		return [CompactVertex(self, i) for i in range(len(self.x))]
+
+	def _corners(self):
+		# as DCEL._corners, gathered on the arrays (copies, so
+		# the arrays can still grow)
+		x = np.array(self.x, dtype = np.float64)
+		y = np.array(self.y, dtype = np.float64)
+		origin = np.array(self.origin, dtype = np.intp)
+		e = np.array(self.vert_edge, dtype = np.intp)
+		p = origin[np.array(self.prev, dtype = np.intp)[e]]
+		n = origin[np.array(self.next, dtype = np.intp)[e]]
+		return np.stack([x, y, x[p], y[p], x[n], y[n]])
+
+	def _face_cycles(self):
+		# as DCEL._face_cycles, on the arrays
+		origin = self.origin
+		twin = self.twin
+		nxt = self.next
+		face = self.face
+		for f in range(len(self.face_edge)):
+			e0 = self.face_edge[f]
+			if e0 == -1:
+				continue
+			verts = []
+			across = []
+			e = e0
+			while True:
+				verts += [CompactVertex(self, origin[e])]
+				t = twin[e]
+				across += [face[t] if t != -1 else None]
+				e = nxt[e]
+				if e == e0:
+					break
+			yield f, verts, across
+
+	# The arrays only grow: edits that take half-edges out are done
+	# on the object graph (to_dcel) and converted back with from_dcel.
+	def remove(self, edge):
+		raise TypeError("A CompactDCEL cannot remove half-edges, edit its to_dcel() instead")
+
+	def add_ring(self, vertices, hint = None):
+		raise TypeError("A CompactDCEL cannot be retriangulated in place, edit its to_dcel() instead")
+
+	def remove_ring(self, vertex):
+		raise TypeError("A CompactDCEL cannot be retriangulated in place, edit its to_dcel() instead")
+
+	def move_ring(self, vertex, vertices):
+		raise TypeError("A CompactDCEL cannot be retriangulated in place, edit its to_dcel() instead")
+
+	def insert_triangles(self, triangles):
+		raise TypeError("A CompactDCEL cannot be split into triangles in place, use its to_dcel() instead")
+
+	def locate_face(self, p, hint = None):
+		raise TypeError("A CompactDCEL has no point location, use its to_dcel() or a locate.TriangleLocator")
+
+	def to_dcel(self):
+		"""
+		Builds the object-graph DCEL (Vertex and ConnEdge objects)
+		with the same vertices, half-edges and faces.
+		"""
+		verts = [Vertex(self.x[i], self.y[i]) for i in range(len(self.x))]
+		r = DCEL([])
+		r.faces = self.faces
+		r._add_edges([ConnEdge(verts[o], 0, None, None, None) for o in self.origin])
+		for i in range(len(r.edges)):
+			e = r.edges[i]
+			e.face = self.face[i]
+			e.next = r.edges[self.next[i]]
+			e.prev = r.edges[self.prev[i]]
+			if self.twin[i] != -1:
+				e.twin = r.edges[self.twin[i]]
+		for i in range(len(verts)):
+			# in the order DCEL._corner searches
+			r.incident[verts[i]] = [r.edges[e] for e in self._around(i)]
+		for i in range(len(verts)):
+			verts[i].e = r.edges[self.vert_edge[i]]
+		r.face_edge = {}
+		for f in range(len(self.face_edge)):
+			if self.face_edge[f] != -1:
+				r.face_edge[f] = r.edges[self.face_edge[f]]
+		return r
+
+	def to_bytes(self):
+		"""
+		Serializes the DCEL as a little-endian header and its flat
+		arrays, in native byte order (it is meant for moving a DCEL
+		between processes on one machine). Helpers are sweep state
+		and are not kept.
+		"""
+		nv = len(self.x)
+		ne = len(self.origin)
+		r = [_HEADER.pack(_MAGIC, _VERSION, nv, ne, self.faces)]
+		for name, code, n in CompactDCEL._layout(nv, ne):
+			r += [getattr(self, name).tobytes()]
+		return b''.join(r)
+
+	def nbytes(self):
+		"""
+		The memory used by the arrays, in bytes.
+		"""
+		r = 0
+		for a in (self.x, self.y, self.vert_edge, self.origin, self.twin,
+				self.next, self.prev, self.face, self.helper):
+			r += a.itemsize*len(a)
+		return r
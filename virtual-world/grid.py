@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+class UniformGrid:
+	"""
+	A uniform grid of square cells over a bounding box, with
+	about 'cells' cells in total. Items are put in every cell
+	their bounding box touches, or only in those they overlap
+	(see fill). The cells are kept as compressed rows: the items
+	of cell c are items[start[c]:start[c+1]], so memory and
+	lookups go with the number of items in a cell on average,
+	not in the fullest one.
+	"""
+	def __init__(self, lo, hi, cells):
+		self.lo = np.asarray(lo, dtype=np.float64)
+		self.hi = np.asarray(hi, dtype=np.float64)
+		size = np.maximum(self.hi - self.lo, 1e-9)
+		# pad a little, so points on the border fall inside the grid
+		self.lo = self.lo - size*1e-6
+		self.hi = self.hi + size*1e-6
+		size = self.hi - self.lo
+
+		cells = max(1, int(cells))
+		self.cell = np.sqrt(size[0]*size[1]/cells)
+		if self.cell <= 0:
+			self.cell = max(size)/cells
+		self.n = np.maximum(np.ceil(size/self.cell).astype(int), 1)
+		self.start = np.zeros(self.n[0]*self.n[1] + 1, dtype=np.int64)
+		self.items = np.zeros(0, dtype=np.int64)
+
+	def cell_of(self, points):
+		c = np.floor((np.asarray(points) - self.lo)/self.cell).astype(int)
+		return np.clip(c, 0, self.n - 1)
+
+	def index(self, cells):
+		return cells[..., 0]*self.n[1] + cells[..., 1]
+
+	def fill(self, lo, hi, overlaps = None, chunk = 1 << 20):
+		"""
+		Buckets the items with bounding boxes from 'lo' to 'hi'
+		(arrays of shape (m, 2)); item i is stored as i.
+
+		'overlaps', if given, is called with an array of items and
+		one of cells (ix, iy) that their boxes touch, and returns
+		which of those items really overlap their cell; only those
+		are kept. It is called on about 'chunk' pairs at a time, so
+		long thin items, whose boxes touch far more cells than they
+		overlap, do not need memory for all of those cells at once.
+		"""
+		lo = np.asarray(lo, dtype=np.float64).reshape(-1, 2)
+		hi = np.asarray(hi, dtype=np.float64).reshape(-1, 2)
+		if overlaps is None:
+			item, cells = self.cells_of(lo, hi)
+		else:
+			span = self.cell_of(hi) - self.cell_of(lo) + 1
+			total = np.cumsum(span[:, 0]*span[:, 1])
+			items = [np.zeros(0, dtype=np.int64)]
+			kept = [np.zeros((0, 2), dtype=int)]
+			i = 0
+			while i < len(lo):
+				done = total[i-1] if i else 0
+				j = max(i + 1, int(np.searchsorted(total, done + chunk, side='right')))
+				which, c = self.cells_of(lo[i:j], hi[i:j])
+				which += i
+				keep = overlaps(which, c)
+				items += [which[keep]]
+				kept += [c[keep]]
+				i = j
+			item = np.concatenate(items)
+			cells = np.concatenate(kept)
+		index = self.index(cells)
+		# stable, so the items of a cell stay in order
+		self.items = item[np.argsort(index, kind='stable')]
+		self.start = np.zeros(self.n[0]*self.n[1] + 1, dtype=np.int64)
+		np.cumsum(np.bincount(index, minlength=self.n[0]*self.n[1]), out=self.start[1:])
+
+	def cells_of(self, lo, hi):
+		"""
+		The cells that the boxes from 'lo' to 'hi' (arrays of shape
+		(m, 2)) touch, as two flat arrays (which, cells): cells[i]
+		is a cell (ix, iy) of box which[i]. 'which' is sorted.
+		"""
+		c0 = self.cell_of(lo)
+		c1 = self.cell_of(hi)
+		span = c1 - c0 + 1
+		count = span[:, 0]*span[:, 1]
+		which = np.repeat(np.arange(len(c0)), count)
+		k = np.arange(len(which)) - np.repeat(np.cumsum(count) - count, count)
+		return which, c0[which] + np.stack([k // span[which, 1], k % span[which, 1]], axis=1)
+
+	def items_in(self, cells):
+		"""
+		The items of the cells with indices 'cells' (see index), as
+		two flat arrays (which, items): items[i] is in the cell
+		cells[which[i]]. 'which' is sorted.
+		"""
+		first = self.start[cells]
+		count = self.start[cells + 1] - first
+		which = np.repeat(np.arange(len(cells)), count)
+		k = np.arange(len(which)) - np.repeat(np.cumsum(count) - count, count)
+		return which, self.items[first[which] + k]
+
+	def items_at(self, points):
+		"""
+		items_in, for the cells of the points.
+		"""
+		return self.items_in(self.index(self.cell_of(points)))
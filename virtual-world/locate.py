@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from grid import UniformGrid
+
+class TriangleLocator:
+	"""
+	Point location over a triangulation: which triangle
+	contains a point.
+
+	The triangles are bucketed in a uniform grid of about one
+	triangle per cell, each in the cells it overlaps (not all the
+	cells of its bounding box, which for long thin triangles are
+	many), so a lookup only tests the few triangles of one cell:
+	O(1) expected. Single lookups first try the triangle of the
+	previous hit, as a moving robot (or cat) usually stays in the
+	same triangle for a while.
+
+	Triangles are triples of indices into 'points' and must
+	wind anti-clockwise. A point on a shared edge belongs to
+	either of its triangles.
+
+	'buckets' are the grid's cells from an earlier locator on the
+	same points and triangles, as (grid.start, grid.items), to skip
+	filling it.
+	"""
+	def __init__(self, points, triangles, buckets = None):
+		self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		self.triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+		if len(self.triangles) == 0:
+			raise ValueError("A TriangleLocator needs at least one triangle")
+		corners = self.points[self.triangles]
+		self.grid = UniformGrid(corners.min((0, 1)), corners.max((0, 1)), len(corners))
+		# one extra triangle that contains nothing, for hints of -1
+		self._corners = np.vstack([corners, np.full((1, 3, 2), np.nan)])
+		self._eps = 1e-12*self.grid.cell**2
+		if buckets is not None and len(buckets[0]) == len(self.grid.start):
+			self.grid.start = np.asarray(buckets[0])
+			self.grid.items = np.asarray(buckets[1])
+		else:
+			self.grid.fill(corners.min(1), corners.max(1), self._overlaps)
+		self.last = -1
+
+	def _overlaps(self, tris, cells):
+		"""
+		Whether each triangle of 'tris' overlaps its cell of 'cells'
+		(see UniformGrid.fill). Their bounding boxes do, so they are
+		apart only if the cell is wholly right of an edge: then its
+		corner furthest to the left of that edge is too. Cells are
+		taken a little larger, and points as close to a triangle as
+		_contains allows, so every point _contains finds in a
+		triangle is in a cell that holds it.
+		"""
+		c = self._corners[tris]
+		slack = 1e-9*self.grid.cell
+		lo = self.grid.lo + cells*self.grid.cell - slack
+		size = self.grid.cell + 2*slack
+		r = np.ones(len(tris), dtype=bool)
+		for i in range(3):
+			a = c[:, i, :]
+			b = c[:, (i+1) % 3, :]
+			ex = b[:, 0] - a[:, 0]
+			ey = b[:, 1] - a[:, 1]
+			qx = lo[:, 0] + np.where(ey < 0, size, 0)
+			qy = lo[:, 1] + np.where(ex > 0, size, 0)
+			r &= ex*(qy - a[:, 1]) - ey*(qx - a[:, 0]) >= -self._eps
+		return r
+
+	def _contains(self, tris, points):
+		"""
+		For triangle indices 'tris' of shape (n, k) and points of
+		shape (n, 2): whether each point is in each of its triangles.
+		"""
+		c = self._corners[tris]
+		p = points[:, None, :]
+		r = np.ones(tris.shape, dtype=bool)
+		for i in range(3):
+			a = c[..., i, :]
+			b = c[..., (i+1) % 3, :]
+			cross = (b[..., 0] - a[..., 0])*(p[..., 1] - a[..., 1]) \
+					- (b[..., 1] - a[..., 1])*(p[..., 0] - a[..., 0])
+			r &= cross >= -self._eps
+		return r
+
+	def locate(self, p):
+		"""
+		The index of the triangle containing point P, or -1.
+		"""
+		p = np.asarray(p, dtype=np.float64).reshape(1, 2)
+		if self.last != -1 and self._contains(np.array([[self.last]]), p)[0, 0]:
+			return self.last
+		r = int(self.locate_many(p)[0])
+		if r != -1:
+			self.last = r
+		return r
+
+	def locate_many(self, points, hints = None):
+		"""
+		Args:
+			points (array-like of shape (n, 2))
+			hints (optional array of n triangle indices, or -1, to
+				test first; for instance the result of the last call
+				for points that moved a little)
+		Returns:
+			An array of n triangle indices, -1 for points outside.
+		"""
+		points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		r = np.full(len(points), -1, dtype=np.int64)
+		todo = np.arange(len(points))
+		if hints is not None:
+			hints = np.asarray(hints, dtype=np.int64).reshape(-1)
+			hints = np.where(hints < 0, len(self.triangles), hints)
+			inside = self._contains(hints[:, None], points)[:, 0]
+			r[inside] = hints[inside]
+			todo = np.flatnonzero(~inside)
+		if len(todo):
+			which, tris = self.grid.items_at(points[todo])
+			inside = np.flatnonzero(self._contains(tris[:, None], points[todo][which])[:, 0])
+			# the first triangle that holds each point
+			found, first = np.unique(which[inside], return_index=True)
+			r[todo[found]] = tris[inside[first]]
+		return r
@@ -1,4 +1,6 @@
+import json
 import logging
+from collections import deque
 
 
 class ColorFormatter(logging.Formatter):
@@ -19,22 +21,123 @@ class ColorFormatter(logging.Formatter):
         return message
 
 
+# The level of every logger made by get; see set_level
+level = logging.INFO
+
 def get(name):
     l = logging.getLogger(name)
     if not l.hasHandlers():
         configure(l)
     return l
 
-def configure(l):
-    l.setLevel(logging.DEBUG)
+def configure(l, lvl = None):
+    l.setLevel(level if lvl is None else lvl)
 
     sh = logging.StreamHandler()
-    sh.setLevel(logging.DEBUG)
     sh.setFormatter(ColorFormatter('[{name:-^5}] [{levelname:-<8}] : {message}', style='{'))
     l.addHandler(sh)
 
     return l
 
+def set_level(lvl):
+    """
+    Sets the level of all loggers made by get, now and later
+    (a logging level such as logging.DEBUG, or its name).
+    """
+    global level
+    if isinstance(lvl, str):
+        lvl = logging.getLevelName(lvl.upper())
+    level = lvl
+    for l in logging.Logger.manager.loggerDict.values():
+        if isinstance(l, logging.Logger) and any(isinstance(h.formatter, ColorFormatter) for h in l.handlers):
+            l.setLevel(lvl)
+
+
+# The kinds of trace events and the names of their fields
+EVENTS = {
+    'vertex':   ('x', 'y', 'type'),             # a vertex handled by the sweep
+    'diagonal': ('x1', 'y1', 'x2', 'y2'),       # a diagonal queued for insertion
+    'status':   ('size',),                      # edges in the sweep status
+    'monotone': ('vertices', 'diagonals'),      # a monotone piece triangulated
+}
+
+class Trace:
+    """
+    A record of typed events, for looking at what an algorithm
+    did without logging it as text.
+
+    Events are tuples (kind, field, ...) with the fields of
+    EVENTS[kind], kept in a ring buffer of the last 'size' events:
+    recording is an append, and nothing is formatted until export.
+    'count' is the number of events recorded, including the
+    ones the buffer has dropped.
+
+    Code that can be traced asks tracing() once per run and only
+    records if there is a trace, so it costs nothing when off.
+    """
+    def __init__(self, size = 65536):
+        self.events = deque(maxlen = size)
+        self.count = 0
+
+    def record(self, kind, *fields):
+        self.events.append((kind,) + fields)
+        self.count += 1
+
+    @property
+    def dropped(self):
+        return self.count - len(self.events)
+
+    def clear(self):
+        self.events.clear()
+        self.count = 0
+
+    def export(self, path):
+        """
+        Writes the events as JSON lines, one object per event
+        with 'kind' and its named fields.
+        """
+        with open(path, 'w') as f:
+            for e in self.events:
+                d = {'kind': e[0]}
+                d.update(zip(EVENTS.get(e[0], ()), e[1:]))
+                f.write(json.dumps(d) + '\n')
+
+    def load(path, size = 65536):
+        """
+        Reads a trace written by export.
+        """
+        r = Trace(size)
+        with open(path) as f:
+            for line in f:
+                d = json.loads(line)
+                r.record(d['kind'], *[d[k] for k in EVENTS.get(d['kind'], ())])
+        return r
+
+_trace = None
+
+def start_trace(size = 65536):
+    """
+    Starts recording into a new Trace, and returns it.
+    """
+    global _trace
+    _trace = Trace(size)
+    return _trace
+
+def stop_trace():
+    """
+    Stops recording. Returns the Trace, or None.
+    """
+    global _trace
+    r = _trace
+    _trace = None
+    return r
+
+def tracing():
+    """
+    The Trace being recorded into, or None.
+    """
+    return _trace
+
 if __name__ == '__main__':
     print('Executing color test ...\n')
     for l ,c in ColorFormatter.colors.items():
@@ -43,8 +146,17 @@ if __name__ == '__main__':
 
     print('Executing logger test ...\n')
     l = get('LOG')
+    set_level('DEBUG')
     for i in range(6):
         l.log( i *10, '[%d] the quick brown fox jumps over the lazy dog', i* 10)
     print()
 
+    print('Executing trace test ...\n')
+    t = start_trace(4)
+    for i in range(6):
+        t.record('status', i)
+    print(list(t.events), 'dropped', t.dropped)
+    stop_trace()
+    print()
+
     print('Tests complete!')
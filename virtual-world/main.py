@@ -3,11 +3,21 @@
 
 import json
 import logg
+import meshfile
 import tri
 import vis
+import cache
+from raycast import RayCaster, ring_segments
+from locate import TriangleLocator
+from nav import NavMesh
+from union import union as polygon_union
 
 class Room:
 	l = logg.get("ROOM")
+	# A cache.TriangulationCache to keep triangulations on disk
+	# across runs, or None; off unless the environment asks for
+	# it (see the README)
+	tri_cache = cache.from_environment()
 
 	def from_json(path='room1.json'):
 		with open(path) as f:
@@ -17,46 +27,385 @@ class Room:
 		Room.l.debug("Room interpeted as %s", repr(r))
 		return r
 
+	def from_mesh(path):
+		"""
+		Loads a room from a mesh file (see meshfile.py), with no
+		triangulation: self.triangles, the point locator and the
+		navigation mesh are the mapped arrays. The DCEL and its
+		vertices, which are objects, are only built when an obstacle
+		is first edited (self.dcel and self.vertices are None until
+		then).
+		"""
+		mesh = meshfile.MeshFile(path)
+		meta = mesh.meta
+		return Room(name=meta['name'], wu_per_m=meta['wu_per_m'],
+				shape=meta['shape'], obstacles=meta['obstacles'], mesh=mesh)
+
 	def __init__(self, **kwargs):
 		# Data variables (user information + winding vertices)
 		self.name = kwargs['name']				if 'name' in kwargs			else 'null'
 		self.wu_per_m = kwargs['wu_per_m']		if 'wu_per_m' in kwargs		else 1
 		self.shape = kwargs['shape']			if 'shape' in kwargs		else []
-		self.obstacles = kwargs['obstacles']	if 'obstacles' in kwargs	else [[]]
+		# a copy: the obstacle edits change this list in place
+		self.obstacles = [list(o) for o in kwargs['obstacles']]	if 'obstacles' in kwargs	else [[]]
 		
 		# These are what store all information!
-		self.vertices = []
-		self.triangles = []
+		self.vertices = []		# tri.Vertex objects of all rings, in order
+		self.triangles = []		# triples of indices into self.vertices
+		self.dcel = None
+		self._holes = {}
+		# Per triangle its face label in self.dcel, and the reverse,
+		# and the index of every vertex, so obstacle edits can patch
+		# the lists above; None until they are first needed
+		self._faces = None
+		self._face_index = None
+		self._vertex_index = None
+		# Built on first use, from the geometry above
+		self._invalidate()
 		
-		self._triangulate()
+		if 'mesh' in kwargs:
+			self._load_mesh(kwargs['mesh'])
+		else:
+			self._triangulate()
 		
+	def _rings(self):
+		"""
+		The rings that make up the room, as lists of [x, y]:
+		first the shape, winding anti-clockwise, then every
+		obstacle, winding clockwise.
+		"""
+		shape = list(self.shape)
+		if tri.signed_area(shape) < 0:
+			shape.reverse()
+		rings = [shape]
+		for obstacle in self.obstacles:
+			if len(obstacle) < 3:
+				continue
+			obstacle = list(obstacle)
+			if tri.signed_area(obstacle) > 0:
+				obstacle.reverse()
+			rings += [obstacle]
+		return rings
+	
+	def _invalidate(self):
+		"""
+		Drops everything derived from the geometry (ray caster,
+		point locator, navigation mesh and its path caches), to be
+		rebuilt on first use. Call this when the geometry changes.
+		"""
+		self._caster = None
+		self._locator = None
+		self._navmesh = None
+		# the mesh file the room was loaded from, while it is current
+		self._mesh = None
+	
 	def _triangulate(self):
-		# TODO: some magic (sweep algorithm)
-		Room.l.critical("Triangulation algorithm not finished yet!")
-		pass
+		self._invalidate()
+		if len(self.shape) < 3:
+			Room.l.warning("Room '%s' has no shape to triangulate", self.name)
+			return
+		rings = self._rings()
+		ring_vertices = [tri.Vertex.tuples_to_vertices(ring) for ring in rings]
+		self.vertices = []
+		for ring in ring_vertices:
+			self.vertices += ring
+		self.dcel = tri.DCEL(ring_vertices[0], holes = ring_vertices[1:])
+		# per obstacle index, a vertex on it, to find its ring again
+		kept = [i for i in range(len(self.obstacles)) if len(self.obstacles[i]) >= 3]
+		self._holes = dict(zip(kept, [ring[0] for ring in ring_vertices[1:]]))
+		
+		entry = Room.tri_cache.get(rings) if Room.tri_cache else None
+		if entry:
+			# warm start: the faces are the cached triangles, so the
+			# DCEL is built from them without a sweep or a search
+			self.triangles = [tuple(t) for t in entry['triangles']]
+			V = self.vertices
+			faces = self.dcel.insert_triangles([(V[a], V[b], V[c]) for a, b, c in self.triangles])
+			self._set_indices(faces)
+			return
+		
+		tri.TriangleSweep(self.dcel).sweep()
+		self._index_triangles()
+		if Room.tri_cache:
+			Room.tri_cache.put(rings, self.triangles)
+	
+	def _load_mesh(self, mesh):
+		self.dcel = None
+		self.vertices = None
+		self.triangles = mesh.triangles
+		self._mesh = mesh
+		self._faces = None
+	
+	def _object_dcel(self):
+		"""
+		self.dcel, first built from the mesh file the room was
+		loaded from if it has not been yet (see from_mesh).
+		"""
+		if self.dcel is None and self._mesh is not None:
+			mesh = self._mesh
+			self.dcel = mesh.compact_dcel().to_dcel()
+			self.vertices = self.dcel.get_vertices()
+			self._holes = dict((int(i), self.vertices[v]) for i, v in mesh.meta['holes'].items())
+		return self.dcel
+	
+	def save_mesh(self, path):
+		"""
+		Writes the room to a mesh file, see meshfile.save.
+		"""
+		meshfile.save(self, path)
+	
+	def _index_triangles(self):
+		"""
+		Sets self.triangles from the faces of self.dcel.
+		Returns the index of every vertex in self.vertices.
+		"""
+		index = {}
+		for i in range(len(self.vertices)):
+			index[self.vertices[i]] = i
+		polys = self.dcel.gen_face_data(q=["faces"])["polys"]
+		self.triangles = [tuple(index[v] for v in poly) for poly in polys.values()]
+		self._set_indices(list(polys), index)
+		return index
+	
+	def _set_indices(self, faces, index = None):
+		"""
+		Sets the indices that obstacle edits patch self.triangles
+		and self.vertices with: 'faces' are the face labels of
+		self.triangles, in order, and 'index' the index of every
+		vertex, if it is known already.
+		"""
+		if index is None:
+			index = {}
+			for i in range(len(self.vertices)):
+				index[self.vertices[i]] = i
+		self._faces = list(faces)
+		self._face_index = {}
+		for i in range(len(self._faces)):
+			self._face_index[self._faces[i]] = i
+		self._vertex_index = index
+	
+	def add_obstacle(self, obstacle):
+		"""
+		Adds an obstacle (a list of [x, y]) to the room, and only
+		triangulates the part of the room around it again.
+		Returns its index in self.obstacles.
+		
+		Raises a ValueError if it does not lie in free space; the
+		room is left as it was.
+		"""
+		vertices = tri.Vertex.tuples_to_vertices(obstacle)
+		removed, created = self._object_dcel().add_ring(vertices)
+		self.obstacles += [list(obstacle)]
+		self._holes[len(self.obstacles) - 1] = vertices[0]
+		self._geometry_changed(removed, created)
+		return len(self.obstacles) - 1
+	
+	def remove_obstacle(self, i):
+		"""
+		Removes obstacle 'i'. Its entry in self.obstacles becomes
+		empty, so the indices of the other obstacles stay the same.
+		"""
+		dcel = self._object_dcel()
+		removed, created = dcel.remove_ring(self._holes.pop(i))
+		self.obstacles[i] = []
+		self._geometry_changed(removed, created)
+	
+	def move_obstacle(self, i, obstacle):
+		"""
+		Moves obstacle 'i' to 'obstacle' (a list of [x, y]). Raises
+		a ValueError if it does not fit there; it then stays put.
+		"""
+		vertices = tri.Vertex.tuples_to_vertices(obstacle)
+		try:
+			removed, created = self._object_dcel().move_ring(self._holes[i], vertices)
+		except ValueError:
+			# it was put back, but triangulated anew around it
+			self._geometry_changed()
+			raise
+		self.obstacles[i] = list(obstacle)
+		self._holes[i] = vertices[0]
+		self._geometry_changed(removed, created)
+	
+	def _geometry_changed(self, removed = None, created = None):
+		"""
+		The DCEL was updated in place: patches self.triangles and
+		self.vertices for the faces 'removed' and 'created' (labels,
+		see DCEL.add_ring) only, so this costs as much as the edit
+		did. Without them, or without the indices to patch with
+		(see _set_indices), they are rebuilt from the whole DCEL.
+		The derived structures are rebuilt on first use.
+		"""
+		self._invalidate()
+		if removed is None or self._faces is None:
+			self.vertices = self.dcel.get_vertices()
+			self._index_triangles()
+			return
+		dcel = self.dcel
+		vindex = self._vertex_index
+		
+		# the vertices of the removed triangles that may be gone
+		free = []
+		old = set()
+		for f in removed:
+			i = self._face_index.pop(f)
+			free += [i]
+			old.update(self.vertices[v] for v in self.triangles[i])
+		# the new triangles take the places of the old ones, new
+		# vertices go at the end
+		free.sort()
+		for f in created:
+			e = dcel.face_edge[f]
+			t = []
+			for v in (e.origin, e.next.origin, e.next.next.origin):
+				if v not in vindex:
+					vindex[v] = len(self.vertices)
+					self.vertices += [v]
+				t += [vindex[v]]
+			if free:
+				i = free.pop(0)
+				self.triangles[i] = tuple(t)
+				self._faces[i] = f
+			else:
+				i = len(self.triangles)
+				self.triangles += [tuple(t)]
+				self._faces += [f]
+			self._face_index[f] = i
+		# the last triangle takes the place of each one left over,
+		# from the back, so it is never one of them itself
+		for i in reversed(free):
+			last = len(self.triangles) - 1
+			if i != last:
+				self.triangles[i] = self.triangles[last]
+				self._faces[i] = self._faces[last]
+				self._face_index[self._faces[i]] = i
+			self.triangles.pop()
+			self._faces.pop()
+		# and the last vertex the place of each one that is gone,
+		# in the triangles around it too
+		gone = sorted((vindex[v] for v in old if v not in dcel.incident), reverse = True)
+		for i in gone:
+			del vindex[self.vertices[i]]
+			last = len(self.vertices) - 1
+			if i != last:
+				w = self.vertices[last]
+				self.vertices[i] = w
+				vindex[w] = i
+				for e in dcel.incident[w]:
+					k = self._face_index[e.face]
+					self.triangles[k] = tuple(i if v == last else v for v in self.triangles[k])
+			self.vertices.pop()
+	
+	def union(rooms, name = None):
+		"""
+		The union of a list of rooms (their free space), as one
+		new room, merged in a single sweep (see union.union).
+		Obstacles that only covered part of a room and are still
+		covered by none of the others stay obstacles.
+		
+		Raises a ValueError if the rooms do not make up one piece.
+		"""
+		rings = []
+		for room in rooms:
+			rings += room._rings()
+		parts = polygon_union(rings)
+		if len(parts) != 1:
+			raise ValueError("The union of the rooms has {} separate parts".format(len(parts)))
+		shape, holes = parts[0]
+		return Room(
+			name = name or '+'.join(room.name for room in rooms),
+			wu_per_m = rooms[0].wu_per_m,
+			shape = [list(p) for p in shape],
+			obstacles = [[list(p) for p in hole] for hole in holes])
 	
 	def _union(self, other):
 		"""
 		This will return the union of two rooms,
 		defined as another room
 		"""
-		pass
+		return Room.union([self, other])
+	
+	def _ray_caster(self):
+		if self._caster is None:
+			self._caster = RayCaster(ring_segments(self._rings()))
+		return self._caster
+	
+	def _triangle_locator(self):
+		if self._locator is None and self._mesh is not None:
+			# the navigation mesh numbers the triangles as we do
+			self._locator = self._nav_mesh().locator
+		if self._locator is None:
+			points = [(v.x, v.y) for v in self.vertices]
+			self._locator = TriangleLocator(points, self.triangles)
+		return self._locator
+	
+	def locate(self, p):
+		"""
+		The index in self.triangles of the triangle that
+		contains point P, or -1 if P is not in the room.
+		"""
+		return self._triangle_locator().locate(p)
+	
+	def locate_many(self, points, hints = None):
+		"""
+		Like locate, for an (n, 2) array of points at once.
+		See TriangleLocator.locate_many for 'hints'.
+		"""
+		return self._triangle_locator().locate_many(points, hints)
 	
 	def vision(self, a, d):
 		"""
 		The distance to the first wall from
 		point A in direction D (2D vector)
+		
+		Walls are the shape and the obstacles. The distance is in
+		world units, and is inf if the ray hits nothing.
 		"""
-		pass
+		if d[0] == 0 and d[1] == 0:
+			raise ValueError("Cannot look in direction {}".format(d))
+		return float(self._ray_caster().cast(a, d)[0])
+	
+	def vision_many(self, points, directions):
+		"""
+		Like vision, but for arrays of rays at once: 'points' and
+		'directions' have shape (n, 2), or (2,) to use one point or
+		one direction for all rays (a lidar sweep from one place).
+		Returns an array of n distances; a zero direction gives nan.
+		"""
+		return self._ray_caster().cast(points, directions)
 	
 	def path_find(self, a, b, rad):
 		"""
-		Finds the shortest path between A and B,
+		Finds a short path between A and B,
 		assuming the pathwalker is has a certain radius
+		(nearly always the shortest; see nav.NavMesh.find_path)
 		
-		This is not implemented
+		Returns the corners of the path as a list of (x, y),
+		A first and B last, or None if there is no path.
+		See nav.NavMesh for how the radius is handled.
+		"""
+		navmesh = self._nav_mesh()
+		if navmesh is None:
+			return None
+		return navmesh.find_path(a, b, rad)
+	
+	def _nav_mesh(self):
+		if self._navmesh is None and self._mesh is not None:
+			self._navmesh = self._mesh.nav_mesh()
+		if self._navmesh is None and self.dcel is not None:
+			self._navmesh = NavMesh(self.dcel)
+		return self._navmesh
+	
+	def precompute_paths(self, rad = 0):
+		"""
+		Builds the all-pairs path tables for agents of radius 'rad',
+		so path_find also tries their routes, which are sometimes
+		shorter than the ones A* finds on its own. This takes
+		time and memory quadratic in the number of triangles (about
+		10 s and 17 MB for 1000 vertices); see nav.NavMesh.precompute.
 		"""
-		pass
+		navmesh = self._nav_mesh()
+		if navmesh is not None:
+			navmesh.precompute(rad)
 		
 	def __repr__(self):
 		return 'Room(**{})'.format(self.__dict__)
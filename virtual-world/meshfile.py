@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+A binary file format for triangulated rooms, made to be loaded
+with mmap: a fixed header, then flat little-endian arrays, each
+starting on an 8-byte boundary, then a small JSON block with
+what is left (name, scale and the rings, to edit the room again).
+
+	header		magic 'CTRM', version, flags, vertex, half-edge,
+				triangle and table counts, the sizes of the
+				locator grid and the JSON size
+	points		float64 (nv, 2)		vertex coordinates
+	vert_edge	int32 (nv)			an outgoing (boundary) half-edge
+	origin, twin, next, prev, face
+				int32 (ne) each		the half-edges of the DCEL, as in
+									compact.CompactDCEL; 'face' is
+									the triangle of the half-edge
+	triangles	int32 (nt, 3)		vertex indices, anti-clockwise
+	tri_edge	int32 (nt)			the half-edge from corner 0
+	adjacency	int32 (nt, 3)		the triangle across the edge from
+									corner k to k+1, or -1 for a wall
+	width		float64 (nt, 3)		the width of that edge
+	clearance	float64 (nt, 3)		the width of the way through the
+									triangle between the two edges
+									at corner k, see NavMesh.clearance
+	cell_start	int32 (cells + 1)	the grid of the point locator (see
+	cell_items	int32 (items)		TriangleLocator): the triangles of
+									cell c are cell_items[cell_start[c]
+									:cell_start[c+1]]
+	per path table (one per radius class, see nav.NavMesh.precompute):
+		dist	float64 (nt, nt)
+		exit	int8 (nt, nt)
+		back	int8 (3 nt, nt)
+	meta		JSON
+
+MeshFile maps a file read-only and gives every array as a numpy
+view on the mapping: nothing is parsed or copied, and processes
+that map the same file share one copy of it in the page cache.
+
+Run as a script to convert rooms (see the usage below).
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+import logg
+from compact import CompactDCEL
+from nav import NavMesh
+import svg
+
+# magic, version, flags, vertex count, half-edge count,
+# triangle count, table count, grid cell and item counts, JSON size
+_HEADER = struct.Struct('<4sHHIIIIIIQ')
+_MAGIC = b'CTRM'
+VERSION = 4
+
+def _align(n):
+	return (n + 7) & ~7
+
+def _layout(nv, ne, nt, tables, cells = 0, items = 0):
+	"""
+	The sections of a file, in order, as (name, dtype, shape).
+	"""
+	r = [('points', '<f8', (nv, 2)), ('vert_edge', '<i4', (nv,))]
+	for name in ('origin', 'twin', 'next', 'prev', 'face'):
+		r += [(name, '<i4', (ne,))]
+	r += [('triangles', '<i4', (nt, 3)), ('tri_edge', '<i4', (nt,)),
+			('adjacency', '<i4', (nt, 3)), ('width', '<f8', (nt, 3)),
+			('clearance', '<f8', (nt, 3)), ('cell_start', '<i4', (cells + 1,)),
+			('cell_items', '<i4', (items,))]
+	for i in range(tables):
+		r += [('dist{}'.format(i), '<f8', (nt, nt)), ('exit{}'.format(i), '<i1', (nt, nt)),
+				('back{}'.format(i), '<i1', (3*nt, nt))]
+	return r
+
+def _mesh_arrays(dcel):
+	"""
+	The arrays of a triangulated DCEL, as a dict by section name.
+	Raises a ValueError if a face is not a triangle.
+	"""
+	c = CompactDCEL.from_dcel(dcel)
+	ne = len(c.origin)
+	origin = np.frombuffer(c.origin, dtype=np.int32)
+	nxt = np.frombuffer(c.next, dtype=np.int32)
+	twin = np.frombuffer(c.twin, dtype=np.int32)
+
+	# number the faces by their first half-edge
+	tri_of = {}
+	tri_edge = []
+	for e in range(ne):
+		f = c.face[e]
+		if f not in tri_of:
+			tri_of[f] = len(tri_edge)
+			tri_edge += [e]
+	tri_edge = np.array(tri_edge, dtype=np.int32)
+	e1 = nxt[tri_edge]
+	e2 = nxt[e1]
+	if len(tri_edge) and (nxt[e2] != tri_edge).any():
+		raise ValueError("Only a triangulated room can be stored as a mesh")
+	face = np.array([tri_of[f] for f in c.face], dtype=np.int32)
+
+	corner_edges = np.stack([tri_edge, e1, e2], axis=1)
+	points = np.stack([np.frombuffer(c.x), np.frombuffer(c.y)], axis=1)
+	triangles = origin[corner_edges]
+	twins = twin[corner_edges]
+	adjacency = np.where(twins == -1, -1, face[np.maximum(twins, 0)]).astype(np.int32)
+	d = points[triangles[:, [1, 2, 0]]] - points[triangles]
+	width = np.where(adjacency == -1, 0, np.hypot(d[..., 0], d[..., 1]))
+	return {
+		'points': points, 'vert_edge': c.vert_edge, 'origin': origin,
+		'twin': twin, 'next': nxt, 'prev': c.prev, 'face': face,
+		'triangles': triangles, 'tri_edge': tri_edge,
+		'adjacency': adjacency, 'width': width,
+	}
+
+def save(room, path):
+	"""
+	Writes a triangulated Room to 'path', with the path tables
+	of its navigation mesh if it has any (Room.precompute_paths).
+	The vertices keep the order of room.dcel (get_vertices),
+	which obstacle edits do not keep room.vertices in.
+	"""
+	arrays = _mesh_arrays(room._object_dcel())
+	nv = len(arrays['points'])
+	ne = len(arrays['origin'])
+	nt = len(arrays['triangles'])
+	ours = NavMesh.from_arrays(arrays['points'], arrays['triangles'], arrays['adjacency'])
+	arrays['clearance'] = ours.clearances()
+	arrays['cell_start'] = ours.locator.grid.start
+	arrays['cell_items'] = ours.locator.grid.items
+	cells = len(arrays['cell_start']) - 1
+	items = len(arrays['cell_items'])
+
+	navmesh = room._navmesh
+	classes = []
+	if navmesh is not None and navmesh.tables:
+		# NavMesh numbers its vertices and triangles its own way:
+		# map its triangles to ours, by their corners, and its
+		# edges to ours by how far the corners are rotated
+		points = [tuple(p) for p in arrays['points'].tolist()]
+		ours = {}
+		for i in range(nt):
+			ours[frozenset(points[v] for v in arrays['triangles'][i].tolist())] = i
+		order = []
+		rot = []
+		theirs = [tuple(p) for p in navmesh.points.tolist()]
+		for t in navmesh.triangles.tolist():
+			corners = [theirs[v] for v in t]
+			i = ours[frozenset(corners)]
+			order += [i]
+			rot += [[points[v] for v in arrays['triangles'][i].tolist()].index(corners[0])]
+		order = np.array(order, dtype=np.int64)
+		rot = np.array(rot, dtype=np.int64)
+		# per row of a back table: the triangle, its edge and the
+		# triangle across, in NavMesh numbering
+		rows = np.arange(3*nt)
+		across = navmesh.adjacency.astype(np.int64).reshape(-1)
+		row_order = 3*order[rows // 3] + (rows % 3 + rot[rows // 3]) % 3
+		for k in sorted(navmesh.tables):
+			dist, exit, back = navmesh.tables[k]
+			i = len(classes)
+			arrays['dist{}'.format(i)] = np.empty((nt, nt))
+			arrays['dist{}'.format(i)][np.ix_(order, order)] = dist
+			arrays['exit{}'.format(i)] = np.empty((nt, nt), dtype=np.int8)
+			arrays['exit{}'.format(i)][np.ix_(order, order)] = np.where(exit == -1, -1, (exit + rot[:, None]) % 3)
+			arrays['back{}'.format(i)] = np.empty((3*nt, nt), dtype=np.int8)
+			turn = rot[np.maximum(across, 0)][:, None]
+			arrays['back{}'.format(i)][np.ix_(row_order, order)] = np.where(back == -1, -1, (back + turn) % 3)
+			classes += [k]
+
+	index = {}
+	vertices = room.dcel.get_vertices()
+	for i in range(len(vertices)):
+		index[vertices[i]] = i
+	meta = {
+		'name': room.name,
+		'wu_per_m': room.wu_per_m,
+		'shape': room.shape,
+		'obstacles': room.obstacles,
+		# per obstacle index, the index of a vertex on it
+		'holes': dict((str(i), index[v]) for i, v in room._holes.items()),
+		'faces': room.dcel.faces,
+		'rad_step': navmesh.rad_step if navmesh is not None else None,
+		'tables': classes,
+	}
+	meta = json.dumps(meta).encode('utf-8')
+
+	with open(path, 'wb') as f:
+		f.write(_HEADER.pack(_MAGIC, VERSION, 0, nv, ne, nt, len(classes), cells, items, len(meta)))
+		pos = _HEADER.size
+		for name, dtype, shape in _layout(nv, ne, nt, len(classes), cells, items):
+			f.write(b'\0'*(_align(pos) - pos))
+			data = np.ascontiguousarray(arrays[name], dtype=dtype).reshape(shape).tobytes()
+			f.write(data)
+			pos = _align(pos) + len(data)
+		f.write(meta)
+
+class MeshFile:
+	"""
+	A mesh file, mapped read-only.
+
+	Every section is an attribute holding a read-only numpy view on
+	the mapping ('points', 'triangles', 'adjacency', ...), 'tables'
+	maps radius classes to (dist, exit, back) views, and 'meta' is the
+	JSON block. Raises a ValueError if the file is not a mesh of
+	this version.
+	"""
+	def __init__(self, path):
+		self.l = logg.get("MESH")
+		with open(path, 'rb') as f:
+			# the mapping stays valid after the file is closed
+			self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		size = len(self._map)
+		if size < _HEADER.size:
+			raise ValueError("'{}' is not a mesh file".format(path))
+		magic, version, flags, nv, ne, nt, ntab, cells, items, nmeta = _HEADER.unpack_from(self._map)
+		if magic != _MAGIC:
+			raise ValueError("'{}' is not a mesh file".format(path))
+		if version != VERSION:
+			raise ValueError("'{}' is a mesh file of version {}, not {}".format(path, version, VERSION))
+
+		pos = _HEADER.size
+		for name, dtype, shape in _layout(nv, ne, nt, ntab, cells, items):
+			pos = _align(pos)
+			count = int(np.prod(shape))
+			if pos + count*np.dtype(dtype).itemsize > size:
+				raise ValueError("'{}' is cut short".format(path))
+			a = np.frombuffer(self._map, dtype=dtype, count=count, offset=pos).reshape(shape)
+			setattr(self, name, a)
+			pos += a.nbytes
+		self.meta = json.loads(self._map[pos:pos+nmeta].decode('utf-8'))
+		self.tables = {}
+		for i in range(ntab):
+			self.tables[self.meta['tables'][i]] = tuple(getattr(self, '{}{}'.format(name, i)) for name in ('dist', 'exit', 'back'))
+		self.l.debug("Mapped '%s': %d vertices, %d triangles, %d path tables", path, nv, nt, ntab)
+
+	def compact_dcel(self):
+		"""
+		The DCEL of the mesh, as a CompactDCEL. Its arrays are
+		copied, as a CompactDCEL grows them in place.
+		"""
+		r = CompactDCEL([])
+		r.x.extend(self.points[:, 0].tolist())
+		r.y.extend(self.points[:, 1].tolist())
+		for name in ('vert_edge', 'origin', 'twin', 'next', 'prev', 'face'):
+			getattr(r, name).extend(getattr(self, name).tolist())
+		r.helper.extend([-1]*len(r.origin))
+		r.faces = self.meta['faces']
+		r._index_faces()
+		return r
+
+	def nav_mesh(self, cache_size = 1024):
+		"""
+		A nav.NavMesh on the arrays of the mesh, with its path tables.
+		"""
+		rad_step = self.meta['rad_step'] or 0.05
+		r = NavMesh.from_arrays(self.points, self.triangles, self.adjacency, cache_size, rad_step,
+				self.clearance, (self.cell_start, self.cell_items))
+		r.tables.update(self.tables)
+		return r
+
+	def close(self):
+		"""
+		Unmaps the file. The arrays of this MeshFile must not be
+		in use any more.
+		"""
+		for name, dtype, shape in _layout(0, 0, 0, len(self.tables)):
+			setattr(self, name, None)
+		self.tables = {}
+		self._map.close()
+
+def load(path):
+	return MeshFile(path)
+
+def json_to_mesh(json_path, mesh_path, rad = None):
+	"""
+	Converts a room in JSON (see main.Room.from_json) to a mesh
+	file; with 'rad', path tables for that radius are included.
+	"""
+	from main import Room
+	room = Room.from_json(json_path)
+	if rad is not None:
+		room.precompute_paths(rad)
+	save(room, mesh_path)
+	return room
+
+def svg_to_mesh(svg_path, mesh_path, rad = None):
+	"""
+	Converts every path in an SVG file to a room (its largest ring
+	is the shape, the others are obstacles) and writes it to a
+	mesh file. With several paths, the files are numbered:
+	'plan.mesh' becomes 'plan-0.mesh', 'plan-1.mesh', ...
+	Returns the names of the files written.
+	"""
+	from main import Room
+	import tri
+	base, ext = os.path.splitext(mesh_path)
+	rooms = []
+	for rings in svg.iter_rings(svg_path):
+		rings = sorted(rings, key=lambda r: -abs(tri.signed_area(r)))
+		rooms += [Room(name='{}-{}'.format(os.path.basename(base), len(rooms)),
+				shape=[list(p) for p in rings[0]],
+				obstacles=[[list(p) for p in r] for r in rings[1:]])]
+	if not rooms:
+		raise ValueError("No paths in '{}'".format(svg_path))
+	if len(rooms) == 1:
+		rooms[0].name = os.path.basename(base)
+		names = [mesh_path]
+	else:
+		names = ['{}-{}{}'.format(base, i, ext) for i in range(len(rooms))]
+	for room, name in zip(rooms, names):
+		if rad is not None:
+			room.precompute_paths(rad)
+		save(room, name)
+	return names
+
+def mesh_to_json(mesh_path, json_path):
+	"""
+	Writes the room of a mesh file back out as JSON.
+	"""
+	mesh = MeshFile(mesh_path)
+	data = dict((k, mesh.meta[k]) for k in ('name', 'wu_per_m', 'shape', 'obstacles'))
+	mesh.close()
+	with open(json_path, 'w') as f:
+		json.dump(data, f, indent='\t')
+
+def mesh_to_svg(mesh_path, svg_path):
+	"""
+	Writes the room of a mesh file as an SVG with one path (the
+	shape, then the obstacles) that svg_to_mesh reads back as the
+	same room, see svg.write_rings.
+	"""
+	mesh = MeshFile(mesh_path)
+	meta = mesh.meta
+	mesh.close()
+	rings = [meta['shape']] + [o for o in meta['obstacles'] if len(o) >= 3]
+	svg.write_rings(svg_path, rings, meta['name'])
+
+_USAGE = """usage: python meshfile.py IN OUT [RADIUS]
+
+Converts between rooms in JSON (.json), SVG floor plans (.svg)
+and mesh files (.mesh), by the extensions of IN and OUT. With a
+RADIUS, the mesh gets path tables for agents of that radius."""
+
+def main(args):
+	if len(args) not in (2, 3):
+		print(_USAGE)
+		return 2
+	src, dst = args[:2]
+	rad = float(args[2]) if len(args) == 3 else None
+	kinds = (os.path.splitext(src)[1].lower(), os.path.splitext(dst)[1].lower())
+	if kinds == ('.json', '.mesh'):
+		json_to_mesh(src, dst, rad)
+	elif kinds == ('.svg', '.mesh'):
+		svg_to_mesh(src, dst, rad)
+	elif kinds == ('.mesh', '.json'):
+		mesh_to_json(src, dst)
+	elif kinds == ('.mesh', '.svg'):
+		mesh_to_svg(src, dst)
+	else:
+		print(_USAGE)
+		return 2
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
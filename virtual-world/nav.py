@@ -0,0 +1,781 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+from collections import OrderedDict
+from math import asin, atan2, ceil, cos, hypot, pi, sin
+import numpy as np
+import logg
+from grid import UniformGrid
+from locate import TriangleLocator
+
+def _cross(o, a, b):
+	return (a[0] - o[0])*(b[1] - o[1]) - (a[1] - o[1])*(b[0] - o[0])
+
+def _dist(a, b):
+	return hypot(a[0] - b[0], a[1] - b[1])
+
+# the corner shared by the edges in slots k and l of a triangle
+_CORNER = ((-1, 1, 0), (1, -1, 2), (0, 2, -1))
+
+def _clip(u, v, halfplanes):
+	"""
+	The part of segment UV where every (point, normal) half-plane
+	holds, that is dot(P - point, normal) >= 0, as a pair of
+	points, or None if there is no such part.
+	"""
+	lo, hi = 0, 1
+	for (px, py), (nx, ny) in halfplanes:
+		fu = (u[0] - px)*nx + (u[1] - py)*ny
+		fv = (v[0] - px)*nx + (v[1] - py)*ny
+		if fu < 0 and fv < 0:
+			return None
+		if fu < 0:
+			lo = max(lo, fu/(fu - fv))
+		elif fv < 0:
+			hi = min(hi, fu/(fu - fv))
+	if lo > hi:
+		return None
+	dx, dy = v[0] - u[0], v[1] - u[1]
+	return (u[0] + lo*dx, u[1] + lo*dy), (u[0] + hi*dx, u[1] + hi*dy)
+
+def _seg_dist(p, a, b):
+	"""
+	The distance from point P to the segment AB.
+	"""
+	dx, dy = b[0] - a[0], b[1] - a[1]
+	dd = dx*dx + dy*dy
+	t = 0 if dd == 0 else max(0, min(1, ((p[0] - a[0])*dx + (p[1] - a[1])*dy)/dd))
+	return hypot(p[0] - a[0] - t*dx, p[1] - a[1] - t*dy)
+
+def _nearest(p, u, v):
+	"""
+	The point of segment UV closest to point P.
+	"""
+	dx, dy = v[0] - u[0], v[1] - u[1]
+	dd = dx*dx + dy*dy
+	t = 0 if dd == 0 else max(0, min(1, ((p[0] - u[0])*dx + (p[1] - u[1])*dy)/dd))
+	return (u[0] + t*dx, u[1] + t*dy)
+
+def _toward(p, b, u, v):
+	"""
+	The point X of segment UV that makes |PX| + |XB| shortest:
+	where the line from P to B (mirrored across UV, if both are on
+	the same side) crosses it, or the nearest end.
+	"""
+	sp = _cross(u, v, p)
+	sb = _cross(u, v, b)
+	if sp*sb > 0:
+		# B's mirror image across the line through U and V
+		dx, dy = v[0] - u[0], v[1] - u[1]
+		t = 2*sb/(dx*dx + dy*dy)
+		b = (b[0] + t*dy, b[1] - t*dx)
+		sb = -sb
+	if sp == sb:
+		return _nearest(p, u, v)
+	s = sp/(sp - sb)
+	return _nearest((p[0] + s*(b[0] - p[0]), p[1] + s*(b[1] - p[1])), u, v)
+
+def _shrink(left, right, width, rad):
+	# a portal with both ends pulled 'rad' towards each other
+	if rad > 0 and width > 0:
+		dx = (right[0] - left[0])/width*rad
+		dy = (right[1] - left[1])/width*rad
+		return (left[0] + dx, left[1] + dy), (right[0] - dx, right[1] - dy)
+	return left, right
+
+def _length(path):
+	return sum(_dist(path[i], path[i+1]) for i in range(len(path) - 1))
+
+def funnel(a, b, portals):
+	"""
+	String pulling (the "simple stupid funnel"): the shortest
+	path from A to B through a corridor of portals.
+
+	Args:
+		a, b (points)
+		portals (list of (left, right) point pairs, in the order
+			they are crossed, as seen walking from A to B)
+	Returns:
+		The corner points of the path, A and B included.
+	"""
+	portals = [(a, a)] + list(portals) + [(b, b)]
+	path = [a]
+	apex = left = right = a
+	apex_i = left_i = right_i = 0
+	i = 1
+	while i < len(portals):
+		pl, pr = portals[i]
+		# a portal through the apex itself narrows nothing
+		if _cross(apex, pl, pr) == 0 and min(pl[0], pr[0]) <= apex[0] <= max(pl[0], pr[0]) \
+				and min(pl[1], pr[1]) <= apex[1] <= max(pl[1], pr[1]):
+			i += 1
+			continue
+		# try to narrow the funnel from the right
+		if _cross(apex, right, pr) >= 0:
+			if apex == right or _cross(apex, left, pr) < 0:
+				right = pr
+				right_i = i
+			else:
+				# the right side crossed the left one: left is a corner
+				if path[-1] != left:
+					path += [left]
+				apex = right = left
+				apex_i = right_i = left_i
+				i = apex_i + 1
+				continue
+		# try to narrow the funnel from the left
+		if _cross(apex, left, pl) <= 0:
+			if apex == left or _cross(apex, right, pl) > 0:
+				left = pl
+				left_i = i
+			else:
+				if path[-1] != right:
+					path += [right]
+				apex = left = right
+				apex_i = left_i = right_i
+				i = apex_i + 1
+				continue
+		i += 1
+	if path[-1] != b:
+		path += [b]
+	return path
+
+def _tangent(p, o, q, w):
+	"""
+	The line that touches a circle round P and one round Q, with
+	both on given sides of it, as the pair of points it touches
+	them at. The offsets 'o' and 'w' are the radii, negative for
+	a circle on the left of the line (as seen from P); a point is
+	a circle with radius 0.
+	"""
+	dx, dy = q[0] - p[0], q[1] - p[1]
+	d = hypot(dx, dy)
+	if d == 0:
+		return p, q
+	angle = atan2(dy, dx) - asin(max(-1, min(1, (o - w)/d)))
+	nx, ny = -sin(angle), cos(angle)
+	return (p[0] + o*nx, p[1] + o*ny), (q[0] + w*nx, q[1] + w*ny)
+
+def _legs(nodes, rad):
+	# the straight parts of a path round (point, side, ...) nodes
+	return [_tangent(p[0], -p[1]*rad, q[0], -q[1]*rad) for p, q in zip(nodes, nodes[1:])]
+
+def _round(a, b, portals, rad, near):
+	"""
+	funnel for an agent of radius 'rad' > 0: the shortest path
+	through the portals that keeps 'rad' away from their ends,
+	going round each on the side the corridor does, and from the
+	points in 'near', on whichever side it passes them. near[m]
+	are those by the m-th triangle of the corridor, which runs
+	from the triangle of A, through the portals, to that of B. A
+	and B themselves are taken to be 'rad' away from all of them.
+
+	Returns the corners of the path, A and B included. A bend round
+	a point is made of corners outside the circle of radius 'rad'
+	round it, with the legs between them touching the circle.
+	"""
+	pulled = [_shrink(left, right, _dist(left, right), rad) for left, right in portals]
+	path = funnel(a, b, pulled)
+	# what to keep away from, as (point, side), with side 1 for
+	# the left of the path, -1 for the right and 0 for either: for
+	# m from 0 to n, the ends of portal m (the one into triangle m)
+	# and the points by triangle m - 1, and last those by B's
+	n = len(portals)
+	vertices = [[]] + [[(left, 1), (right, -1)] for left, right in portals] + [[]]
+	for m in range(n + 1):
+		vertices[m if m < n else n + 1] += [(v, 0) for v in near[m]]
+	# nodes are (point, side, index in vertices); the corners of the
+	# path are ends of the pulled portals, in order, and a vertex at
+	# the end of several portals can be more than one of them
+	nodes = [(a, 0, 0)]
+	i = 0
+	for p in path[1:-1]:
+		while p not in pulled[i]:
+			i += 1
+		k = pulled[i].index(p)
+		if portals[i][k] != nodes[-1][0]:
+			nodes += [(portals[i][k], 1 - 2*k, i + 1)]
+	nodes += [(b, 0, len(vertices) - 1)]
+
+	legs = _legs(nodes, rad)
+	used = {}
+	for v, side, i in nodes:
+		used[v] = used.get(v, 0) + 1
+	# how often each vertex was inserted: one that was inserted
+	# and dropped again twice is where the walls are closer than
+	# 2*rad, and is left alone instead of until the loop runs out
+	tries = {}
+
+	def closest(k):
+		# the vertex leg k comes closest to, if too close, as
+		# (distance, node), or None
+		t0, t1 = legs[k]
+		x0, x1 = min(t0[0], t1[0]) - rad, max(t0[0], t1[0]) + rad
+		y0, y1 = min(t0[1], t1[1]) - rad, max(t0[1], t1[1]) + rad
+		r = None
+		for i in range(nodes[k][2], nodes[k+1][2] + 1):
+			for v, side in vertices[i]:
+				if not (x0 <= v[0] <= x1 and y0 <= v[1] <= y1):
+					continue
+				e = _seg_dist(v, t0, t1)
+				if e >= rad*(1 - 1e-9) or v in used or tries.get(v, 0) >= 2 or (r is not None and e >= r[0]):
+					continue
+				# A and B are taken to be 'rad' away from the walls
+				if _dist(v, a) < rad or _dist(v, b) < rad:
+					continue
+				if side == 0:
+					side = 1 if _cross(t0, t1, v) > 0 else -1
+				r = (e, (v, side, i))
+		return r
+
+	# Per leg, what it comes too close to, and the nodes whose bend
+	# may have changed: a leg only depends on the nodes at its ends,
+	# so each step below only looks again at the legs and the
+	# nodes next to the one it inserts or drops
+	close = [closest(k) for k in range(len(legs))]
+	check = set(range(1, len(nodes) - 1))
+	for _ in range(2*sum(len(around) for around in vertices) + 2):
+		# a vertex the path no longer bends round
+		drop = None
+		while check:
+			k = min(check)
+			check.discard(k)
+			if not 0 < k < len(nodes) - 1:
+				continue
+			(p0, p1), (q0, q1) = legs[k-1], legs[k]
+			turn = (p1[0] - p0[0])*(q1[1] - q0[1]) - (p1[1] - p0[1])*(q1[0] - q0[0])
+			if turn*nodes[k][1] < 0:
+				drop = k
+				break
+		if drop is not None:
+			k = drop
+			v, side, i = nodes.pop(k)
+			used[v] -= 1
+			if not used[v]:
+				del used[v]
+			legs[k-1:k+1] = _legs(nodes[k-1:k+1], rad)
+			close[k-1:k+1] = [closest(k-1)]
+			# the legs that can pass V again
+			j = k - 2
+			while j >= 0 and nodes[j+1][2] >= i:
+				close[j] = closest(j)
+				j -= 1
+			j = k
+			while j < len(legs) and nodes[j][2] <= i:
+				close[j] = closest(j)
+				j += 1
+			check = set(j if j < k else j - 1 for j in check) | {k - 1, k}
+			continue
+		# else the vertex a leg comes closest to, if too close
+		worst = None
+		for k in range(len(close)):
+			if close[k] is not None and (worst is None or close[k][0] < close[worst][0]):
+				worst = k
+		if worst is None:
+			break
+		k = worst
+		node = close[k][1]
+		v = node[0]
+		nodes.insert(k + 1, node)
+		used[v] = used.get(v, 0) + 1
+		tries[v] = tries.get(v, 0) + 1
+		legs[k:k+1] = _legs(nodes[k:k+3], rad)
+		close[k:k+1] = [None, None]
+		for j in range(len(close)):
+			if close[j] is None and k <= j <= k + 1 or close[j] is not None and close[j][1][0] == v:
+				close[j] = closest(j)
+		check = set(j if j <= k else j + 1 for j in check) | {k, k + 1, k + 2}
+	# if the loop runs out, it is given up on: the ends are
+	# too close to the walls
+
+	r = [a]
+	for k in range(1, len(nodes) - 1):
+		v, side, i = nodes[k]
+		start = atan2(legs[k-1][1][1] - v[1], legs[k-1][1][0] - v[0])
+		end = atan2(legs[k][0][1] - v[1], legs[k][0][0] - v[0])
+		# the bend, as tangents to the circle every pi/8 at most
+		bend = ((end - start)*side) % (2*pi)
+		m = max(1, int(ceil(bend/(pi/8))))
+		step = bend/m
+		far = rad/cos(step/2)
+		for j in range(m):
+			angle = start + side*(j + 0.5)*step
+			r += [(v[0] + far*cos(angle), v[1] + far*sin(angle))]
+	r += [b]
+	return r
+
+class NavMesh:
+	"""
+	A navigation mesh over a triangulated DCEL.
+
+	The nodes are the triangles; two triangles are linked by the
+	edge they share (a portal), taken from the face adjacency that
+	DCEL.gen_face_data computes as 'network'. A triangle's links
+	are built when a search first gets there, and kept; queries
+	only run A* over the triangles and pull the string through the
+	corridor it finds.
+
+	An agent of radius 'rad' only goes through a triangle, from the
+	portal it came in by to the one it leaves by, if that traversal
+	is at least 2*rad wide (see clearance). Since the width depends
+	on the portal a triangle is entered by, the search runs over
+	(triangle, entry) pairs. The path keeps at least 'rad' away from
+	every wall vertex it passes or bends round, as long as A and B
+	are that far from the walls themselves: it goes round each such
+	vertex along a few short legs just outside the circle of radius
+	'rad' about it.
+
+	Repeated queries are cheap: the corridor (the triangles a path
+	runs through) is kept in an LRU cache of 'cache_size' entries,
+	keyed on the start and end triangle and the radius class (the
+	radius rounded up to a multiple of 'rad_step'), with its portals
+	and the wall vertices near it. Only the string pulling runs
+	again, for the exact end points and radius. precompute() builds
+	all-pairs distance and route tables for a radius class, after
+	which new corridors are table lookups too; it is meant for rooms
+	of up to a few thousand triangles.
+	"""
+	def __init__(self, dcel, cache_size = 1024, rad_step = 0.05):
+		data = dcel.gen_face_data(q=["faces", "network"])
+		faces = list(data["polys"])
+		index = {}
+		for i in range(len(faces)):
+			index[faces[i]] = i
+
+		points = []
+		vdex = {}
+		triangles = []
+		for f in faces:
+			tri = []
+			for v in data["polys"][f]:
+				if v not in vdex:
+					vdex[v] = len(points)
+					points += [(v.x, v.y)]
+				tri += [vdex[v]]
+			if len(tri) != 3:
+				raise ValueError("A NavMesh needs a triangulated DCEL, face {} has {} vertices".format(f, len(tri)))
+			triangles += [tuple(tri)]
+
+		# per triangle: the neighbour across the edge from
+		# corner k to corner k+1, or -1 for a wall
+		adjacency = [[-1]*3 for _ in faces]
+		for f in faces:
+			i = index[f]
+			tri = triangles[i]
+			for g in data["network"][f]:
+				if g not in index:
+					continue
+				j = index[g]
+				other = set(triangles[j])
+				for k in range(3):
+					if tri[k] in other and tri[(k+1) % 3] in other:
+						adjacency[i][k] = j
+		self._setup(points, triangles, adjacency, cache_size, rad_step)
+
+	def from_arrays(points, triangles, adjacency, cache_size = 1024, rad_step = 0.05, clearance = None, buckets = None):
+		"""
+		A NavMesh straight from its arrays, as stored in a mesh
+		file (see meshfile.py): 'points' of shape (n, 2), anti-
+		clockwise 'triangles' of shape (m, 3) and 'adjacency' of
+		shape (m, 3), the neighbour across the edge from corner k
+		to corner k+1 of each triangle, or -1. 'clearance', of
+		shape (m, 3), holds the widths of the traversals (see
+		clearance) and 'buckets' the cells of the grid of the point
+		locator (see TriangleLocator), if they are known already. The arrays are
+		used as they are, not copied.
+		"""
+		r = NavMesh.__new__(NavMesh)
+		r._setup(points, triangles, adjacency, cache_size, rad_step, clearance, buckets)
+		return r
+
+	def _setup(self, points, triangles, adjacency, cache_size, rad_step, clearance = None, buckets = None):
+		self.l = logg.get("NAV")
+		self.cache_size = cache_size
+		self.rad_step = rad_step
+		self._cache = OrderedDict()
+		# per radius class: (distance, exit and back tables)
+		self.tables = {}
+		self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+		self.triangles = np.asarray(triangles).reshape(-1, 3)
+		self.adjacency = np.asarray(adjacency).reshape(-1, 3)
+		self.locator = TriangleLocator(self.points, self.triangles, buckets)
+		# per triangle and corner, the width of the traversal between
+		# the two edges at that corner; None until it is first needed
+		if clearance is None:
+			self._clearance = [[None]*3 for _ in range(len(self.triangles))]
+		else:
+			self._clearance = np.asarray(clearance, dtype=float).tolist()
+		# the arrays as plain Python, for the searches
+		self._points = list(zip(*self.points.T.tolist()))
+		self._triangles = self.triangles.tolist()
+		self._adjacency = self.adjacency.tolist()
+		# per triangle, built when the searches first get there: its
+		# links as (link, edge of the triangle, edge of the neighbour),
+		# where a link is (neighbour, left, right, width, midpoint),
+		# with left and right as seen when leaving the triangle
+		# through the portal
+		self._hops = [None]*len(self.triangles)
+		# the vertices in a grid of their own, for _near
+		self._vertex_grid = None
+
+	def _hops_of(self, t):
+		# the links of triangle t, see _setup
+		r = self._hops[t]
+		if r is None:
+			tri = self._triangles[t]
+			r = []
+			for k in range(3):
+				j = self._adjacency[t][k]
+				if j == -1:
+					continue
+				left = self._points[tri[(k+1) % 3]]
+				right = self._points[tri[k]]
+				mid = ((left[0] + right[0])/2, (left[1] + right[1])/2)
+				r += [((j, left, right, _dist(left, right), mid), k, self._adjacency[j].index(t))]
+			self._hops[t] = r
+		return r
+
+	def _link(self, t, k):
+		# the link of triangle t through its edge k
+		for link, kx, kj in self._hops_of(t):
+			if kx == k:
+				return link
+
+	def clearance(self, i, c):
+		"""
+		The width of triangle i for an agent that goes through it
+		between the two edges at its corner c: the diameter of the
+		largest disc that fits through (Demyen and Buro, "Efficient
+		Triangulation-Based Pathfinding", 2006). That is the shorter
+		of those two edges, or less if a wall across the third edge
+		comes closer to corner c, within the strip over that edge.
+		"""
+		r = self._clearance[i][c]
+		if r is None:
+			r = self._clearance[i][c] = self._width(i, c)
+		return r
+
+	def clearances(self):
+		"""
+		clearance of every triangle and corner, as an (m, 3) array.
+		"""
+		for i in range(len(self.triangles)):
+			for c in range(3):
+				self.clearance(i, c)
+		return np.array(self._clearance, dtype=float)
+
+	def _width(self, i, c):
+		tri = self._triangles[i]
+		C = self._points[tri[c]]
+		A = self._points[tri[(c+1) % 3]]
+		B = self._points[tri[(c+2) % 3]]
+		d = min(_dist(C, A), _dist(C, B))
+		ax, ay = B[0] - A[0], B[1] - A[1]
+		if (C[0] - A[0])*ax + (C[1] - A[1])*ay <= 0 or (C[0] - B[0])*ax + (C[1] - B[1])*ay >= 0:
+			# an obtuse angle at A or B: the two edges are the narrowest
+			return d
+		# the strip over AB, on the side away from C
+		strip = [(A, (ax, ay)), (B, (-ax, -ay)), (A, (ay, -ax))]
+		# search the triangles across AB, as far as they could hold
+		# a wall closer than d, the triangles behind a wall excluded
+		seen = {i}
+		todo = [(i, (c+1) % 3)]
+		while todo:
+			t, k = todo.pop()
+			u = self._points[self._triangles[t][k]]
+			v = self._points[self._triangles[t][(k+1) % 3]]
+			part = _clip(u, v, strip)
+			if part is None:
+				continue
+			e = _seg_dist(C, part[0], part[1])
+			j = self._adjacency[t][k]
+			if j == -1:
+				d = min(d, e)
+			elif e < d and j not in seen:
+				seen.add(j)
+				for kj in range(3):
+					if self._adjacency[j][kj] != t:
+						todo += [(j, kj)]
+		return d
+
+	def _through(self, t, ke, kx):
+		# clearance of triangle t between the edges in slots ke and kx
+		w = self._clearance[t][_CORNER[ke][kx]]
+		if w is None:
+			w = self.clearance(t, _CORNER[ke][kx])
+		return w
+
+	def _rad_class(self, rad):
+		return max(0, int(ceil(rad/self.rad_step - 1e-9)))
+
+	def precompute(self, rad = 0):
+		"""
+		Builds the all-pairs tables for the radius class of 'rad':
+		dist[i, j] is the length of the shortest route from triangle
+		i to triangle j: from the centroid of j, through the nearest
+		point of each portal to the one before, to the centroid of i.
+		exit[i, j] is the edge of i that route leaves by (-1 if there
+		is none, or i is j), and back[3*i + k, j] is the edge that
+		the best route to j that leaves i by edge k goes on by, in the
+		triangle across: with the width of a triangle depending on
+		where it is entered, the next triangle alone does not say.
+		Queries follow the best routes out of each edge of i and of j
+		and keep the one with the shortest pulled path. As the routes
+		run between centroids, that is often not the corridor of the
+		shortest path, so it is only a candidate: the query runs A*
+		too and keeps the shorter of the two (see _entry). A path is
+		never longer than the one of A* alone, and sometimes shorter
+		(9 of 240 on polygons.holes rooms of 40 to 100 vertices), at
+		the cost of the table walks on top of A*, once per cache entry.
+
+		It runs Dijkstra from every triangle, in Python: O(n^2 log n)
+		time and 12 bytes per pair of triangles for n triangles, per
+		radius class. That is about 10 s and 17 MB for 1200 triangles
+		(a polygons.holes room of 1000 vertices), and both grow with
+		n^2, so this is for rooms of up to a few thousand triangles;
+		on larger ones, leave the queries to A* and the cache.
+		"""
+		k = self._rad_class(rad)
+		width = 2*k*self.rad_step
+		n = len(self.triangles)
+		centroids = (self.points[self.triangles].sum(axis=1)/3).tolist()
+		dist = np.full((n, n), np.inf)
+		exit = np.full((n, n), -1, dtype=np.int8)
+		back = np.full((3*n, n), -1, dtype=np.int8)
+		for src in range(n):
+			# Dijkstra over (triangle, edge it is entered by) from src.
+			# Routes can be walked both ways, so the edge a triangle is
+			# reached by is the one it leaves by towards src, and the
+			# edge the triangle before it was reached by is where the
+			# route goes on from there
+			d = [np.inf]*(3*n)
+			at = [None]*(3*n)
+			b = back[:, src]
+			heap = []
+			for link, kx, kj in self._hops_of(src):
+				j, left, right, w, mid = link
+				if w < width:
+					continue
+				s = 3*j + kj
+				at[s] = _nearest(centroids[src], *_shrink(left, right, w, width/2))
+				d[s] = _dist(centroids[src], at[s])
+				heapq.heappush(heap, (d[s], s))
+			while heap:
+				g, s = heapq.heappop(heap)
+				if g > d[s]:
+					continue
+				t, ke = divmod(s, 3)
+				for link, kx, kj in self._hops_of(t):
+					j, left, right, w, mid = link
+					if kx == ke or j == src or w < width or self._through(t, ke, kx) < width:
+						continue
+					sj = 3*j + kj
+					x = _nearest(at[s], *_shrink(left, right, w, width/2))
+					gj = g + _dist(at[s], x)
+					if gj < d[sj]:
+						d[sj] = gj
+						at[sj] = x
+						b[sj] = ke
+						heapq.heappush(heap, (gj, sj))
+			# and on to the centroids
+			for s in range(3*n):
+				if at[s] is not None:
+					d[s] += _dist(at[s], centroids[s // 3])
+			d = np.array(d).reshape(n, 3)
+			best = d.argmin(axis=1)
+			dist[:, src] = d[np.arange(n), best]
+			exit[:, src] = np.where(dist[:, src] == np.inf, -1, best)
+			dist[src, src] = 0
+			exit[src, src] = -1
+		self.tables[k] = (dist, exit, back)
+		self.l.info("Precomputed paths between %d triangles", n)
+		return self.tables[k]
+
+	def clear_cache(self):
+		self._cache.clear()
+		self.tables.clear()
+
+	def _corridor(self, a, b, ta, tb, rad):
+		"""
+		A* over the triangles, from triangle ta (holding A) to tb
+		(holding B). A triangle is a node of its own per portal it
+		is entered by, as the width of the way on depends on it, and
+		is reached at the point of that portal on the shortest way
+		from where its parent was reached to B (see _toward), so the
+		costs follow the pulled string closely. The heuristic is the
+		straight distance to B, and the search stops the first time
+		it takes tb off the heap. Returns the list of links taken,
+		or None if B cannot be reached.
+		"""
+		# a node is (triangle, edge it was entered by), -1 for ta
+		start = (ta, -1)
+		came = {start: None}
+		cost = {start: 0}
+		at = {start: a}
+		heap = [(_dist(a, b), 0, start)]
+		while heap:
+			f, g, node = heapq.heappop(heap)
+			if g > cost[node]:
+				continue
+			t, ke = node
+			if t == tb:
+				r = []
+				while came[node] is not None:
+					node, link = came[node]
+					r += [link]
+				r.reverse()
+				return r
+			for link, kx, kj in self._hops_of(t):
+				j, left, right, width, mid = link
+				if kx == ke or width < 2*rad:
+					continue
+				if ke != -1 and self._through(t, ke, kx) < 2*rad:
+					continue
+				nj = (j, kj)
+				x = _toward(at[node], b, *_shrink(left, right, width, rad))
+				gj = g + _dist(at[node], x)
+				if nj not in cost or gj < cost[nj]:
+					cost[nj] = gj
+					came[nj] = (node, link)
+					at[nj] = x
+					heapq.heappush(heap, (gj + _dist(x, b), gj, nj))
+		return None
+
+	def find_path(self, a, b, rad = 0, ta = None, tb = None):
+		"""
+		A path from A to B for an agent of radius 'rad', as a list
+		of points (A first, B last), or None if there is no such
+		path. It is the shortest through the corridor the search
+		finds (see _corridor and precompute), which is nearly always
+		the shortest path, but not certainly.
+		'ta' and 'tb' are the triangles of A and B, if the caller
+		already knows them.
+		"""
+		a = (float(a[0]), float(a[1]))
+		b = (float(b[0]), float(b[1]))
+		if ta is None:
+			ta = self.locator.locate(a)
+		if tb is None:
+			tb = self.locator.locate(b)
+		if ta == -1 or tb == -1:
+			self.l.debug("No path: %s or %s is not on the mesh", a, b)
+			return None
+		entry = self._entry(a, b, ta, tb, rad)
+		corridor, portals, near = entry
+		if corridor is None:
+			return None
+		if rad <= 0:
+			return funnel(a, b, portals)
+		if near is None:
+			# for the radius of the class, which is at least 'rad', so
+			# it holds all that any radius of the class has to avoid
+			near = entry[2] = self._near([ta] + [link[0] for link in corridor], self._rad_class(rad)*self.rad_step)
+		return _round(a, b, portals, rad, near)
+
+	def _near(self, tris, rad):
+		"""
+		For each triangle of 'tris', the vertices of the mesh in its
+		bounding box grown by 'rad', found through a grid of the
+		vertices (built on first use).
+		"""
+		if self._vertex_grid is None:
+			self._vertex_grid = UniformGrid(self.points.min(0), self.points.max(0), len(self.points))
+			self._vertex_grid.fill(self.points, self.points)
+		grid = self._vertex_grid
+		corners = self.points[self.triangles[tris]]
+		lo = corners.min(1) - rad
+		hi = corners.max(1) + rad
+		box, cells = grid.cells_of(lo, hi)
+		which, v = grid.items_in(grid.index(cells))
+		box = box[which]
+		p = self.points[v]
+		inside = ((p >= lo[box]) & (p <= hi[box])).all(axis=1)
+		r = [[] for _ in tris]
+		for key in np.unique(box[inside]*len(self.points) + v[inside]).tolist():
+			m, v = divmod(key, len(self.points))
+			r[m] += [self._points[v]]
+		return r
+
+	def corridor(self, a, b, ta, tb, rad = 0):
+		"""
+		The links from triangle ta to triangle tb for the radius
+		class of 'rad': from the cache, or else from A* and the
+		precomputed tables, if any (and then cached), chosen for the
+		shortest path from A to B. None if there is none.
+		"""
+		return self._entry(a, b, ta, tb, rad)[0]
+
+	def _entry(self, a, b, ta, tb, rad):
+		"""
+		The cache entry for corridor: a list of the links, their
+		(left, right) portals and the vertices near each triangle
+		(see _near, for the radius of the class; None until a query
+		with a radius asks for them), or [None, None, None].
+		"""
+		k = self._rad_class(rad)
+		key = (ta, tb, k)
+		if key in self._cache:
+			self._cache.move_to_end(key)
+			return self._cache[key]
+
+		if k in self.tables:
+			dist, exit, back = self.tables[k]
+			r = None
+			if ta == tb:
+				r = []
+			elif dist[ta, tb] != np.inf:
+				# the best routes out of each edge of ta and of tb (walked
+				# backwards), of which the one with the shortest pulled path
+				best = None
+				for src, dst in ((ta, tb), (tb, ta)):
+					for link, kx, kj in self._hops_of(src):
+						steps = self._walk(src, kx, dst, back, 2*k*self.rad_step)
+						if steps is None:
+							continue
+						if src == ta:
+							c = [self._link(t, e) for t, e in steps]
+						else:
+							c = []
+							for t, e in reversed(steps):
+								j = self._adjacency[t][e]
+								c += [self._link(j, self._adjacency[j].index(t))]
+						length = _length(funnel(a, b, self._portals(c, rad)))
+						if best is None or length < best[0]:
+							best = (length, c)
+				# that is only a candidate: A* may well find a shorter
+				# corridor (see precompute)
+				r = self._corridor(a, b, ta, tb, k*self.rad_step)
+				if best is not None and (r is None or best[0] < _length(funnel(a, b, self._portals(r, rad)))):
+					r = best[1]
+		else:
+			r = self._corridor(a, b, ta, tb, k*self.rad_step)
+
+		if r is None:
+			entry = [None, None, None]
+		else:
+			entry = [r, [(left, right) for j, left, right, width, mid in r], None]
+		self._cache[key] = entry
+		if len(self._cache) > self.cache_size:
+			self._cache.popitem(last = False)
+		return entry
+
+	def _walk(self, t, e, dst, back, width):
+		"""
+		The best route in the tables 'back' from triangle t, leaving
+		by its edge e, to triangle dst, as (triangle, edge it leaves
+		by) pairs, or None if it has none that is 'width' wide.
+		"""
+		if self._adjacency[t][e] == -1 or self._link(t, e)[3] < width:
+			return None
+		r = []
+		while t != dst and e != -1:
+			r += [(t, e)]
+			t, e = self._adjacency[t][e], int(back[3*t + e, dst])
+		return r if t == dst else None
+
+	def _portals(self, corridor, rad):
+		"""
+		The (left, right) portals of a corridor, with both ends
+		pulled 'rad' towards each other.
+		"""
+		return [_shrink(left, right, width, rad) for j, left, right, width, mid in corridor]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Seeded generators of random simple polygons, for tests and
+benchmarks. Every generator takes the number of vertices 'n'
+and a 'seed', and returns the same polygon for the same
+arguments: a list of (x, y), anti-clockwise, with no two
+vertices on the same height (the sweep handles those, but
+they are not what these are for).
+"""
+
+import math
+import random
+
+def _area2(ring):
+	r = 0
+	for i in range(len(ring)):
+		r += ring[i-1][0]*ring[i][1] - ring[i][0]*ring[i-1][1]
+	return r
+
+def _anticlockwise(ring):
+	if _area2(ring) < 0:
+		ring.reverse()
+	return ring
+
+def star(n, seed = 0, r_min = 5.0, r_max = 10.0):
+	"""
+	A polygon that is star-shaped around the origin: n angles,
+	spread evenly and jittered, each with a random radius.
+	About half the vertices are reflex.
+	"""
+	rng = random.Random(seed)
+	step = 2*math.pi/n
+	r = []
+	for i in range(n):
+		a = (i + rng.uniform(-0.4, 0.4))*step
+		d = rng.uniform(r_min, r_max)
+		r += [(d*math.cos(a), d*math.sin(a))]
+	return r
+
+def spiral(n, seed = 0, turns = 3):
+	"""
+	A thick spiral arm of up to 'turns' turns (fewer for small n,
+	so that every turn has some 24 vertices on each side): long and
+	thin, so most of the work goes into few, long monotone pieces.
+	"""
+	rng = random.Random(seed)
+	k = max(n//2, 3)
+	turns = min(turns, k/24)
+	phase = rng.uniform(0, 2*math.pi)
+	# the arm grows by 'gap' per turn and is half as wide
+	gap = 1.0
+	width = 0.25*gap
+	outer = []
+	inner = []
+	for i in range(k):
+		t = (i + rng.uniform(-0.3, 0.3)*(0 < i < k - 1))/(k - 1)
+		a = 2*math.pi*turns*t
+		d = gap*(1 + a/(2*math.pi))
+		outer += [((d + width)*math.cos(a + phase), (d + width)*math.sin(a + phase))]
+		inner += [((d - width)*math.cos(a + phase), (d - width)*math.sin(a + phase))]
+	return _anticlockwise(outer + inner[::-1])
+
+def comb(n, seed = 0, sides = 2):
+	"""
+	A bar with teeth of random length: with 'sides' 1, only on top
+	(every gap between teeth has a merge vertex), with 2, also
+	below (and a split vertex in every gap there).
+	"""
+	rng = random.Random(seed)
+	teeth = max((n - 4)//(4*sides), 1)
+	top = []
+	bottom = []
+	for i in range(teeth):
+		x = 4.0*i
+		h = rng.uniform(2, 10)
+		top += [(x + 1 + rng.uniform(-0.1, 0.1), 1 + rng.uniform(0, 0.5)),
+				(x + 1 + rng.uniform(-0.1, 0.1), 1 + h),
+				(x + 3 + rng.uniform(-0.1, 0.1), 1 + h + rng.uniform(-0.5, 0.5)),
+				(x + 3 + rng.uniform(-0.1, 0.1), 1 + rng.uniform(0, 0.5))]
+		if sides == 2:
+			h = rng.uniform(2, 10)
+			bottom += [(x + 1 + rng.uniform(-0.1, 0.1), -1 - rng.uniform(0, 0.5)),
+					(x + 1 + rng.uniform(-0.1, 0.1), -1 - h),
+					(x + 3 + rng.uniform(-0.1, 0.1), -1 - h - rng.uniform(0, 0.5)),
+					(x + 3 + rng.uniform(-0.1, 0.1), -1 - rng.uniform(0, 0.5))]
+	end = 4.0*teeth
+	ring = [(rng.uniform(-0.5, 0), 1 + rng.uniform(0, 0.1))] + top
+	ring += [(end + rng.uniform(0, 0.5), 1 + rng.uniform(0, 0.1)), (end + rng.uniform(0, 0.5), -1 - rng.uniform(0, 0.1))]
+	ring += bottom[::-1] + [(rng.uniform(-0.5, 0), -1 - rng.uniform(0, 0.1))]
+	return _anticlockwise(ring)
+
+def zigzag(n, seed = 0):
+	"""
+	A band whose top and bottom both zigzag, with the bottom
+	spikes between the top ones: about n/2 merge and split
+	vertices, the worst case for the sweep status.
+	"""
+	rng = random.Random(seed)
+	k = max(n//2, 2)
+	top = []
+	bottom = []
+	for i in range(k):
+		x = i + rng.uniform(-0.2, 0.2)
+		up = i % 2 == 0
+		top += [(x, (3 if up else 1) + rng.uniform(0, 0.5))]
+		bottom += [(x + 0.5, (-1 if up else -3) - rng.uniform(0, 0.5))]
+	return _anticlockwise(top[::-1] + bottom)
+
+def holes(n, seed = 0, count = None, r_min = 5.0, r_max = 10.0):
+	"""
+	A star (see star) with 'count' small random holes inside, by
+	default about n/10 of them. Returns (outer, holes), the holes
+	clockwise; n is the number of vertices in all rings together.
+	"""
+	rng = random.Random(seed)
+	if count is None:
+		count = max(n//10, 1)
+	sides = 3 if n < 40 else 4
+	outer = star(max(n - sides*count, 3), seed, r_min, r_max)
+	# the disc every edge of the star stays out of
+	step = 2*math.pi/len(outer)
+	inside = 0.9*r_min*math.cos(min(0.9*step, math.pi/2 - 0.1))
+	# a grid of cells in that disc, one hole per cell
+	side = max(int(math.ceil(math.sqrt(count*4/math.pi))), 1)
+	cell = 2*inside/math.sqrt(2)/side
+	cells = [(i, j) for i in range(side) for j in range(side)]
+	rng.shuffle(cells)
+	r = []
+	for i, j in cells[:count]:
+		cx = (i + 0.5)*cell - inside/math.sqrt(2)
+		cy = (j + 0.5)*cell - inside/math.sqrt(2)
+		a0 = rng.uniform(0, 2*math.pi)
+		hole = []
+		for k in range(sides):
+			a = a0 - 2*math.pi*k/sides
+			d = cell*rng.uniform(0.2, 0.4)
+			hole += [(cx + d*math.cos(a), cy + d*math.sin(a))]
+		r += [hole]
+	return outer, r
+
+# name -> function (n, seed) -> (outer, holes)
+GENERATORS = {
+	'star': lambda n, seed: (star(n, seed), []),
+	'spiral': lambda n, seed: (spiral(n, seed), []),
+	'comb': lambda n, seed: (comb(n, seed), []),
+	'zigzag': lambda n, seed: (zigzag(n, seed), []),
+	'holes': holes,
+}
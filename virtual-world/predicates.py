@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Geometric predicates that give the right answer on floats.
+
+A predicate like "is P left of the line AB" is the sign of a
+small determinant. In floats, that determinant is rounded, and
+for points on or very near the line the sign can come out wrong,
+which breaks the sweep on collinear walls. These first evaluate
+the determinant in floats together with a bound on its rounding
+error; only when the result is within that bound of zero is it
+evaluated again, exactly, in Fractions. That hardly ever happens
+on general input, so they cost about as much as the float test.
+"""
+
+from fractions import Fraction
+
+# half a unit in the last place of 1.0
+_EPS = 2.0**-53
+# relative error bound of the float orientation determinant
+# (Shewchuk, "Adaptive Precision Floating-Point Arithmetic and Fast
+# Robust Geometric Predicates", 1997: ccwerrboundA)
+ORIENT_BOUND = (3 + 16*_EPS)*_EPS
+
+def _sign(x):
+	# int(), as numpy booleans do not subtract
+	return int(x > 0) - int(x < 0)
+
+def orient_exact(ax, ay, bx, by, px, py):
+	"""
+	orient_xy, in exact arithmetic: the coordinates (floats, ints
+	or Fractions) are converted to Fractions without rounding.
+	"""
+	ax, ay, bx, by, px, py = map(Fraction, (ax, ay, bx, by, px, py))
+	return _sign((ax - px)*(by - py) - (ay - py)*(bx - px))
+
+def orient_xy(ax, ay, bx, by, px, py):
+	"""
+	orient on bare coordinates, for callers that have them at hand.
+	"""
+	left = (ax - px)*(by - py)
+	right = (ay - py)*(bx - px)
+	det = left - right
+	if not isinstance(det, float):
+		return _sign(det)
+	bound = ORIENT_BOUND*(abs(left) + abs(right))
+	if det > bound:
+		return +1
+	if -det > bound:
+		return -1
+	if bound == 0:
+		# both products are exactly zero
+		return 0
+	return orient_exact(ax, ay, bx, by, px, py)
+
+def orient(a, b, p):
+	"""
+	The side of the arrow from A to B that point P is on: +1 for
+	left, -1 for right, 0 if the three points are collinear. This
+	is the sign of tri._sld(a, b, p), without rounding errors.
+
+	Points are anything with p[0] and p[1]. Coordinates that are
+	ints or Fractions are exact anyway and skip the filter; numpy
+	float64s are floats and take it.
+	"""
+	# orient_xy, inlined: this is on the hot path of the sweep
+	ax, ay = a[0], a[1]
+	bx, by = b[0], b[1]
+	px, py = p[0], p[1]
+	left = (ax - px)*(by - py)
+	right = (ay - py)*(bx - px)
+	det = left - right
+	if not isinstance(det, float):
+		return _sign(det)
+	bound = ORIENT_BOUND*(abs(left) + abs(right))
+	if det > bound:
+		return +1
+	if -det > bound:
+		return -1
+	if bound == 0:
+		return 0
+	return orient_exact(ax, ay, bx, by, px, py)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from grid import UniformGrid
+
+def ring_segments(rings):
+	"""
+	The wall segments of closed rings of [x, y] points,
+	as an array of shape (m, 4): x0, y0, x1, y1.
+	"""
+	r = []
+	for ring in rings:
+		for i in range(len(ring)):
+			a = ring[i-1]
+			b = ring[i]
+			r += [(a[0], a[1], b[0], b[1])]
+	return np.array(r, dtype=np.float64).reshape(-1, 4)
+
+class RayCaster:
+	"""
+	Answers "how far to the first wall" for whole arrays of rays.
+
+	The segments are bucketed in a uniform grid of about one
+	segment per cell. A ray walks the cells it crosses in order
+	(a DDA walk) and only tests the walls of those cells, so its
+	cost depends on the cells it crosses and not on the number of
+	walls. All rays walk in lockstep, one cell per step, so every
+	step is a handful of NumPy operations over the live rays.
+	"""
+	def __init__(self, segments, cells_per_segment = 1.0):
+		self.segments = np.asarray(segments, dtype=np.float64).reshape(-1, 4)
+		m = len(self.segments)
+		if m == 0:
+			raise ValueError("A RayCaster needs at least one segment")
+
+		xs = self.segments[:, [0, 2]]
+		ys = self.segments[:, [1, 3]]
+		lo = np.stack([xs.min(1), ys.min(1)], 1)
+		hi = np.stack([xs.max(1), ys.max(1)], 1)
+		self.grid = UniformGrid(lo.min(0), hi.max(0), m*cells_per_segment)
+		self.grid.fill(lo, hi, self._overlaps)
+
+	def _overlaps(self, walls, cells):
+		"""
+		Whether each wall of 'walls' crosses its cell of 'cells'
+		(see UniformGrid.fill). Their bounding boxes overlap, so
+		they are apart only if the cell is wholly on one side of
+		the wall's line: then so are its corners furthest to the
+		left and to the right of it. Cells are taken a little
+		larger, so a ray that hits a wall on a cell border finds
+		it from either cell.
+		"""
+		s = self.segments[walls]
+		slack = 1e-9*self.grid.cell
+		lo = self.grid.lo + cells*self.grid.cell - slack
+		size = self.grid.cell + 2*slack
+		ex = s[:, 2] - s[:, 0]
+		ey = s[:, 3] - s[:, 1]
+		left = ex*(lo[:, 1] + np.where(ex > 0, size, 0) - s[:, 1]) \
+				- ey*(lo[:, 0] + np.where(ey < 0, size, 0) - s[:, 0])
+		right = ex*(lo[:, 1] + np.where(ex > 0, 0, size) - s[:, 1]) \
+				- ey*(lo[:, 0] + np.where(ey < 0, 0, size) - s[:, 0])
+		return (left >= 0) & (right <= 0)
+
+	def cast(self, points, directions):
+		"""
+		Args:
+			points (array-like of shape (n, 2), or one point)
+			directions (array-like of shape (n, 2), or one direction;
+				they do not need to be unit vectors)
+		Returns:
+			An array of shape (n,) with the distance along each ray
+			to the first wall: inf if it hits nothing, nan if its
+			direction is zero.
+		"""
+		p, d = np.broadcast_arrays(np.asarray(points, dtype=np.float64).reshape(-1, 2),
+				np.asarray(directions, dtype=np.float64).reshape(-1, 2))
+		n = len(p)
+		norm = np.hypot(d[:, 0], d[:, 1])
+		r = np.full(n, np.inf)
+		r[norm == 0] = np.nan
+		g = self.grid
+		with np.errstate(divide='ignore', invalid='ignore'):
+			d = d/norm[:, None]
+
+			# where the rays enter and leave the grid (slab test)
+			inv = 1/d
+			t0 = (g.lo - p)*inv
+			t1 = (g.hi - p)*inv
+			tmin = np.nan_to_num(np.minimum(t0, t1), nan=-np.inf)
+			tmax = np.nan_to_num(np.maximum(t0, t1), nan=np.inf)
+			t_in = np.maximum(tmin.max(1), 0)
+			t_out = tmax.min(1)
+			live = np.flatnonzero((norm > 0) & (t_in <= t_out))
+			if len(live) == 0:
+				return r
+
+			p = p[live]
+			d = d[live]
+			inv = inv[live]
+			cell = g.cell_of(p + d*t_in[live, None])
+			step = np.where(d >= 0, 1, -1)
+			# the t at which the ray crosses the next cell border, per axis
+			border = g.lo + (cell + (step > 0))*g.cell
+			t_next = np.where(d != 0, (border - p)*inv, np.inf)
+			t_delta = np.where(d != 0, g.cell*np.abs(inv), np.inf)
+
+			while len(live):
+				# every ray against every wall of its cell, as flat pairs
+				which, walls = g.items_in(g.index(cell))
+				segs = self.segments[walls]
+				dx = d[which, 0]
+				dy = d[which, 1]
+				ax = segs[:, 0] - p[which, 0]
+				ay = segs[:, 1] - p[which, 1]
+				sx = segs[:, 2] - segs[:, 0]
+				sy = segs[:, 3] - segs[:, 1]
+				den = dx*sy - dy*sx
+				t = (ax*sy - ay*sx)/den
+				u = (ax*dy - ay*dx)/den
+				ok = (den != 0) & (t >= 0) & (u >= 0) & (u <= 1)
+				best = np.full(len(live), np.inf)
+				if len(which):
+					# 'which' is sorted: the nearest hit per run of a ray
+					heads = np.flatnonzero(np.r_[True, which[1:] != which[:-1]])
+					best[which[heads]] = np.minimum.reduceat(np.where(ok, t, np.inf), heads)
+
+				t_exit = t_next.min(1)
+				hit = best <= t_exit
+				r[live[hit]] = best[hit]
+
+				# step the others into the next cell
+				axis = np.argmin(t_next, 1)
+				rows = np.arange(len(live))
+				cell[rows, axis] += step[rows, axis]
+				t_next[rows, axis] += t_delta[rows, axis]
+				inside = ((cell >= 0) & (cell < g.n)).all(1)
+				keep = ~hit & inside
+				live = live[keep]
+				p = p[keep]
+				d = d[keep]
+				cell = cell[keep]
+				step = step[keep]
+				t_next = t_next[keep]
+				t_delta = t_delta[keep]
+		return r
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+import random
+from predicates import orient_xy
+
+def _x_at(a, b, y):
+	"""
+	The x-coordinate where the edge from A to B crosses the
+	horizontal line at y.
+
+	A horizontal edge lies on the sweep line as a whole, so it
+	answers with its upper endpoint (the leftmost one), which is
+	where the sweep meets it first.
+	"""
+	if a.y == b.y:
+		return min(a.x, b.x)
+	t = (y - a.y)/(b.y - a.y)
+	if t < 0:	t = 0
+	if t > 1:	t = 1
+	return a.x + t*(b.x - a.x)
+
+def _dx_down(a, b):
+	"""
+	How much x grows per unit of y when walking down the edge
+	from A to B. Used to order edges that meet in the same point:
+	the one that leans more to the left below the sweep line
+	comes first.
+	"""
+	if a.y == b.y:
+		return float('inf')
+	if a.y < b.y:
+		a, b = b, a
+	return (b.x - a.x)/(a.y - b.y)
+
+class _Node:
+	__slots__ = ('edge', 'prio', 'left', 'right', 'parent')
+
+	def __init__(self, edge, prio):
+		self.edge = edge
+		self.prio = prio
+		self.left = None
+		self.right = None
+		self.parent = None
+
+class EdgeStatus:
+	"""
+	The status structure of a sweep line: the edges that cross
+	the sweep line, ordered from left to right on their
+	x-coordinate at the current sweep height 'y'.
+
+	It is a treap (a binary search tree balanced by random
+	priorities), so insert, remove and left_of all take
+	O(log n) expected time. Edges are compared lazily on their
+	x at 'y', which is valid as long as the edges in the
+	structure do not cross each other, as is the case in a
+	simple polygon. Removal is done by identity, so it never
+	has to evaluate an edge at a height where it already ended.
+
+	Edges are expected to look like ConnEdges: 'origin' and
+	'next.origin' are the endpoints. Other sweeps can store
+	other objects by overriding _ends (and _x, to place
+	horizontal edges differently).
+	"""
+	def __init__(self, seed = 0):
+		self.y = 0
+		self._root = None
+		self._nodes = {}
+		self._rand = random.Random(seed)
+
+	def _ends(self, edge):
+		return edge.origin, edge.next.origin
+
+	def _x(self, edge, y):
+		a, b = self._ends(edge)
+		return _x_at(a, b, y)
+
+	def _key(self, edge):
+		return (self._x(edge, self.y), _dx_down(*self._ends(edge)))
+
+	def _side(self, edge, p):
+		"""
+		+1 if point P is right of EDGE on the horizontal line
+		through P, -1 if left, 0 if on it. Within the height of a
+		sloped edge, this is an exact orientation test (see
+		predicates.orient_xy) instead of a rounded x-intercept.
+		"""
+		a, b = self._ends(edge)
+		if (a.y, -a.x) < (b.y, -b.x):
+			a, b = b, a
+		if b.y < p[1] < a.y or (a.y != b.y and (p[1] == a.y or p[1] == b.y)):
+			# walking down the edge, right of P is left of the arrow
+			return orient_xy(a.x, a.y, b.x, b.y, p[0], p[1])
+		x = self._x(edge, p[1])
+		return (p[0] > x) - (p[0] < x)
+
+	def _before(self, edge, other):
+		"""
+		True if EDGE comes left of OTHER at the current height.
+		An edge that starts on the sweep line is placed by _side of
+		its start, so edges meeting in that point are the only ones
+		that need their slopes compared.
+		"""
+		a, b = self._ends(edge)
+		if (a.y, -a.x) < (b.y, -b.x):
+			a, b = b, a
+		if a.y == self.y:
+			s = self._side(other, a)
+			if s != 0:
+				return s < 0
+			return _dx_down(a, b) < _dx_down(*self._ends(other))
+		return self._key(edge) < self._key(other)
+
+	def _rotate_up(self, n):
+		p = n.parent
+		g = p.parent
+		if p.left is n:
+			p.left = n.right
+			if n.right:
+				n.right.parent = p
+			n.right = p
+		else:
+			p.right = n.left
+			if n.left:
+				n.left.parent = p
+			n.left = p
+		p.parent = n
+		n.parent = g
+		if g is None:
+			self._root = n
+		elif g.left is p:
+			g.left = n
+		else:
+			g.right = n
+
+	def insert(self, edge):
+		n = _Node(edge, self._rand.random())
+		self._nodes[edge] = n
+		if self._root is None:
+			self._root = n
+			return
+		c = self._root
+		while True:
+			if self._before(edge, c.edge):
+				if c.left is None:
+					c.left = n
+					break
+				c = c.left
+			else:
+				if c.right is None:
+					c.right = n
+					break
+				c = c.right
+		n.parent = c
+		while n.parent is not None and n.parent.prio < n.prio:
+			self._rotate_up(n)
+
+	def remove(self, edge):
+		"""
+		Removes the edge from the status.
+		Raises a KeyError if the edge is not in it.
+		"""
+		n = self._nodes.pop(edge)
+		# rotate the node down until it is a leaf
+		while n.left is not None or n.right is not None:
+			if n.left is None:
+				child = n.right
+			elif n.right is None:
+				child = n.left
+			elif n.left.prio > n.right.prio:
+				child = n.left
+			else:
+				child = n.right
+			self._rotate_up(child)
+		p = n.parent
+		if p is None:
+			self._root = None
+		elif p.left is n:
+			p.left = None
+		else:
+			p.right = None
+
+	def left_of(self, p):
+		"""
+		Returns the edge directly left of point P on the
+		horizontal line through P, or None if there is none.
+		"""
+		r = None
+		c = self._root
+		while c is not None:
+			if self._side(c.edge, p) > 0:
+				r = c.edge
+				c = c.right
+			else:
+				c = c.left
+		return r
+
+	def right_of(self, p):
+		"""
+		Returns the edge directly right of point P on the
+		horizontal line through P, or None if there is none.
+		"""
+		r = None
+		c = self._root
+		while c is not None:
+			if self._side(c.edge, p) < 0:
+				r = c.edge
+				c = c.left
+			else:
+				c = c.right
+		return r
+
+	def before(self, edge):
+		"""
+		The edge left of EDGE in the status, or None. If EDGE is
+		None, the rightmost edge.
+		"""
+		if edge is None:
+			c = self._root
+			while c is not None and c.right is not None:
+				c = c.right
+			return c.edge if c else None
+		n = self._nodes[edge]
+		if n.left is not None:
+			n = n.left
+			while n.right is not None:
+				n = n.right
+			return n.edge
+		while n.parent is not None and n.parent.left is n:
+			n = n.parent
+		return n.parent.edge if n.parent else None
+
+	def after(self, edge):
+		"""
+		The edge right of EDGE in the status, or None. If EDGE is
+		None, the leftmost edge.
+		"""
+		if edge is None:
+			c = self._root
+			while c is not None and c.left is not None:
+				c = c.left
+			return c.edge if c else None
+		n = self._nodes[edge]
+		if n.right is not None:
+			n = n.right
+			while n.left is not None:
+				n = n.left
+			return n.edge
+		while n.parent is not None and n.parent.right is n:
+			n = n.parent
+		return n.parent.edge if n.parent else None
+
+	def __len__(self):
+		return len(self._nodes)
+
+	def __contains__(self, edge):
+		return edge in self._nodes
+
+	def __iter__(self):
+		stack = []
+		c = self._root
+		while stack or c is not None:
+			if c is not None:
+				stack += [c]
+				c = c.left
+			else:
+				c = stack.pop()
+				yield c.edge
+				c = c.right
+
+	def __str__(self):
+		return "EdgeStatus({})".format(list(self))
+
+	def __repr__(self):
+		return str(self)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import math
+import re
+import xml.etree.ElementTree as ET
+import logg
+
+# a command letter, or a number (SVG allows "1-2" and "1.5.5")
+_TOKEN = re.compile(r'[A-Za-z]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_TRANSFORM = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+_LENGTH = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+# affine transforms are (a, b, c, d, e, f), as in SVG:
+# x' = a*x + c*y + e, y' = b*x + d*y + f
+IDENTITY = (1, 0, 0, 1, 0, 0)
+
+def compose(m, n):
+	"""
+	The transform that applies N first, then M.
+	"""
+	a, b, c, d, e, f = m
+	p, q, r, s, t, u = n
+	return (a*p + c*q, b*p + d*q, a*r + c*s, b*r + d*s, a*t + c*u + e, b*t + d*u + f)
+
+def apply(m, p):
+	a, b, c, d, e, f = m
+	return (a*p[0] + c*p[1] + e, b*p[0] + d*p[1] + f)
+
+def parse_transform(text):
+	"""
+	Parses an SVG transform attribute (a list of matrix, translate,
+	scale, rotate, skewX and skewY) into one affine transform.
+	"""
+	r = IDENTITY
+	for name, args in _TRANSFORM.findall(text or ''):
+		v = [float(x) for x in _TOKEN.findall(args)]
+		if name == 'matrix' and len(v) == 6:
+			m = tuple(v)
+		elif name == 'translate' and len(v) in (1, 2):
+			m = (1, 0, 0, 1, v[0], v[1] if len(v) == 2 else 0)
+		elif name == 'scale' and len(v) in (1, 2):
+			m = (v[0], 0, 0, v[1] if len(v) == 2 else v[0], 0, 0)
+		elif name == 'rotate' and len(v) in (1, 3):
+			cos = math.cos(math.radians(v[0]))
+			sin = math.sin(math.radians(v[0]))
+			m = (cos, sin, -sin, cos, 0, 0)
+			if len(v) == 3:
+				m = compose((1, 0, 0, 1, v[1], v[2]), compose(m, (1, 0, 0, 1, -v[1], -v[2])))
+		elif name == 'skewX' and len(v) == 1:
+			m = (1, 0, math.tan(math.radians(v[0])), 1, 0, 0)
+		elif name == 'skewY' and len(v) == 1:
+			m = (1, math.tan(math.radians(v[0])), 0, 1, 0, 0)
+		else:
+			raise ValueError("Bad transform: {}({})".format(name, args))
+		# the list applies right to left
+		r = compose(r, m)
+	return r
+
+def parse_path(d, transform = IDENTITY):
+	"""
+	Parses SVG path data into rings of (x, y), one per subpath.
+	Knows the absolute and relative M, L, H, V and Z commands,
+	including pairs after M that are implicit L's. Subpaths count
+	as closed whether or not they end in Z. Rings with fewer than
+	three points are left out.
+
+	Raises a ValueError on other commands (curves and arcs) or
+	on malformed data.
+	"""
+	tokens = _TOKEN.findall(d or '')
+	rings = []
+	ring = None
+	x = y = 0.0		# current point
+	sx = sy = 0.0	# start of the subpath
+	cmd = None
+	i = 0
+
+	def numbers(k):
+		if i + k > len(tokens) or any(t.isalpha() for t in tokens[i:i+k]):
+			raise ValueError("Command {} needs {} numbers in path '{}'".format(cmd, k, d[:40]))
+		return [float(t) for t in tokens[i:i+k]]
+
+	while i < len(tokens):
+		t = tokens[i]
+		if t.isalpha():
+			if t not in 'MmLlHhVvZz':
+				raise ValueError("Unsupported path command '{}'".format(t))
+			cmd = t
+			i += 1
+			if cmd in 'Zz':
+				if ring is not None:
+					rings += [ring]
+					ring = None
+				x, y = sx, sy
+				continue
+			if i >= len(tokens):
+				raise ValueError("Command {} has no numbers in path '{}'".format(cmd, d[:40]))
+		elif cmd is None or cmd in 'Zz':
+			raise ValueError("Numbers without a command in path '{}'".format(d[:40]))
+
+		if cmd in 'Mm':
+			nx, ny = numbers(2)
+			i += 2
+			if cmd == 'm':
+				nx += x
+				ny += y
+			if ring is not None:
+				rings += [ring]
+			ring = [(nx, ny)]
+			x, y = sx, sy = nx, ny
+			# more pairs after a moveto are linetos
+			cmd = 'l' if cmd == 'm' else 'L'
+			continue
+		if cmd in 'Ll':
+			nx, ny = numbers(2)
+			i += 2
+			if cmd == 'l':
+				nx += x
+				ny += y
+		elif cmd in 'Hh':
+			nx, = numbers(1)
+			i += 1
+			ny = y
+			if cmd == 'h':
+				nx += x
+		else:
+			ny, = numbers(1)
+			i += 1
+			nx = x
+			if cmd == 'v':
+				ny += y
+		if ring is None:
+			# drawing on after a Z starts at the start of the last subpath
+			ring = [(x, y)]
+		ring += [(nx, ny)]
+		x, y = nx, ny
+	if ring is not None:
+		rings += [ring]
+
+	r = []
+	for ring in rings:
+		points = []
+		for p in ring:
+			p = apply(transform, p)
+			if not points or p != points[-1]:
+				points += [p]
+		if len(points) > 1 and points[0] == points[-1]:
+			del points[-1]
+		if len(points) >= 3:
+			r += [points]
+	return r
+
+def _length(text):
+	# "210mm" -> 210.0; None if there is no number
+	m = _LENGTH.match(text or '')
+	return float(m.group(1)) if m else None
+
+def _local(tag):
+	return tag.rsplit('}', 1)[-1]
+
+def _world(root):
+	"""
+	The transform from the user units of the document to world
+	coordinates: y goes up, and the origin is at the centre of
+	the viewBox (or of the width and height).
+	"""
+	box = [float(v) for v in _TOKEN.findall(root.get('viewBox', ''))]
+	if len(box) == 4:
+		cx = box[0] + box[2]/2
+		cy = box[1] + box[3]/2
+	else:
+		w = _length(root.get('width'))
+		h = _length(root.get('height'))
+		cx = w/2 if w is not None else 0
+		cy = h/2 if h is not None else 0
+	return (1, 0, 0, -1, -cx, cy)
+
+def iter_rings(source):
+	"""
+	Streams an SVG file (a path or a file object) and yields the
+	rings of every <path> element, one list of rings per path, in
+	world coordinates: the transforms of the path and all groups
+	around it are applied, then see _world.
+
+	The document is read with iterparse and every element is
+	dropped once it is done with, so memory stays flat however big
+	the file is. Paths that cannot be parsed are logged and skipped.
+	"""
+	l = logg.get("SVG")
+	transforms = []
+	elements = []
+	for event, elem in ET.iterparse(source, events = ('start', 'end')):
+		if event == 'start':
+			if not transforms:
+				base = _world(elem)
+			else:
+				base = transforms[-1]
+			transforms += [compose(base, parse_transform(elem.get('transform')))]
+			elements += [elem]
+			continue
+
+		if _local(elem.tag) == 'path':
+			try:
+				rings = parse_path(elem.get('d'), transforms[-1])
+			except ValueError as e:
+				l.warning("Skipped path '%s': %s", elem.get('id'), e)
+				rings = []
+			if rings:
+				yield rings
+		transforms.pop()
+		elements.pop()
+		elem.clear()
+		if elements:
+			elements[-1].remove(elem)
+
+def write_rings(path, rings, name = 'room'):
+	"""
+	Writes rings of (x, y) in world coordinates as an SVG with one
+	path, that iter_rings reads back as the same rings: the viewBox
+	is centred on the origin and y is flipped.
+	"""
+	size = max(max(abs(x), abs(y)) for ring in rings for x, y in ring)*1.1 or 1
+	d = ' '.join('M ' + ' L '.join('{!r} {!r}'.format(float(x), -float(y)) for x, y in ring) + ' Z' for ring in rings)
+	with open(path, 'w') as f:
+		f.write('<svg xmlns="http://www.w3.org/2000/svg" viewBox="{0!r} {0!r} {1!r} {1!r}">\n'.format(-size, 2*size))
+		f.write('\t<path id="{}" d="{}" fill="none" stroke="black" stroke-width="{!r}"/>\n'.format(name, d, size/200))
+		f.write('</svg>\n')
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Brute-force checks shared by the tests: they look at every
+half-edge, and so are only meant for small DCELs.
+"""
+
+from tri import signed_area
+
+def check_links(dcel):
+	"""
+	The half-edges form closed cycles, every cycle carries one face
+	label, every label has one anti-clockwise cycle (its outer
+	boundary; the others are obstacles not yet joined to it),
+	face_edge has an edge of that cycle, and incident holds exactly
+	the half-edges starting at each vertex.
+	"""
+	edges = list(dcel.edges)
+	for e in edges:
+		assert e.next.prev is e and e.prev.next is e
+		assert e.twin is None or (e.twin.twin is e and e.twin.origin is e.next.origin)
+	outer = {}
+	labels = set()
+	seen = set()
+	for e0 in edges:
+		if e0 in seen:
+			continue
+		ring = []
+		e = e0
+		while True:
+			assert e.face == e0.face
+			seen.add(e)
+			ring += [(e.origin.x, e.origin.y)]
+			e = e.next
+			if e is e0:
+				break
+		labels.add(e0.face)
+		if signed_area(ring) > 0:
+			assert e0.face not in outer, "two faces labelled {}".format(e0.face)
+			outer[e0.face] = e0
+	assert set(outer) == labels == set(dcel.face_edge)
+	for f, e in dcel.face_edge.items():
+		e1 = e
+		while e1 is not outer[f]:
+			e1 = e1.next
+			assert e1 is not e, "face_edge[{}] is not on its outer boundary".format(f)
+	starts = {}
+	for e in edges:
+		starts.setdefault(e.origin, set()).add(e)
+	assert {v: set(l) for v, l in dcel.incident.items()} == starts
+
+def check_triangulation(dcel, outer, holes = ()):
+	"""
+	Every face is a triangle, there are as many as a triangulation
+	of the rings has, and they cover the area of the polygon.
+	"""
+	check_links(dcel)
+	polys = dcel.gen_face_data(q = ["faces"])["polys"]
+	assert all(len(p) == 3 for p in polys.values())
+	n = len(outer) + sum(len(h) for h in holes)
+	assert len(polys) == n - 2 + 2*len(holes)
+	area = 0
+	for p in polys.values():
+		a = signed_area([(v.x, v.y) for v in p])
+		assert a > 0
+		area += a
+	want = abs(signed_area(outer)) - sum(abs(signed_area(h)) for h in holes)
+	assert abs(area - want) <= 1e-9*want
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+The modules of virtual-world import each other by their bare
+names, as when run from that folder; so do the tests.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import logg
+logg.set_level('WARNING')
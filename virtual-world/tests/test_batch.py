@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import polygons
+import batch
+from tri import DCEL, TriangleSweep
+from compact import CompactDCEL
+
+def _triangles(dcel):
+	polys = dcel.gen_face_data(q = ["faces"])["polys"]
+	return sorted(tuple(sorted((v.x, v.y) for v in p)) for p in polys.values())
+
+def _inputs():
+	r = []
+	for name in sorted(polygons.GENERATORS):
+		outer, holes = polygons.GENERATORS[name](80, 3)
+		r += [DCEL.from_rings([outer] + holes)]
+	r += [CompactDCEL.from_dcel(DCEL.from_rings([polygons.star(50, 1)]))]
+	return r
+
+def _serial(dcels):
+	# each polygon on its own, in this process
+	return [_triangles(TriangleSweep.triangulate(batch.loads(batch.dumps(d)))) for d in dcels]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_many_matches_serial(workers):
+	dcels = _inputs()
+	before = [len(d.edges) for d in dcels]
+	r = batch.triangulate_many(dcels, workers = workers)
+	assert [_triangles(d) for d in r] == _serial(dcels)
+	assert [type(d) for d in r] == [type(d) for d in dcels]
+	# the inputs are left alone
+	assert [len(d.edges) for d in dcels] == before
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_completed_yields_each_once(workers):
+	dcels = _inputs()
+	want = _serial(dcels)
+	got = {}
+	for i, d in batch.triangulate_completed(dcels, workers = workers):
+		assert i not in got
+		got[i] = _triangles(d)
+	assert [got[i] for i in range(len(dcels))] == want
+
+def test_dumps_loads():
+	outer, holes = polygons.holes(40, 1)
+	d = TriangleSweep.triangulate(DCEL.from_rings([outer] + holes))
+	assert _triangles(batch.loads(batch.dumps(d))) == _triangles(d)
+	assert isinstance(batch.loads(batch.dumps(d), compact = True), CompactDCEL)
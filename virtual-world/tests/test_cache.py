@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import polygons
+import cache
+import tri
+from main import Room
+from checks import check_triangulation
+
+def _room():
+	shape = [[0, 0], [10, 0], [10, 10], [0, 10]]
+	obstacles = [[[2, 2], [2, 4], [4, 4], [4, 2]], [[6, 6], [6, 8], [8, 7]]]
+	return {'name': 'test', 'shape': shape, 'obstacles': obstacles}
+
+def _area(rings, triangles):
+	points = [v for ring in rings for v in ring]
+	return sum(tri.signed_area([points[i] for i in t]) for t in triangles)
+
+def test_put_get(tmp_path):
+	c = cache.TriangulationCache(str(tmp_path))
+	rings = [polygons.star(20, 1)]
+	assert c.get(rings) is None
+	triangles = [(0, i, i + 1) for i in range(1, 19)]
+	c.put(rings, triangles)
+	entry = c.get(rings)
+	assert [tuple(t) for t in entry['triangles']] == triangles
+	# other rings, or the same ones moved a little, miss
+	assert c.get([polygons.star(20, 2)]) is None
+	moved = [[(x + 1e-9, y) for x, y in rings[0]]]
+	assert c.get(moved) is None
+
+def test_stored_rings_are_compared(tmp_path):
+	c = cache.TriangulationCache(str(tmp_path))
+	rings = [polygons.star(20, 1)]
+	c.put(rings, [(0, 1, 2)])
+	# an entry under this key for other rings, as a hash collision
+	path = c._path(c.key(rings))
+	with open(path) as f:
+		data = json.load(f)
+	data['rings'] = [[list(p) for p in polygons.star(20, 2)]]
+	with open(path, 'w') as f:
+		json.dump(data, f)
+	assert c.get(rings) is None
+
+def test_evicts_to_max_bytes(tmp_path):
+	c = cache.TriangulationCache(str(tmp_path), max_bytes = 4096)
+	for seed in range(20):
+		c.put([polygons.star(30, seed)], [(0, 1, 2)])
+	names = os.listdir(str(tmp_path))
+	assert sum(os.path.getsize(os.path.join(str(tmp_path), n)) for n in names) <= 4096
+	# the last one written is kept
+	assert c.get([polygons.star(30, 19)]) is not None
+	c.clear()
+	assert os.listdir(str(tmp_path)) == []
+
+def test_from_environment(monkeypatch, tmp_path):
+	monkeypatch.delenv('CATTERRORISER_TRI_CACHE', raising = False)
+	assert cache.from_environment() is None
+	monkeypatch.setenv('CATTERRORISER_TRI_CACHE', '')
+	assert cache.from_environment() is None
+	monkeypatch.setenv('CATTERRORISER_TRI_CACHE', str(tmp_path))
+	assert cache.from_environment().directory == str(tmp_path)
+	monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+	monkeypatch.setenv('CATTERRORISER_TRI_CACHE', 'default')
+	assert cache.from_environment().directory.startswith(str(tmp_path))
+
+def test_warm_start(monkeypatch, tmp_path):
+	monkeypatch.setattr(Room, 'tri_cache', cache.TriangulationCache(str(tmp_path)))
+	cold = Room(**_room())
+	assert len(os.listdir(str(tmp_path))) == 1
+	warm = Room(**_room())
+	assert warm.triangles == cold.triangles
+	rings = warm._rings()
+	check_triangulation(warm.dcel, rings[0], rings[1:])
+	assert abs(_area(rings, warm.triangles) - _area(rings, cold.triangles)) < 1e-9
+	# and the warm DCEL can be edited like a swept one
+	warm.add_obstacle([[6, 2], [6, 3], [7, 3], [7, 2]])
+	assert len(warm.triangles) == len(cold.triangles) + 6
+	rings = warm._rings()
+	check_triangulation(warm.dcel, rings[0], rings[1:])
+
+def test_off_by_default():
+	assert Room.tri_cache is None or 'CATTERRORISER_TRI_CACHE' in os.environ
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import random
+from fractions import Fraction
+import pytest
+import polygons
+from tri import DCEL, TriangleSweep
+from compact import CompactDCEL
+from predicates import orient
+
+def _check(dcel):
+	s = TriangleSweep(dcel)
+	s.vertices = dcel.get_vertices()
+	s._classify()
+	# brute force: one vertex at a time
+	assert s.types == dict((v, s._vertex_type_of(v)) for v in s.vertices)
+	return s.types
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+@pytest.mark.parametrize('compact', [False, True])
+def test_generators(name, compact):
+	outer, holes = polygons.GENERATORS[name](300, 1)
+	d = DCEL.from_rings([outer] + holes)
+	types = _check(CompactDCEL.from_dcel(d) if compact else d)
+	assert set(types.values()) <= set(TriangleSweep.TYPES)
+
+def test_ties_and_near_collinear():
+	rng = random.Random(3)
+	# vertices on shared heights and widths, and corners that are
+	# straight or within rounding of it
+	ring = [(0, 0), (1, 0), (2, 0), (2, 1), (2, 2), (1, 2), (1, 1), (0, 1)]
+	_check(DCEL.from_rings([ring]))
+	a, b = (0.1, 0.1), (0.7, 0.3)
+	wall = [(a[0] + i/13*(b[0] - a[0]), a[1] + i/13*(b[1] - a[1])) for i in range(14)]
+	_check(DCEL.from_rings([wall + [(0.4, 0.9)]]))
+	_check(DCEL.from_rings([wall[::-1] + [(0.4, -0.9)]]))
+	for _ in range(20):
+		ring = [(rng.randrange(6), rng.randrange(6)) for _ in range(3)]
+		# small triangles on a grid, many with a side level
+		if orient(*ring) != 0:
+			_check(DCEL.from_rings([ring]))
+
+def test_exact_coordinates():
+	# what floats do not hold exactly goes one by one
+	big = 2**60
+	ring = [(big, big), (big + 3, big), (big + 1, big + 1), (big + 3, big + 2), (big, big + 2)]
+	_check(DCEL.from_rings([ring]))
+	ring = [(Fraction(1, 3), Fraction(0)), (Fraction(2, 3), Fraction(1, 7)), (Fraction(1, 2), Fraction(1))]
+	_check(DCEL.from_rings([ring]))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import random
+import pytest
+import polygons
+import tri
+from tri import DCEL, TriangleSweep
+from compact import CompactDCEL
+from checks import check_links, check_triangulation
+
+def _triangles(dcel):
+	polys = dcel.gen_face_data(q = ["faces"])["polys"]
+	return sorted(tuple(sorted((v.x, v.y) for v in p)) for p in polys.values())
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_sweep_matches_dcel(name):
+	outer, holes = polygons.GENERATORS[name](150, 4)
+	d = TriangleSweep.triangulate(DCEL.from_rings([outer] + holes))
+	c = TriangleSweep.triangulate(CompactDCEL.from_dcel(DCEL.from_rings([outer] + holes)))
+	check_triangulation(c.to_dcel(), outer, holes)
+	assert _triangles(c) == _triangles(d)
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_insert_one_by_one(name):
+	outer, holes = polygons.GENERATORS[name](60, 7)
+	s = TriangleSweep(DCEL.from_rings([outer] + holes))
+	s.sweep()
+	c = CompactDCEL.from_dcel(DCEL.from_rings([outer] + holes))
+	where = {(v.x, v.y): v for v in c.get_vertices()}
+	diagonals = [(where[(a.x, a.y)], where[(b.x, b.y)]) for a, b in s.diagonals]
+	random.Random(name).shuffle(diagonals)
+	for a, b in diagonals:
+		c.insert(a, b)
+		check_links(c.to_dcel())
+	check_triangulation(c.to_dcel(), outer, holes)
+
+def test_fan_keeps_its_order(monkeypatch):
+	from test_dcel import _fan
+	n = 2000
+	calls = [0]
+	in_corner = tri._in_corner
+	def counted(*args):
+		calls[0] += 1
+		return in_corner(*args)
+	monkeypatch.setattr(tri, '_in_corner', counted)
+	outer = _fan(n)
+	c = TriangleSweep.triangulate(CompactDCEL.from_dcel(DCEL.from_rings([outer])))
+	check_triangulation(c.to_dcel(), outer)
+	assert c._fans
+	for v, fan in c._fans.items():
+		assert fan == list(c._around(v))
+	# one corner test per end of each diagonal, not one per half-edge
+	assert calls[0] <= 2*(n - 3)
+
+def test_round_trips():
+	outer, holes = polygons.holes(80, 2)
+	c = TriangleSweep.triangulate(CompactDCEL.from_dcel(DCEL.from_rings([outer] + holes)))
+	again = CompactDCEL.from_bytes(c.to_bytes())
+	for name in ('x', 'y', 'vert_edge', 'origin', 'twin', 'next', 'prev', 'face'):
+		assert list(getattr(again, name)) == list(getattr(c, name))
+	# face_edge is indexed anew, so it may name another edge of each face
+	assert [e == -1 for e in again.face_edge] == [e == -1 for e in c.face_edge]
+	assert again.faces == c.faces
+	back = CompactDCEL.from_dcel(c.to_dcel())
+	assert _triangles(back) == _triangles(c)
+	assert c.nbytes() == sum(a.itemsize*len(a) for a in (c.x, c.y, c.vert_edge,
+			c.origin, c.twin, c.next, c.prev, c.face, c.helper))
+
+def test_refuses():
+	c = CompactDCEL.from_dcel(DCEL.from_rings([polygons.star(10)]))
+	with pytest.raises(ValueError):
+		CompactDCEL.from_bytes(b'\0'*64)
+	with pytest.raises(TypeError):
+		c.remove(c.edges[0])
+	with pytest.raises(TypeError):
+		c.insert_triangles([])
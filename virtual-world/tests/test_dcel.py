@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import pytest
+import polygons
+import tri
+from tri import DCEL, TriangleSweep, _in_corner
+from checks import check_links, check_triangulation
+
+def _replay(name, n, seed, order):
+	outer, holes = polygons.GENERATORS[name](n, seed)
+	s = TriangleSweep(DCEL.from_rings([outer] + holes))
+	s.sweep()
+	fresh = DCEL.from_rings([outer] + holes)
+	where = {(v.x, v.y): v for v in fresh.get_vertices()}
+	diagonals = [(where[(a.x, a.y)], where[(b.x, b.y)]) for a, b in s.diagonals]
+	order(diagonals)
+	return fresh, diagonals, outer, holes
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_insert_one_by_one(name):
+	fresh, diagonals, outer, holes = _replay(name, 60, 2, random.Random(name).shuffle)
+	for a, b in diagonals:
+		fresh.insert(a, b)
+		check_links(fresh)
+	check_triangulation(fresh, outer, holes)
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_insert_many(name):
+	fresh, diagonals, outer, holes = _replay(name, 200, 5, lambda l: None)
+	labels = fresh.insert_many(diagonals)
+	check_triangulation(fresh, outer, holes)
+	assert set(labels) == set(fresh.face_edge)
+
+def test_remove_undoes_insert():
+	fresh, diagonals, outer, holes = _replay('star', 40, 1, lambda l: None)
+	for a, b in diagonals:
+		fresh.insert(a, b)
+	for a, b in diagonals[::2]:
+		e = [e for e in fresh.incident[a] if e.next.origin is b][0]
+		fresh.remove(e)
+		check_links(fresh)
+	assert len(fresh.face_edge) == len(diagonals[1::2]) + 1
+
+def _turn(e, wall):
+	# the angle from the wall to E, anti-clockwise, in [0, 2 pi)
+	v, a, b = e.origin, wall.next.origin, e.next.origin
+	t = math.atan2(b.y - v.y, b.x - v.x) - math.atan2(a.y - v.y, a.x - v.x)
+	return t % (2*math.pi)
+
+def _fan(n):
+	# one vertex sees all the others: its degree grows with n
+	left = [(-50 + 40*(1 - (1 - 2*i/(n-1))**2), 100 - 200*i/(n-1)) for i in range(1, n-1)]
+	return [(0, 100)] + left + [(0, -100)]
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_corner_is_found_by_bisection(name):
+	fresh, diagonals, outer, holes = _replay(name, 60, 3, random.Random(name).shuffle)
+	for a, b in diagonals:
+		for v, p in ((a, b), (b, a)):
+			edges = fresh.incident[v]
+			slow = [i for i in range(len(edges)) if _in_corner(edges[i], p)]
+			assert [fresh._corner(v, p)] == (slow if len(edges) > 1 else [0])
+		fresh.insert(a, b)
+	for v, edges in fresh.incident.items():
+		assert edges[0].twin is None
+		turns = [_turn(e, edges[0]) for e in edges]
+		assert turns == sorted(turns)
+
+def test_fan_takes_log_steps(monkeypatch):
+	n = 2000
+	calls = [0]
+	def counting(f):
+		def counted(*args):
+			calls[0] += 1
+			return f(*args)
+		return counted
+	monkeypatch.setattr(tri, '_ccw_before', counting(tri._ccw_before))
+	monkeypatch.setattr(tri, '_in_corner', counting(tri._in_corner))
+	outer = _fan(n)
+	d = TriangleSweep.triangulate(DCEL.from_rings([outer]))
+	check_triangulation(d, outer)
+	assert max(len(edges) for edges in d.incident.values()) > n/3
+	# a linear search would take about n*n/8 steps here
+	assert calls[0] < 4*n*math.log2(n)
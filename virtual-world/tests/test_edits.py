@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import random
+import pytest
+import polygons
+import tri
+from main import Room
+from checks import check_triangulation
+
+def _square(c, s):
+	return [[c[0] - s, c[1] - s], [c[0] + s, c[1] - s], [c[0] + s, c[1] + s], [c[0] - s, c[1] + s]]
+
+def _triangles(room):
+	return sorted(tuple(sorted((room.vertices[i].x, room.vertices[i].y) for i in t)) for t in room.triangles)
+
+def _check(room):
+	# the patched lists against the DCEL they were patched from, and
+	# the DCEL against a triangulation of the rings from scratch
+	assert len(set(room.vertices)) == len(room.vertices)
+	assert set(room.vertices) == set(room.dcel.incident)
+	polys = room.dcel.gen_face_data(q = ["faces"])["polys"]
+	assert _triangles(room) == sorted(tuple(sorted((v.x, v.y) for v in p)) for p in polys.values())
+	rings = room._rings()
+	check_triangulation(room.dcel, rings[0], rings[1:])
+	fresh = Room(shape = room.shape, obstacles = room.obstacles)
+	assert len(fresh.triangles) == len(room.triangles)
+
+def _locate(room, p):
+	# brute force: the triangle P is well inside, or -1 if none
+	for k in range(len(room.triangles)):
+		v = [room.vertices[i] for i in room.triangles[k]]
+		if all(tri.orient(v[i-1], v[i], p) > 0 for i in range(3)):
+			return k
+	return -1
+
+@pytest.mark.parametrize('seed', range(3))
+def test_edits_match_a_rebuild(seed):
+	outer, holes = polygons.holes(60, seed)
+	room = Room(shape = outer, obstacles = holes)
+	rng = random.Random(seed)
+	done = 0
+	for step in range(60):
+		c = (rng.uniform(-4, 4), rng.uniform(-4, 4))
+		s = rng.uniform(0.05, 0.3)
+		live = [i for i in range(len(room.obstacles)) if room.obstacles[i]]
+		op = rng.choice(['add', 'move', 'remove']) if live else 'add'
+		try:
+			if op == 'add':
+				room.add_obstacle(_square(c, s))
+			elif op == 'move':
+				room.move_obstacle(rng.choice(live), _square(c, s))
+			else:
+				room.remove_obstacle(rng.choice(live))
+			done += 1
+		except ValueError:
+			pass
+		_check(room)
+		# the locator follows the edit
+		p = (c[0] + s*0.5, c[1])
+		assert room.locate(p) == _locate(room, p)
+	assert done > 20
+
+def test_edit_outside_changes_nothing():
+	room = Room(shape = [[0, 0], [10, 0], [10, 10], [0, 10]], obstacles = [_square((3, 3), 1)])
+	before = _triangles(room)
+	with pytest.raises(ValueError):
+		room.add_obstacle(_square((20, 20), 1))
+	with pytest.raises(ValueError):
+		# over the wall
+		room.add_obstacle(_square((10, 5), 1))
+	with pytest.raises(ValueError):
+		room.move_obstacle(0, _square((0, 0), 1))
+	assert _triangles(room) == before
+	assert room.obstacles == [_square((3, 3), 1)]
+	_check(room)
+
+def test_edits_leave_the_callers_lists_alone():
+	obstacles = [_square((3, 3), 1), _square((7, 7), 1)]
+	given = [list(o) for o in obstacles]
+	room = Room(shape = [[0, 0], [10, 0], [10, 10], [0, 10]], obstacles = obstacles)
+	new = _square((7, 3), 1)
+	room.add_obstacle(new)
+	room.remove_obstacle(0)
+	room.move_obstacle(1, _square((6, 6), 1))
+	assert obstacles == given
+	assert new == _square((7, 3), 1)
+	assert room.obstacles == [[], _square((6, 6), 1), new]
+	_check(room)
+
+def test_ring_edits_report_faces():
+	d = tri.TriangleSweep.triangulate(tri.DCEL.from_rings([[(0, 0), (10, 0), (10, 10), (0, 10)]]))
+	ring = tri.Vertex.tuples_to_vertices(_square((5, 5), 1))
+	removed, created = d.add_ring(ring)
+	assert set(created) <= set(d.face_edge)
+	assert all(f not in d.face_edge for f in removed if f not in created)
+	assert len(d.face_edge) == 8
+	removed, created = d.remove_ring(ring[0])
+	assert len(d.face_edge) == 2 and set(created) <= set(d.face_edge)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import polygons
+from tri import DCEL, TriangleSweep
+from compact import CompactDCEL
+
+def _cycles(dcel):
+	# brute force: walk the cycle of every half-edge; per face
+	# label, the cycles, each starting at its least vertex
+	r = {}
+	for e0 in dcel.edges:
+		ring = []
+		e = e0
+		while True:
+			ring += [(e.origin.x, e.origin.y)]
+			e = e.next
+			if e == e0:
+				break
+		key = min(range(len(ring)), key = lambda i: ring[i])
+		r.setdefault(e0.face, set()).add(tuple(ring[key:] + ring[:key]))
+	return r
+
+def _network(polys):
+	# brute force: two faces are neighbours if they share a side
+	sides = {}
+	for f, verts in polys.items():
+		for i in range(len(verts)):
+			sides[f, frozenset([verts[i-1], verts[i]])] = True
+	r = {}
+	for f in polys:
+		r[f] = set(g for g in polys if g != f and any((g, s) in sides
+				for s in [frozenset([polys[f][i-1], polys[f][i]]) for i in range(len(polys[f]))]))
+	return r
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+@pytest.mark.parametrize('compact', [False, True])
+def test_face_data(name, compact):
+	outer, holes = polygons.GENERATORS[name](120, 1)
+	d = DCEL.from_rings([outer] + holes)
+	if compact:
+		d = CompactDCEL.from_dcel(d)
+	d = TriangleSweep.triangulate(d)
+	data = d.gen_face_data()
+	polys = dict((f, [(v.x, v.y) for v in verts]) for f, verts in data["polys"].items())
+	cycles = _cycles(d)
+	assert set(polys) == set(cycles)
+	for f, verts in polys.items():
+		key = min(range(len(verts)), key = lambda i: verts[i])
+		assert cycles[f] == {tuple(verts[key:] + verts[:key])}
+	assert data["network"] == _network(polys)
+	colours = data["colours"]
+	for f, near in data["network"].items():
+		assert all(colours[f] != colours[g] for g in near)
+	# a triangle has at most three neighbours
+	assert max(colours.values()) <= 3
+
+def test_query_subsets():
+	d = TriangleSweep.triangulate(DCEL.from_rings([polygons.star(20)]))
+	assert set(d.gen_face_data(q = ["faces"])) == {"polys"}
+	assert set(d.gen_face_data(q = ["colours"])) == {"colours"}
+	assert set(d.gen_face_data(q = ["network", "faces"])) == {"polys", "network"}
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import polygons
+from tri import DCEL, TriangleSweep
+from checks import check_triangulation
+
+def _inside(p, ring):
+	# even-odd rule, with a ray to the right
+	r = False
+	for i in range(len(ring)):
+		(ax, ay), (bx, by) = ring[i-1], ring[i]
+		if (ay > p[1]) != (by > p[1]) and p[0] < ax + (p[1] - ay)*(bx - ax)/(by - ay):
+			r = not r
+	return r
+
+def _check(outer, holes):
+	d = TriangleSweep.triangulate(DCEL.from_rings([outer] + holes))
+	check_triangulation(d, outer, holes)
+	for poly in d.gen_face_data(q = ["faces"])["polys"].values():
+		c = (sum(v.x for v in poly)/3, sum(v.y for v in poly)/3)
+		assert _inside(c, outer)
+		assert not any(_inside(c, h) for h in holes)
+
+@pytest.mark.parametrize('n', [10, 40, 200, 600])
+@pytest.mark.parametrize('seed', range(3))
+def test_random_holes(n, seed):
+	_check(*polygons.holes(n, seed))
+
+@pytest.mark.parametrize('count', [1, 5, 30])
+def test_hole_count(count):
+	_check(*polygons.holes(300, 1, count = count))
+
+def test_aligned_holes():
+	# a grid of squares: many vertices on each sweep line
+	outer = [(0, 0), (10, 0), (10, 10), (0, 10)]
+	holes = []
+	for i in range(4):
+		for j in range(4):
+			x, y = 1 + 2*i, 1 + 2*j
+			holes += [[(x, y), (x, y + 1), (x + 1, y + 1), (x + 1, y)]]
+	_check(outer, holes)
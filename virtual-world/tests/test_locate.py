@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import random
+import numpy as np
+import pytest
+import polygons
+from tri import DCEL, TriangleSweep
+from locate import TriangleLocator
+from grid import UniformGrid
+
+def _mesh(name, n, seed):
+	outer, holes = polygons.GENERATORS[name](n, seed)
+	d = TriangleSweep.triangulate(DCEL.from_rings([outer] + holes))
+	verts = d.get_vertices()
+	index = dict((verts[i], i) for i in range(len(verts)))
+	points = [(v.x, v.y) for v in verts]
+	triangles = [[index[v] for v in p] for p in d.gen_face_data(q = ["faces"])["polys"].values()]
+	return points, triangles
+
+def _margins(p, points, triangles):
+	# brute force: per triangle, the least signed distance of P
+	# inside it (negative outside)
+	c = np.asarray(points)[np.asarray(triangles)]
+	r = np.full(len(c), np.inf)
+	for i in range(3):
+		a = c[:, i]
+		e = c[:, (i+1) % 3] - a
+		r = np.minimum(r, (e[:, 0]*(p[1] - a[:, 1]) - e[:, 1]*(p[0] - a[:, 0]))/np.hypot(e[:, 0], e[:, 1]))
+	return r
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_locate_matches_brute_force(name):
+	points, triangles = _mesh(name, 300, 1)
+	locator = TriangleLocator(points, triangles)
+	rng = random.Random(name)
+	xs = [p[0] for p in points]
+	ys = [p[1] for p in points]
+	queries = [(rng.uniform(min(xs) - 1, max(xs) + 1), rng.uniform(min(ys) - 1, max(ys) + 1)) for _ in range(500)]
+	# and the corners and edge midpoints, on the boundaries
+	for t in triangles[:50]:
+		queries += [points[t[0]], tuple((np.add(points[t[1]], points[t[2]]))/2)]
+	many = locator.locate_many(queries)
+	for i in range(len(queries)):
+		p = queries[i]
+		margins = _margins(p, points, triangles)
+		best = int(np.argmax(margins))
+		one = locator.locate(p)
+		if margins[best] > 1e-9:
+			assert many[i] == best and one == best
+		elif margins[best] < -1e-9:
+			assert many[i] == -1 and one == -1
+		else:
+			# on an edge: any triangle along it will do
+			assert margins[many[i]] >= -1e-9 and margins[one] >= -1e-9
+
+def test_hints():
+	points, triangles = _mesh('star', 100, 2)
+	locator = TriangleLocator(points, triangles)
+	rng = np.random.default_rng(0)
+	queries = rng.uniform(-10, 10, (300, 2))
+	want = locator.locate_many(queries)
+	# right hints, wrong hints and -1 all give the same answers
+	assert (locator.locate_many(queries, want) == want).all()
+	assert (locator.locate_many(queries, np.roll(want, 1)) == want).all()
+	assert (locator.locate_many(queries, np.full(len(queries), -1)) == want).all()
+	# and so do the buckets of an earlier locator
+	again = TriangleLocator(points, triangles, (locator.grid.start, locator.grid.items))
+	assert (again.locate_many(queries) == want).all()
+
+def test_grid_cells_match_brute_force():
+	rng = np.random.default_rng(3)
+	lo = rng.uniform(0, 10, (50, 2))
+	hi = lo + rng.uniform(0, 3, (50, 2))
+	grid = UniformGrid(lo.min(0), hi.max(0), 40)
+	grid.fill(lo, hi)
+	for c in range(grid.n[0]*grid.n[1]):
+		ix, iy = divmod(c, grid.n[1])
+		# the boxes that touch cell (ix, iy)
+		want = []
+		for i in range(len(lo)):
+			a = grid.cell_of(lo[i])
+			b = grid.cell_of(hi[i])
+			if a[0] <= ix <= b[0] and a[1] <= iy <= b[1]:
+				want += [i]
+		which, items = grid.items_in(np.array([c]))
+		assert items.tolist() == want
+	which, cells = grid.cells_of(lo, hi)
+	assert (np.diff(which) >= 0).all()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+import json
+import random
+import pytest
+import polygons
+import meshfile
+import nav
+from main import Room
+from checks import check_triangulation
+
+def _room():
+	outer, holes = polygons.holes(60, 2)
+	return Room(name = 'test', wu_per_m = 3, shape = outer, obstacles = holes)
+
+def _triangles(points, triangles):
+	return sorted(tuple(sorted(tuple(points[i]) for i in t)) for t in triangles)
+
+def _room_triangles(room):
+	return _triangles([(v.x, v.y) for v in room.vertices], room.triangles)
+
+def _points(room, count):
+	rng = random.Random(0)
+	r = []
+	while len(r) < count:
+		p = (rng.uniform(-10, 10), rng.uniform(-10, 10))
+		if room.locate(p) != -1:
+			r += [p]
+	return r
+
+def test_round_trip(tmp_path):
+	room = _room()
+	room.precompute_paths(0)
+	room.precompute_paths(0.1)
+	path = str(tmp_path / 'room.mesh')
+	room.save_mesh(path)
+	mesh = meshfile.MeshFile(path)
+	assert _triangles(mesh.points.tolist(), mesh.triangles.tolist()) == _room_triangles(room)
+	assert sorted(mesh.tables) == sorted(room._nav_mesh().tables)
+	rings = room._rings()
+	check_triangulation(mesh.compact_dcel().to_dcel(), rings[0], rings[1:])
+	loaded = Room.from_mesh(path)
+	assert (loaded.name, loaded.wu_per_m, loaded.shape, loaded.obstacles) == \
+			(room.name, room.wu_per_m, json.loads(json.dumps(room.shape)), json.loads(json.dumps(room.obstacles)))
+	# the same triangles answer the same queries
+	points = _points(room, 40)
+	for p in points:
+		mine = [(room.vertices[i].x, room.vertices[i].y) for i in room.triangles[room.locate(p)]]
+		theirs = [tuple(mesh.points[i]) for i in loaded.triangles[loaded.locate(p)]]
+		assert sorted(mine) == sorted(theirs)
+		assert loaded.vision(p, (1, 0.5)) == room.vision(p, (1, 0.5))
+	for rad in (0, 0.1):
+		for a, b in zip(points[::2], points[1::2]):
+			want = room.path_find(a, b, rad)
+			got = loaded.path_find(a, b, rad)
+			assert (got is None) == (want is None)
+			if got is not None:
+				assert nav._length(got) == pytest.approx(nav._length(want))
+	mesh.close()
+
+def test_edit_after_load(tmp_path):
+	room = _room()
+	path = str(tmp_path / 'room.mesh')
+	room.save_mesh(path)
+	loaded = Room.from_mesh(path)
+	assert loaded.dcel is None
+	for r in (room, loaded):
+		r.remove_obstacle(0)
+		r.move_obstacle(1, [[x + 0.01, y] for x, y in r.obstacles[1]])
+	assert _room_triangles(loaded) == _room_triangles(room)
+	# an edited room saves and loads again
+	path = str(tmp_path / 'edited.mesh')
+	loaded.save_mesh(path)
+	again = Room.from_mesh(path)
+	again.remove_obstacle(1)
+	room.remove_obstacle(1)
+	assert _room_triangles(again) == _room_triangles(room)
+
+def test_conversions(tmp_path):
+	room = _room()
+	path = str(tmp_path / 'room.mesh')
+	room.save_mesh(path)
+	meshfile.mesh_to_json(path, str(tmp_path / 'room.json'))
+	meshfile.json_to_mesh(str(tmp_path / 'room.json'), str(tmp_path / 'again.mesh'))
+	meshfile.mesh_to_svg(path, str(tmp_path / 'room.svg'))
+	names = meshfile.svg_to_mesh(str(tmp_path / 'room.svg'), str(tmp_path / 'svg.mesh'))
+	for name in [str(tmp_path / 'again.mesh')] + names:
+		mesh = meshfile.MeshFile(name)
+		assert _triangles(mesh.points.tolist(), mesh.triangles.tolist()) == _room_triangles(room)
+		mesh.close()
+
+def test_bad_files(tmp_path):
+	room = _room()
+	path = str(tmp_path / 'room.mesh')
+	room.save_mesh(path)
+	with open(path, 'rb') as f:
+		data = f.read()
+	for bad in (b'', b'XXXX' + data[4:], data[:len(data)//2]):
+		with open(path, 'wb') as f:
+			f.write(bad)
+		with pytest.raises(ValueError):
+			meshfile.MeshFile(path)
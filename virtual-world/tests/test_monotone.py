@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import random
+import pytest
+from tri import DCEL, _monotone_diagonals, signed_area
+from checks import check_triangulation
+from test_polygons import _proper, _inside
+
+def _monotone(k, rng, ties = False):
+	"""
+	A random y-monotone polygon of k points, anti-clockwise,
+	starting at a random point.
+	"""
+	if ties:
+		ys = sorted(rng.randrange(k//2) for _ in range(k - 2))
+	else:
+		ys = sorted(rng.uniform(0, 10) for _ in range(k - 2))
+	top = (rng.uniform(-1, 1), ys[-1] + 1)
+	bottom = (rng.uniform(-1, 1), ys[0] - 1)
+	left = []
+	right = []
+	for y in ys:
+		if rng.random() < 0.5:
+			left += [(rng.uniform(-6, -0.5), y)]
+		else:
+			right += [(rng.uniform(0.5, 6), y)]
+	# down the left chain, up the right chain
+	ring = [top] + sorted(left, key=lambda p: (-p[1], p[0])) + [bottom] + sorted(right, key=lambda p: (p[1], -p[0]))
+	s = rng.randrange(k)
+	return ring[s:] + ring[:s]
+
+@pytest.mark.parametrize('k', [3, 4, 5, 8, 30, 200])
+@pytest.mark.parametrize('ties', [False, True])
+def test_triangulates(k, ties):
+	rng = random.Random(k)
+	for _ in range(20 if k < 100 else 3):
+		points = _monotone(k, rng, ties and k > 4)
+		assert signed_area(points) > 0
+		d = _monotone_diagonals(points)
+		assert len(d) == k - 3
+		# brute force: no diagonal meets a side or another diagonal
+		# but in its ends, and each runs inside the polygon
+		sides = [(points[i-1], points[i]) for i in range(k)]
+		for x in range(len(d)):
+			a, b = points[d[x][0]], points[d[x][1]]
+			assert _inside(((a[0] + b[0])/2, (a[1] + b[1])/2), points)
+			for c, e in sides + [(points[i], points[j]) for i, j in d[x+1:]]:
+				if len(set([a, b, c, e])) == 4:
+					assert not _proper(a, b, c, e)
+		dcel = DCEL.from_rings([points])
+		v = dcel.get_vertices()
+		dcel.insert_many([(v[i], v[j]) for i, j in d])
+		check_triangulation(dcel, points)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import math
+import random
+import pytest
+import polygons
+import nav
+from main import Room
+
+def _orient(p, q, r):
+	return (q[0] - p[0])*(r[1] - p[1]) - (q[1] - p[1])*(r[0] - p[0])
+
+def _crosses(a, b, c, d):
+	# segments AB and CD cross at a point inside both
+	return _orient(c, d, a)*_orient(c, d, b) < 0 and _orient(a, b, c)*_orient(a, b, d) < 0
+
+def _inside(room, a, b):
+	# segment AB is in the room: it crosses no wall and its points
+	# between are on the mesh
+	for ring in room._rings():
+		for i in range(len(ring)):
+			if _crosses(a, b, ring[i-1], ring[i]):
+				return False
+	for k in (0.25, 0.5, 0.75):
+		if room.locate((a[0] + k*(b[0] - a[0]), a[1] + k*(b[1] - a[1]))) == -1:
+			return False
+	return True
+
+def _shortest(room, a, b):
+	# brute force: Dijkstra over the visibility graph of the wall
+	# vertices, which holds a shortest path in a polygon
+	points = [tuple(p) for ring in room._rings() for p in ring] + [a, b]
+	dist = [math.inf]*len(points)
+	dist[-2] = 0
+	heap = [(0, len(points) - 2)]
+	while heap:
+		g, i = heapq.heappop(heap)
+		if g > dist[i]:
+			continue
+		if i == len(points) - 1:
+			return g
+		for j in range(len(points)):
+			d = g + math.dist(points[i], points[j])
+			if d < dist[j] and _inside(room, points[i], points[j]):
+				dist[j] = d
+				heapq.heappush(heap, (d, j))
+	return None
+
+def _room(n, seed):
+	outer, holes = polygons.holes(n, seed)
+	return Room(shape = outer, obstacles = holes)
+
+def _points(room, count, seed):
+	rng = random.Random(seed)
+	r = []
+	while len(r) < count:
+		p = (rng.uniform(-10, 10), rng.uniform(-10, 10))
+		if room.locate(p) != -1:
+			r += [p]
+	return r
+
+@pytest.mark.parametrize('seed', range(4))
+def test_nearly_shortest(seed):
+	room = _room(40, seed)
+	points = _points(room, 20, seed)
+	for a, b in zip(points[::2], points[1::2]):
+		path = room.path_find(a, b, 0)
+		assert path[0] == a and path[-1] == b
+		for i in range(len(path) - 1):
+			assert _inside(room, path[i], path[i+1])
+		want = _shortest(room, a, b)
+		# the corridor the search finds is nearly always the one of
+		# the shortest path, and a path in it is never much longer
+		assert want*(1 - 1e-9) <= nav._length(path) <= want*1.01
+
+@pytest.mark.parametrize('rad', [0.05, 0.2])
+def test_keeps_clear_of_walls(rad):
+	room = _room(40, 1)
+	walls = [tuple(p) for ring in room._rings() for p in ring]
+	for a, b in zip(*[iter(_points(room, 40, 2))]*2):
+		if min(math.dist(a, v) for v in walls) < rad or min(math.dist(b, v) for v in walls) < rad:
+			continue
+		path = room.path_find(a, b, rad)
+		if path is None:
+			continue
+		for i in range(len(path) - 1):
+			assert _inside(room, path[i], path[i+1])
+		for v in walls:
+			assert min(nav._seg_dist(v, path[i], path[i+1]) for i in range(len(path) - 1)) >= rad*(1 - 1e-6)
+
+def test_narrow_gap():
+	# two rooms of 4 by 4, joined by a gap of width 1
+	shape = [[0, 0], [4, 0], [4, 1.5], [6, 1.5], [6, 0], [10, 0],
+			[10, 4], [6, 4], [6, 2.5], [4, 2.5], [4, 4], [0, 4]]
+	room = Room(shape = shape)
+	a, b = (1, 2), (9, 2)
+	assert room.path_find(a, b, 0.45) is not None
+	assert room.path_find(a, b, 0.55) is None
+	assert room.path_find(a, (20, 2), 0) is None
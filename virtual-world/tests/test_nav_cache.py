@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import numpy as np
+import polygons
+import nav
+from nav import NavMesh
+from main import Room
+from test_nav import _inside, _shortest, _points
+
+def _room(n, seed):
+	outer, holes = polygons.holes(n, seed)
+	return Room(shape = outer, obstacles = holes)
+
+def test_cached_corridors_give_the_same_paths():
+	room = _room(60, 1)
+	points = _points(room, 40, 1)
+	cached = NavMesh(room.dcel, cache_size = 8)
+	fresh = NavMesh(room.dcel)
+	for rad in (0, 0.05, 0.1):
+		for a, b in zip(points[::2], points[1::2]):
+			want = fresh.find_path(a, b, rad)
+			fresh.clear_cache()
+			assert cached.find_path(a, b, rad) == want
+			# again, from the cache
+			assert cached.find_path(a, b, rad) == want
+			assert len(cached._cache) <= 8
+
+def test_cache_is_per_radius_class():
+	room = _room(60, 2)
+	navmesh = NavMesh(room.dcel, rad_step = 0.05)
+	a, b = _points(room, 2, 3)
+	navmesh.find_path(a, b, 0.04)
+	navmesh.find_path(a, b, 0.05)
+	assert len(navmesh._cache) == 1
+	navmesh.find_path(a, b, 0.06)
+	assert len(navmesh._cache) == 2
+
+def test_precomputed_paths():
+	room = _room(40, 4)
+	navmesh = room._nav_mesh()
+	points = _points(room, 30, 4)
+	astar = [nav._length(navmesh.find_path(a, b, 0)) for a, b in zip(points[::2], points[1::2])]
+	navmesh.clear_cache()
+	room.precompute_paths(0)
+	dist, exit, back = navmesh.tables[0]
+	n = len(navmesh.triangles)
+	assert dist.shape == (n, n) and (np.diag(dist) == 0).all()
+	# a route is never shorter than the straight line between centroids
+	c = navmesh.points[navmesh.triangles].sum(axis=1)/3
+	straight = np.hypot(*(c[:, None, :] - c[None, :, :]).transpose(2, 0, 1))
+	assert (dist >= straight*(1 - 1e-9)).all()
+	for (a, b), limit in zip(zip(points[::2], points[1::2]), astar):
+		path = room.path_find(a, b, 0)
+		for i in range(len(path) - 1):
+			assert _inside(room, path[i], path[i+1])
+		want = _shortest(room, a, b)
+		# the tables only add a candidate to A* (see NavMesh.precompute)
+		assert want*(1 - 1e-9) <= nav._length(path) <= limit*(1 + 1e-9)
+		assert nav._length(path) <= want*1.01
+
+def test_precomputed_narrow_gap():
+	shape = [[0, 0], [4, 0], [4, 1.5], [6, 1.5], [6, 0], [10, 0],
+			[10, 4], [6, 4], [6, 2.5], [4, 2.5], [4, 4], [0, 4]]
+	room = Room(shape = shape)
+	for rad in (0.45, 0.55):
+		room.precompute_paths(rad)
+	assert room.path_find((1, 2), (9, 2), 0.45) is not None
+	assert room.path_find((1, 2), (9, 2), 0.55) is None
+	# clear_cache drops the tables too
+	room._nav_mesh().clear_cache()
+	assert room._nav_mesh().tables == {}
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ThreadPoolExecutor
+import random
+import pytest
+import polygons
+import tri
+from tri import DCEL, TriangleSweep, _monotone_batch, _monotone_diagonals, _pack_pieces, Vertex
+from compact import CompactDCEL
+from checks import check_triangulation
+from test_monotone import _monotone
+
+def _triangles(dcel):
+	polys = dcel.gen_face_data(q = ["faces"])["polys"]
+	return sorted(tuple(sorted((v.x, v.y) for v in p)) for p in polys.values())
+
+def _diagonals(s):
+	return sorted(tuple(sorted([(a.x, a.y), (b.x, b.y)])) for a, b in s.diagonals)
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+@pytest.mark.parametrize('compact', [False, True])
+def test_workers_match_one(name, compact):
+	outer, holes = polygons.GENERATORS[name](300, 2)
+	runs = []
+	for workers in (1, 2):
+		d = DCEL.from_rings([outer] + holes)
+		if compact:
+			d = CompactDCEL.from_dcel(d)
+		s = TriangleSweep(d)
+		s.sweep(workers = workers)
+		runs += [s]
+	assert _triangles(runs[1].D) == _triangles(runs[0].D)
+	assert _diagonals(runs[1]) == _diagonals(runs[0])
+	check_triangulation(runs[1].D.to_dcel() if compact else runs[1].D, outer, holes)
+
+def test_executor():
+	outer, holes = polygons.holes(200, 3)
+	one = TriangleSweep.triangulate(DCEL.from_rings([outer] + holes))
+	with ThreadPoolExecutor(3) as pool:
+		s = TriangleSweep(DCEL.from_rings([outer] + holes))
+		s.sweep(workers = pool)
+	assert _triangles(s.D) == _triangles(one)
+
+def test_batch_matches_each_piece():
+	rng = random.Random(0)
+	pieces = [Vertex.tuples_to_vertices(_monotone(k, rng)) for k in (3, 4, 7, 12, 40)]
+	pairs, counts = _monotone_batch(*_pack_pieces(pieces))
+	pos = 0
+	first = 0
+	for m, c in zip(pieces, counts):
+		want = _monotone_diagonals([(v.x, v.y) for v in m])
+		got = [(pairs[j] - first, pairs[j+1] - first) for j in range(pos, pos + 2*c, 2)]
+		assert got == want
+		pos += 2*c
+		first += len(m)
+	assert pos == len(pairs)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_insert_many_on_a_fan(compact, monkeypatch):
+	from test_dcel import _fan
+	n = 2000
+	calls = [0]
+	in_corner = tri._in_corner
+	def counted(*args):
+		calls[0] += 1
+		return in_corner(*args)
+	monkeypatch.setattr(tri, '_in_corner', counted)
+	outer = _fan(n)
+	d = DCEL.from_rings([outer])
+	if compact:
+		d = CompactDCEL.from_dcel(d)
+	s = TriangleSweep(d)
+	s.sweep(workers = 2)
+	check_triangulation(s.D.to_dcel() if compact else s.D, outer)
+	# the bulk insert finds each corner with one test, not one per half-edge
+	assert calls[0] <= 2*(n - 3)
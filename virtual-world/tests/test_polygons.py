@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pytest
+import polygons
+import bench
+from tri import signed_area
+
+def _proper(a, b, c, d):
+	def o(p, q, r):
+		return (q[0] - p[0])*(r[1] - p[1]) - (q[1] - p[1])*(r[0] - p[0])
+	# the segments meet, at a point or along a line
+	d1, d2, d3, d4 = o(c, d, a), o(c, d, b), o(a, b, c), o(a, b, d)
+	if d1*d2 < 0 and d3*d4 < 0:
+		return True
+	for p, q, r, s in ((c, d, a, d1), (c, d, b, d2), (a, b, c, d3), (a, b, d, d4)):
+		if s == 0 and min(p[0], q[0]) <= r[0] <= max(p[0], q[0]) and min(p[1], q[1]) <= r[1] <= max(p[1], q[1]):
+			return True
+	return False
+
+def _simple(rings):
+	# brute force: no two sides meet, but neighbours in their corner
+	sides = []
+	for k in range(len(rings)):
+		ring = rings[k]
+		sides += [(ring[i-1], ring[i], k, i, len(ring)) for i in range(len(ring))]
+	for x in range(len(sides)):
+		for y in range(x + 1, len(sides)):
+			a, b, k, i, n = sides[x]
+			c, d, l, j, m = sides[y]
+			if k == l and (j - i) % n in (1, n - 1):
+				continue
+			if _proper(a, b, c, d):
+				return False
+	return True
+
+def _inside(p, ring):
+	r = False
+	for i in range(len(ring)):
+		(ax, ay), (bx, by) = ring[i-1], ring[i]
+		if (ay > p[1]) != (by > p[1]) and p[0] < ax + (p[1] - ay)*(bx - ax)/(by - ay):
+			r = not r
+	return r
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+@pytest.mark.parametrize('n', [10, 37, 150])
+def test_generators(name, n):
+	outer, holes = polygons.GENERATORS[name](n, 4)
+	assert (outer, holes) == polygons.GENERATORS[name](n, 4)
+	assert (outer, holes) != polygons.GENERATORS[name](n, 5)
+	assert abs(len(outer) + sum(len(h) for h in holes) - n) <= 4
+	assert signed_area(outer) > 0
+	assert all(signed_area(h) < 0 for h in holes)
+	assert _simple([outer] + holes)
+	for h in holes:
+		assert _inside(h[0], outer)
+		assert not any(_inside(h[0], other) for other in holes if other is not h)
+	ys = [p[1] for ring in [outer] + holes for p in ring]
+	assert len(set(ys)) == len(ys)
+
+def test_run_and_compare():
+	results = [bench.run(op, 'holes', 40, repeat = 1) for op in bench.OPS]
+	for r in results:
+		assert r['vertices'] == 40 and r['time'] >= 0 and r['peak'] > 0
+	# n - 3 + 3h diagonals, for the four holes of polygons.holes(40)
+	assert [r['ops'] for r in results if r['op'] == 'insert'] == [40 - 3 + 3*4]
+	slow = [dict(r, time = r['time']*2 + 1) for r in results]
+	assert bench.compare(results, results) == []
+	assert [what for res, base, what in bench.compare(slow, results)] == ['time']*len(results)
+	assert bench.compare(results, slow) == []
+	big = [dict(r, peak = r['peak']*2) for r in results]
+	assert [what for res, base, what in bench.compare(big, results)] == ['peak']*len(results)
+
+def test_main(tmp_path, capsys):
+	out = str(tmp_path / 'out.json')
+	args = ['--sizes', '10,20', '--generators', 'star,comb', '--repeat', '1', '--no-memory']
+	assert bench.main(args + ['--out', out, '--baseline', '']) == 0
+	with open(out) as f:
+		results = json.load(f)['results']
+	assert len(results) == 2*2*len(bench.OPS)
+	# against itself with a lot of room, nothing is worse
+	assert bench.main(args + ['--baseline', out, '--tolerance', '100']) == 0
+	# against a baseline that took no time, everything is
+	for r in results:
+		r['time'] = -1
+	with open(out, 'w') as f:
+		json.dump({'results': results}, f)
+	capsys.readouterr()
+	assert bench.main(args + ['--baseline', out]) == 1
+	assert '{0} of {0} results worse'.format(len(results)) in capsys.readouterr().out
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import random
+from fractions import Fraction
+import numpy as np
+import pytest
+from predicates import orient, orient_xy, orient_exact
+import tri
+from tri import DCEL, TriangleSweep
+from checks import check_triangulation
+
+def _exact(a, b, p):
+	# the determinant in Fractions, with no filter in front
+	ax, ay, bx, by, px, py = map(Fraction, (a[0], a[1], b[0], b[1], p[0], p[1]))
+	d = (ax - px)*(by - py) - (ay - py)*(bx - px)
+	return (d > 0) - (d < 0)
+
+def _near_line(rng):
+	# three points on or within rounding of one line
+	a = (rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3))
+	b = (rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3))
+	t = rng.uniform(-2, 3)
+	p = (a[0] + t*(b[0] - a[0]), a[1] + t*(b[1] - a[1]))
+	if rng.random() < 0.5:
+		p = (float(np.nextafter(p[0], rng.choice([-np.inf, np.inf]))), p[1])
+	return a, b, p
+
+def test_near_collinear_floats():
+	rng = random.Random(1)
+	wrong = 0
+	for _ in range(5000):
+		a, b, p = _near_line(rng)
+		want = _exact(a, b, p)
+		assert orient(a, b, p) == want
+		assert orient_xy(a[0], a[1], b[0], b[1], p[0], p[1]) == want
+		assert orient_exact(a[0], a[1], b[0], b[1], p[0], p[1]) == want
+		# the plain float determinant, which this replaced
+		d = tri._sld(a, b, p)
+		wrong += ((d > 0) - (d < 0)) != want
+	# which is wrong often enough that the filter matters
+	assert wrong > 0
+
+def test_other_number_types():
+	rng = random.Random(2)
+	for _ in range(500):
+		a, b, p = _near_line(rng)
+		want = _exact(a, b, p)
+		assert orient(np.array(a), np.array(b), np.array(p)) == want
+		assert orient(*[tuple(map(Fraction, q)) for q in (a, b, p)]) == want
+		ints = [(rng.randrange(-5, 5), rng.randrange(-5, 5)) for _ in range(3)]
+		assert orient(*ints) == _exact(*ints)
+		assert isinstance(orient(*ints), int)
+	assert orient((0, 0), (1, 1), (2, 2)) == 0
+	assert orient((0.1, 0.1), (0.3, 0.3), (0.2, 0.2)) == _exact((0.1, 0.1), (0.3, 0.3), (0.2, 0.2))
+
+def test_sweep_on_collinear_walls():
+	# a square with a vertex every 0.1 along its walls, which are
+	# not exactly collinear in floats
+	k = 17
+	square = [(0.1*i, 0.0) for i in range(k)] + [(0.1*k, 0.1*i) for i in range(k)]
+	square += [(0.1*(k - i), 0.1*k) for i in range(k)] + [(0.0, 0.1*(k - i)) for i in range(k)]
+	check_triangulation(TriangleSweep.triangulate(DCEL.from_rings([square])), square)
+	# a sloped wall of points computed on a line, below one apex
+	a, b = (0.1, 0.7), (9.3, 3.1)
+	wall = [(a[0] + i/29*(b[0] - a[0]), a[1] + i/29*(b[1] - a[1])) for i in range(30)]
+	ring = wall + [(3.3, 9.9)]
+	check_triangulation(TriangleSweep.triangulate(DCEL.from_rings([ring])), ring)
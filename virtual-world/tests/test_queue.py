@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+import random
+import pytest
+import polygons
+from tri import DCEL, TriangleSweep, Vertex
+
+def _points(n, seed):
+	r = random.Random(seed)
+	# few distinct coordinates, so that ties in y and in x happen
+	return [Vertex(r.randrange(8), r.randrange(8)) for _ in range(n)]
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pops_highest_first(seed):
+	s = TriangleSweep(DCEL.from_rings([polygons.star(12, seed)]))
+	q = s._q(_points(60, seed))
+	popped = []
+	while q:
+		popped += [q.pop()]
+	# brute force: nothing popped later is higher than what came before
+	for i in range(len(popped)):
+		for j in range(i + 1, len(popped)):
+			assert not s._vxh(popped[j], popped[i])
+
+def test_keeps_every_vertex():
+	s = TriangleSweep(DCEL.from_rings([polygons.star(12, 0)]))
+	points = _points(40, 1)
+	q = s._q(points)
+	assert sorted(map(id, q)) == sorted(map(id, points))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import math
+import os
+import random
+import numpy as np
+import pytest
+import polygons
+from raycast import RayCaster, ring_segments
+import main
+from main import Room
+
+def _first_hit(p, d, segments):
+	# brute force: the ray against every wall
+	norm = math.hypot(*d)
+	dx, dy = d[0]/norm, d[1]/norm
+	best = math.inf
+	for x0, y0, x1, y1 in segments:
+		sx, sy = x1 - x0, y1 - y0
+		den = dx*sy - dy*sx
+		if den == 0:
+			continue
+		ax, ay = x0 - p[0], y0 - p[1]
+		t = (ax*sy - ay*sx)/den
+		u = (ax*dy - ay*dx)/den
+		if t >= 0 and 0 <= u <= 1:
+			best = min(best, t)
+	return best
+
+def _clips(seg, lo, hi):
+	# brute force (Liang-Barsky): whether the segment meets the box
+	t0, t1 = 0, 1
+	for k in range(2):
+		a, d = seg[k], seg[k+2] - seg[k]
+		if d == 0:
+			if not lo[k] <= a <= hi[k]:
+				return False
+			continue
+		s0, s1 = sorted(((lo[k] - a)/d, (hi[k] - a)/d))
+		t0, t1 = max(t0, s0), min(t1, s1)
+	return t0 <= t1
+
+def _rays(rng, n, lo, hi):
+	points = [(rng.uniform(lo, hi), rng.uniform(lo, hi)) for _ in range(n)]
+	directions = []
+	for i in range(n):
+		if i % 10 == 0:
+			# along an axis, where the walk never steps the other way
+			directions += [rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])]
+		else:
+			a = rng.uniform(0, 2*math.pi)
+			s = rng.uniform(0.1, 10)
+			directions += [(s*math.cos(a), s*math.sin(a))]
+	return points, directions
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_cast_matches_brute_force(name):
+	outer, holes = polygons.GENERATORS[name](300, 2)
+	segments = ring_segments([outer] + holes)
+	caster = RayCaster(segments)
+	rng = random.Random(name)
+	xs = segments[:, [0, 2]]
+	ys = segments[:, [1, 3]]
+	lo = min(xs.min(), ys.min()) - 2
+	hi = max(xs.max(), ys.max()) + 2
+	points, directions = _rays(rng, 300, lo, hi)
+	got = caster.cast(points, directions)
+	for i in range(len(points)):
+		want = _first_hit(points[i], directions[i], segments)
+		if math.isinf(want):
+			assert math.isinf(got[i])
+		else:
+			assert abs(got[i] - want) <= 1e-9*max(1, want)
+
+def test_long_walls_fill_only_their_cells():
+	rng = random.Random(3)
+	segments = []
+	for _ in range(40):
+		a = rng.uniform(0, 2*math.pi)
+		x, y = rng.uniform(0, 30), rng.uniform(0, 30)
+		segments += [(x, y, x + 25*math.cos(a), y + 25*math.sin(a))]
+	# and one on a cell border, and one axis-aligned
+	segments += [(0, 0, 30, 30), (0, 10, 30, 10)]
+	caster = RayCaster(segments, cells_per_segment = 10)
+	g = caster.grid
+	tol = 1e-7*g.cell
+	for w in range(len(segments)):
+		for ix in range(g.n[0]):
+			for iy in range(g.n[1]):
+				c = g.index(np.array([ix, iy]))
+				got = w in g.items[g.start[c]:g.start[c+1]]
+				lo = g.lo + np.array([ix, iy])*g.cell
+				if _clips(segments[w], lo + tol, lo + g.cell - tol):
+					assert got
+				elif not _clips(segments[w], lo - tol, lo + g.cell + tol):
+					assert not got
+
+def test_broadcast_and_zero():
+	caster = RayCaster(ring_segments([[(0, 0), (4, 0), (4, 4), (0, 4)]]))
+	r = caster.cast((1, 1), [(1, 0), (0, 1), (-1, 0), (0, 0)])
+	assert r[:3].tolist() == [3, 3, 1] and math.isnan(r[3])
+	# from outside, towards the room and away from it
+	r = caster.cast([(-2, 1), (-2, 1)], [(1, 0), (-1, 0)])
+	assert r[0] == 2 and math.isinf(r[1])
+	with pytest.raises(ValueError):
+		RayCaster(np.zeros((0, 4)))
+
+def test_room_vision():
+	room = Room.from_json(os.path.join(os.path.dirname(main.__file__), 'room3.json'))
+	segments = ring_segments(room._rings())
+	rng = random.Random(1)
+	points, directions = _rays(rng, 100, -4, 4)
+	many = room.vision_many(points, directions)
+	for i in range(len(points)):
+		want = _first_hit(points[i], directions[i], segments)
+		assert room.vision(points[i], directions[i]) == many[i]
+		assert many[i] == pytest.approx(want, rel = 1e-9)
+	with pytest.raises(ValueError):
+		room.vision((0, 0), (0, 0))
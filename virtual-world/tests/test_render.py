@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import os
+import numpy as np
+import pygame
+import pytest
+import polygons
+import vis
+from tri import DCEL, TriangleSweep
+from main import Room
+
+def _to_screen(p, size, fit):
+	# one point at a time, as the loop the batch replaced did
+	scalar, centre = fit
+	return (round((p[0] - centre[0])*scalar + size[0]/2), round(-(p[1] - centre[1])*scalar + size[1]/2))
+
+def test_batch_matches_per_point():
+	outer, holes = polygons.holes(60, 1)
+	size = (400, 300)
+	for scalar in (None, 12):
+		fit = vis._fit([p for ring in [outer] + holes for p in ring], size, scalar)
+		got = vis._batch_to_screen([outer] + holes, size, scalar)
+		for ring, pixels in zip([outer] + holes, got):
+			assert [tuple(p) for p in pixels.tolist()] == [_to_screen(p, size, fit) for p in ring]
+	# fitted, everything is inside the margins
+	pixels = np.vstack(vis._batch_to_screen([outer] + holes, size))
+	assert pixels.min() >= 9 and (pixels.max(0) <= np.array(size) - 9).all()
+
+def test_faces_get_their_colours():
+	d = TriangleSweep.triangulate(DCEL.from_rings([[(0, 0), (8, 0), (8, 6), (4, 3), (0, 6)]]))
+	size = (320, 240)
+	image = vis.to_array(vis.render_DCEL(d, size, shrink = 0, width = 0))
+	assert image.shape == (240, 320, 3) and image.dtype == np.uint8
+	data = d.gen_face_data()
+	fit = vis._fit([(v.x, v.y) for v in d.get_vertices()], size)
+	for f, verts in data["polys"].items():
+		c = (sum(v.x for v in verts)/3, sum(v.y for v in verts)/3)
+		x, y = _to_screen(c, size, fit)
+		assert tuple(image[y, x]) == vis.color_wheel[data["colours"][f] % 4]
+	# outside the polygon, the background
+	x, y = _to_screen((4, 5), size, fit)
+	assert tuple(image[y, x]) == (255, 255, 255)
+
+def test_room_outline(tmp_path):
+	room = Room(shape = [[0, 0], [8, 0], [8, 6], [0, 6]], obstacles = [[[3, 2], [3, 4], [5, 4], [5, 2]]])
+	size = (320, 240)
+	surface = vis.render_room(room, size)
+	image = vis.to_array(surface)
+	fit = vis._fit(room.shape + room.obstacles[0], size)
+	x, y = _to_screen((4, 0), size, fit)
+	assert tuple(image[y, x]) == (255, 0, 0)
+	x, y = _to_screen((3, 3), size, fit)
+	assert tuple(image[y, x]) == (0, 0, 0)
+	x, y = _to_screen((1, 1), size, fit)
+	assert tuple(image[y, x]) == (255, 255, 255)
+	path = str(tmp_path / 'room.png')
+	vis.save_png(surface, path)
+	assert (vis.to_array(pygame.image.load(path)) == image).all()
+
+@pytest.mark.parametrize('name', ['sweep_{stage}.png', 'sweep.png'])
+def test_sweep_stages_to_files(tmp_path, name):
+	outer, holes = polygons.holes(30, 1)
+	TriangleSweep(DCEL.from_rings([outer] + holes)).sweep(visualise = str(tmp_path / name))
+	want = ['sweep_input.png', 'sweep_monotone.png', 'sweep_triangles.png']
+	assert sorted(os.listdir(tmp_path)) == want
+	images = [vis.to_array(pygame.image.load(str(tmp_path / f))) for f in want]
+	assert not (images[0] == images[2]).all()
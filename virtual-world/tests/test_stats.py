@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import cProfile
+from collections import Counter
+import pytest
+import logg
+import polygons
+from tri import DCEL, TriangleSweep, SweepStats
+
+def _crossing(rings, y):
+	# the sides of the rings that cross the horizontal line at y
+	return sum(1 for ring in rings for i in range(len(ring)) if (ring[i-1][1] > y) != (ring[i][1] > y))
+
+@pytest.mark.parametrize('name', sorted(polygons.GENERATORS))
+def test_counts(name):
+	outer, holes = polygons.GENERATORS[name](120, 6)
+	rings = [outer] + holes
+	before = TriangleSweep(DCEL.from_rings(rings))
+	types = Counter(before._vertex_type_of(v) for v in before.D.get_vertices())
+	trace = logg.start_trace()
+	try:
+		s = TriangleSweep(DCEL.from_rings(rings))
+		s.sweep()
+	finally:
+		logg.stop_trace()
+	stats = s.stats
+	n = sum(len(r) for r in rings)
+	assert stats.types == dict((k, types[k]) for k in stats.types)
+	assert sum(stats.types.values()) == n
+	assert stats.diagonals == n - 3 + 3*len(holes)
+	# each partition diagonal splits a piece, or joins a hole to one
+	assert len(stats.monotones) == len(s.queueD) + 1 - len(holes)
+	assert sum(stats.monotones) == n + 2*len(s.queueD)
+	assert stats.sizes() == dict(sorted(Counter(stats.monotones).items()))
+	# the peak, as the trace saw it, and never more than half the
+	# sides on a sweep line (only those with the inside to the right)
+	assert stats.peak_status == max(e[1] for e in trace.events if e[0] == 'status')
+	ys = sorted(set(p[1] for r in rings for p in r))
+	assert stats.peak_status <= max(_crossing(rings, (a + b)/2) for a, b in zip(ys, ys[1:]))/2 + 1
+
+def test_times_and_report():
+	s = TriangleSweep(DCEL.from_rings([polygons.star(200, 1)]))
+	s.sweep()
+	stats = s.stats
+	assert list(stats.times) == list(SweepStats.PHASES)
+	assert all(t >= 0 for t in stats.times.values())
+	assert stats.total == pytest.approx(sum(stats.times.values()))
+	d = stats.as_dict()
+	assert d['monotones'] == len(stats.monotones) and d['diagonals'] == 197
+	text = str(stats)
+	for phase in SweepStats.PHASES:
+		assert phase in text
+	assert stats.profile is None
+
+def test_profile():
+	s = TriangleSweep(DCEL.from_rings([polygons.star(50, 1)]))
+	s.sweep(profile = True)
+	assert isinstance(s.stats.profile, cProfile.Profile)
+	mine = cProfile.Profile()
+	s = TriangleSweep(DCEL.from_rings([polygons.star(50, 1)]))
+	s.sweep(profile = mine)
+	assert s.stats.profile is mine
+	assert any('_handle' in str(e.code) for e in mine.getstats())
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import random
+import pytest
+import polygons
+from tri import DCEL
+from status import EdgeStatus, _x_at
+
+def _crossing(dcel, y):
+	# the edges of the polygon that cross the horizontal line at y
+	r = []
+	for e in dcel.edges:
+		a, b = e.origin, e.next.origin
+		if min(a.y, b.y) < y < max(a.y, b.y):
+			r += [e]
+	return r
+
+def _left_of(edges, p):
+	# brute force: the edge with the largest x left of P
+	left = [e for e in edges if _x_at(e.origin, e.next.origin, p[1]) < p[0]]
+	return max(left, key=lambda e: _x_at(e.origin, e.next.origin, p[1]), default=None)
+
+def _right_of(edges, p):
+	right = [e for e in edges if _x_at(e.origin, e.next.origin, p[1]) > p[0]]
+	return min(right, key=lambda e: _x_at(e.origin, e.next.origin, p[1]), default=None)
+
+@pytest.mark.parametrize('name', ['star', 'spiral', 'comb', 'zigzag'])
+def test_queries_match_a_scan(name):
+	r = random.Random(name)
+	ring = polygons.GENERATORS[name](200, 3)[0]
+	dcel = DCEL.from_rings([ring])
+	ys = sorted(v.y for v in dcel.get_vertices())
+	for _ in range(10):
+		i = r.randrange(len(ys) - 1)
+		y = (ys[i] + ys[i + 1])/2
+		edges = _crossing(dcel, y)
+		if not edges:
+			continue
+		r.shuffle(edges)
+		status = EdgeStatus(seed = r.randrange(100))
+		status.y = y
+		for e in edges:
+			status.insert(e)
+		xs = [_x_at(e.origin, e.next.origin, y) for e in status]
+		assert xs == sorted(xs) and len(status) == len(edges)
+		# drop a few again, as the sweep does
+		for e in edges[:len(edges)//3]:
+			status.remove(e)
+		edges = edges[len(edges)//3:]
+		lo = min(v.x for v in dcel.get_vertices()) - 1
+		hi = max(v.x for v in dcel.get_vertices()) + 1
+		for _ in range(20):
+			p = (r.uniform(lo, hi), y)
+			assert status.left_of(p) is _left_of(edges, p)
+			assert status.right_of(p) is _right_of(edges, p)
+
+def test_neighbours():
+	dcel = DCEL.from_rings([polygons.comb(60, 1)])
+	ys = sorted(v.y for v in dcel.get_vertices())
+	y = (ys[len(ys)//2] + ys[len(ys)//2 + 1])/2
+	status = EdgeStatus()
+	status.y = y
+	for e in _crossing(dcel, y):
+		status.insert(e)
+	order = list(status)
+	assert status.after(None) is order[0] and status.before(None) is order[-1]
+	for i in range(len(order) - 1):
+		assert status.after(order[i]) is order[i + 1]
+		assert status.before(order[i + 1]) is order[i]
+	outside = [e for e in dcel.edges if e not in status]
+	with pytest.raises(KeyError):
+		status.remove(outside[0])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import io
+import math
+import random
+import numpy as np
+import pytest
+import polygons
+import svg
+from tri import DCEL
+
+def _encode(ring, at, rng):
+	"""
+	Path data for a ring, with a random mix of absolute and
+	relative commands, H and V where the points line up, and
+	implicit L's after the M; 'at' is the current point before
+	it. Returns the data and the current point after it.
+	"""
+	if rng.random() < 0.5:
+		d = ['M', repr(ring[0][0]), repr(ring[0][1])]
+	else:
+		d = ['m', repr(ring[0][0] - at[0]), repr(ring[0][1] - at[1])]
+	x, y = ring[0]
+	implicit = rng.random() < 0.5
+	for px, py in ring[1:]:
+		rel = rng.random() < 0.5
+		if py == y and rng.random() < 0.7:
+			d += ['h' if rel else 'H', repr(px - x if rel else px)]
+		elif px == x and rng.random() < 0.7:
+			d += ['v' if rel else 'V', repr(py - y if rel else py)]
+		elif implicit:
+			# numbers after M are lines of the same kind
+			d += [repr(px - x) if d[0] == 'm' else repr(px), repr(py - y) if d[0] == 'm' else repr(py)]
+			x, y = px, py
+			continue
+		else:
+			d += ['l' if rel else 'L', repr(px - x if rel else px), repr(py - y if rel else py)]
+		implicit = False
+		x, y = px, py
+	if rng.random() < 0.5:
+		# Z goes back to the start of the subpath
+		d += ['z']
+		x, y = ring[0]
+	return ' '.join(d), (x, y)
+
+def _matrix(name, v):
+	# the reference: transforms as 3x3 matrices
+	if name == 'translate':
+		return np.array([[1, 0, v[0]], [0, 1, v[1]], [0, 0, 1]])
+	if name == 'scale':
+		return np.array([[v[0], 0, 0], [0, v[1], 0], [0, 0, 1]])
+	a = math.radians(v[0])
+	r = np.array([[math.cos(a), -math.sin(a), 0], [math.sin(a), math.cos(a), 0], [0, 0, 1]])
+	return _matrix('translate', v[1:]) @ r @ _matrix('translate', [-v[1], -v[2]])
+
+def _transform(rng):
+	names = []
+	m = np.eye(3)
+	for _ in range(rng.randrange(3)):
+		name = rng.choice(['translate', 'scale', 'rotate'])
+		v = [rng.uniform(-3, 3), rng.uniform(0.5, 2), rng.uniform(-3, 3)]
+		if name == 'scale':
+			v = v[1:]
+		elif name == 'translate':
+			v = v[::2]
+		names += ['{}({})'.format(name, ' '.join(map(repr, v)))]
+		m = m @ _matrix(name, v)
+	return ' '.join(names), m
+
+@pytest.mark.parametrize('seed', range(20))
+def test_paths_and_transforms(seed):
+	rng = random.Random(seed)
+	# rings on a grid, so H and V come up
+	rings = [[(float(round(x)), float(round(y))) for x, y in polygons.star(8, seed + k)] for k in range(2)]
+	outer, m_outer = _transform(rng)
+	inner, m_inner = _transform(rng)
+	d = []
+	at = (0, 0)
+	for ring in rings:
+		data, at = _encode(ring, at, rng)
+		d += [data]
+	d = ' '.join(d)
+	doc = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="-20 -20 40 40"><g transform="{}">'
+			'<path transform="{}" d="{}"/></g></svg>').format(outer, inner, d)
+	got = list(svg.iter_rings(io.StringIO(doc)))
+	assert len(got) == 1 and len(got[0]) == len(rings)
+	# the viewBox is centred on 0 and y goes up
+	world = np.array([[1, 0, 0], [0, -1, 0], [0, 0, 1]]) @ m_outer @ m_inner
+	for ring, want in zip(got[0], rings):
+		want = [tuple((world @ [x, y, 1])[:2]) for x, y in want]
+		assert np.allclose(ring, want, atol = 1e-9)
+
+def test_write_rings_round_trip(tmp_path):
+	outer, holes = polygons.holes(40, 3)
+	path = str(tmp_path / 'room.svg')
+	svg.write_rings(path, [outer] + holes)
+	got = next(svg.iter_rings(path))
+	assert [list(map(tuple, ring)) for ring in got] == [list(ring) for ring in [outer] + holes]
+	d = DCEL.from_svg(path)
+	assert len(d.get_vertices()) == 40
+
+def test_skips_what_it_cannot_read():
+	doc = ('<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="10mm">'
+			'<path d="M 0 0 C 1 1 2 2 3 3 Z"/><path d="M 0 0 L 1"/>'
+			'<path d="M 1 1 L 1 2"/><path d="M 1 1 L 2 1 L 2 2"/></svg>')
+	got = list(svg.iter_rings(io.StringIO(doc)))
+	assert got == [[[(-4.0, 4.0), (-3.0, 4.0), (-3.0, 3.0)]]]
+	with pytest.raises(ValueError):
+		svg.parse_path('M 0 0 A 1 1 0 0 0 1 1 Z')
+	with pytest.raises(ValueError):
+		svg.parse_transform('rotate(1 2)')
+	with pytest.raises(ValueError):
+		DCEL.from_svg(io.StringIO('<svg xmlns="http://www.w3.org/2000/svg"/>'))
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+import logg
+import polygons
+from tri import DCEL, TriangleSweep
+
+@pytest.fixture
+def trace():
+	t = logg.start_trace()
+	yield t
+	logg.stop_trace()
+
+@pytest.mark.parametrize('size', [1, 5, 64])
+def test_ring_buffer(size):
+	t = logg.Trace(size)
+	kept = []
+	for i in range(40):
+		t.record('status', i)
+		kept += [('status', i)]
+	# the last 'size' events, as a list would keep them
+	assert list(t.events) == kept[-size:]
+	assert t.count == 40 and t.dropped == 40 - min(size, 40)
+	t.clear()
+	assert list(t.events) == [] and t.count == 0
+
+def test_export_load(tmp_path, trace):
+	TriangleSweep.triangulate(DCEL.from_rings([polygons.star(30, 2)]))
+	path = str(tmp_path / 'trace.jsonl')
+	trace.export(path)
+	again = logg.Trace.load(path)
+	assert list(again.events) == list(trace.events)
+
+def test_sweep_events(trace):
+	outer, holes = polygons.holes(80, 3)
+	# the type of every vertex, before the sweep adds diagonals
+	before = TriangleSweep(DCEL.from_rings([outer] + holes))
+	types = dict(((v.x, v.y), before._vertex_type_of(v)) for v in before.D.get_vertices())
+	s = TriangleSweep(DCEL.from_rings([outer] + holes))
+	s.sweep()
+	events = list(trace.events)
+	vertices = [e[1:] for e in events if e[0] == 'vertex']
+	# every vertex once, from the top down, with its type
+	order = sorted(types, key=lambda p: (-p[1], p[0]))
+	assert vertices == [(x, y, types[x, y]) for x, y in order]
+	assert len([e for e in events if e[0] == 'status']) == len(s.vertices)
+	diagonals = [e[1:] for e in events if e[0] == 'diagonal']
+	assert diagonals == [(a.x, a.y, b.x, b.y) for a, b in s.diagonals]
+	monotone = [e[1:] for e in events if e[0] == 'monotone']
+	assert [n for n, d in monotone] == s.stats.monotones
+	assert sum(d for n, d in monotone) + len(s.queueD) == len(s.diagonals)
+
+def test_off_by_default():
+	assert logg.tracing() is None
+	s = TriangleSweep(DCEL.from_rings([polygons.star(30, 2)]))
+	s.sweep()
+	assert s.trace is None
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import pytest
+import polygons
+import tri
+from union import union, to_dcel
+from main import Room
+from checks import check_triangulation
+
+def _winding(p, ring):
+	w = 0
+	for i in range(len(ring)):
+		(ax, ay), (bx, by) = ring[i-1], ring[i]
+		side = (bx - ax)*(p[1] - ay) - (by - ay)*(p[0] - ax)
+		if ay <= p[1] < by and side > 0:
+			w += 1
+		elif by <= p[1] < ay and side < 0:
+			w -= 1
+	return w
+
+def _in_input(p, rings):
+	return sum(_winding(p, ring) for ring in rings) >= 1
+
+def _in_output(p, parts):
+	return any(_winding(p, outer) == 1 and not any(_winding(p, h) for h in holes) for outer, holes in parts)
+
+def _area(parts):
+	return sum(tri.signed_area(outer) + sum(tri.signed_area(h) for h in holes) for outer, holes in parts)
+
+def _shifted(ring, dx, dy):
+	return [(x + dx, y + dy) for x, y in ring]
+
+def _square(x0, y0, x1, y1):
+	return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+CASES = {
+	'stars': [_shifted(polygons.star(20, 1), 0, 0), _shifted(polygons.star(20, 2), 6, 1),
+			_shifted(polygons.star(20, 3), 3, -5)],
+	'shared walls': [_square(0, 0, 2, 2), _square(2, 0, 4, 2), _square(0, 2, 4, 3), _square(4, 1, 5, 3)],
+	'room with hole': [_square(0, 0, 6, 6), _square(2, 2, 4, 4)[::-1], _square(3, 3, 8, 5)],
+	'ring of rooms': [_square(0, 0, 6, 1), _square(5, 0, 6, 6), _square(0, 5, 6, 6), _square(0, 0, 1, 6)],
+	'apart': [_square(0, 0, 1, 1), _square(3, 3, 4, 4)],
+}
+
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_union_matches_winding(case):
+	rings = CASES[case]
+	parts = union(rings)
+	rng = random.Random(case)
+	xs = [p[0] for ring in rings for p in ring]
+	ys = [p[1] for ring in rings for p in ring]
+	box = (min(xs), max(xs), min(ys), max(ys))
+	inside = 0
+	samples = 3000
+	for _ in range(samples):
+		p = (rng.uniform(box[0], box[1]), rng.uniform(box[2], box[3]))
+		want = _in_input(p, rings)
+		assert _in_output(p, parts) == want
+		inside += want
+	# and the area of the parts against the Monte Carlo estimate
+	size = (box[1] - box[0])*(box[3] - box[2])
+	f = inside/samples
+	sigma = size*math.sqrt(f*(1 - f)/samples)
+	assert abs(_area(parts) - size*f) <= 4*sigma + 1e-9
+	for part in parts:
+		check_triangulation(tri.TriangleSweep.triangulate(to_dcel(part)), *part)
+
+def test_part_count():
+	assert len(union(CASES['apart'])) == 2
+	parts = union(CASES['ring of rooms'])
+	assert len(parts) == 1 and len(parts[0][1]) == 1
+	assert _area(parts) == pytest.approx(36 - 16)
+
+def test_room_union():
+	a = Room(name = 'a', shape = _square(0, 0, 4, 4), obstacles = [_square(1, 1, 2, 2)])
+	b = Room(name = 'b', shape = _square(3, 0, 7, 4), obstacles = [_square(5, 1, 6, 3)])
+	c = Room.union([a, b])
+	assert c.name == 'a+b'
+	assert len(c.obstacles) == 2
+	assert sum(tri.signed_area([(c.vertices[i].x, c.vertices[i].y) for i in t]) for t in c.triangles) \
+			== pytest.approx(28 - 1 - 2)
+	with pytest.raises(ValueError):
+		Room.union([a, Room(name = 'far', shape = _square(10, 10, 11, 11))])
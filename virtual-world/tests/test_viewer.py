@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import polygons
+import vis
+from tri import DCEL, TriangleSweep
+
+def _wait_until(test, timeout = 5):
+	end = time.monotonic() + timeout
+	while not test() and time.monotonic() < end:
+		time.sleep(0.01)
+	return test()
+
+def _queued(viewer):
+	r = []
+	while not viewer.queue.empty():
+		r += [viewer.queue.get_nowait()]
+	return r
+
+def test_full_queue_drops_the_oldest():
+	viewer = vis.Viewer((160, 120), fps = 100, maxsize = 8)
+	viewer.pause()
+	try:
+		for i in range(100):
+			viewer.event('step', [(i, i)], str(i))
+		assert viewer.queue.qsize() == 8
+		# the newest eight are left, in order
+		assert [item[3] for item in _queued(viewer)] == [str(i) for i in range(92, 100)]
+	finally:
+		viewer.close()
+		viewer.join(5)
+	assert not viewer._thread.is_alive()
+
+def test_steps_while_paused():
+	viewer = vis.Viewer((160, 120), fps = 100, maxsize = 0)
+	viewer.pause()
+	try:
+		d = TriangleSweep.triangulate(DCEL.from_rings([polygons.star(20)]))
+		for i in range(10):
+			viewer.snapshot(d, str(i))
+		viewer.step(3)
+		assert _wait_until(lambda: viewer.queue.qsize() == 7)
+		time.sleep(0.05)
+		assert viewer.queue.qsize() == 7
+		viewer.resume()
+		assert _wait_until(lambda: viewer.queue.empty())
+	finally:
+		viewer.close()
+		viewer.join(5)
+	# once closed, nothing is queued any more
+	viewer.event('late')
+	assert viewer.queue.empty()
+
+def test_wait_blocks_the_sender():
+	viewer = vis.Viewer((160, 120), fps = 100, maxsize = 4, wait = True)
+	viewer.pause()
+	sender = threading.Thread(target = lambda: [viewer.event('step') for i in range(6)])
+	try:
+		sender.start()
+		assert _wait_until(lambda: viewer.queue.full())
+		time.sleep(0.1)
+		assert sender.is_alive() and viewer.queue.qsize() == 4
+		viewer.step(2)
+		sender.join(5)
+		assert not sender.is_alive()
+	finally:
+		viewer.close()
+		viewer.join(5)
+		sender.join(5)
@@ -1,9 +1,24 @@
 # -*- coding: utf-8 -*-
 
-import xml.etree.ElementTree as ET
+import cProfile
+import functools
+import heapq
+import os
+import random
+import time
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+import numpy as np
 from operator import itemgetter
 import logg
+from predicates import orient, orient_exact, ORIENT_BOUND
+import svg
 import vis
+from status import EdgeStatus
+
+# Bump this whenever the output of the triangulation changes,
+# so cached triangulations are not reused.
+VERSION = 3
 
 def _sld(a, b, p, sign = False):
 	"""
@@ -31,13 +46,243 @@ def _sld(a, b, p, sign = False):
 	v           │        │	_sdl(v1, v2, p) == +0.5
 	A─────────>>B        ┘
 
+	With 'sign' set, it returns only the sign: +1, -1, or 0 if P
+	is on the line. That sign is exact, see predicates.orient, so
+	use it for every decision; the distance is rounded.
 	"""
-	r = (p[0] - b[0])*(a[1] - b[1]) - (p[1] - b[1])*(a[0] - b[0])
 	if sign:
-		if r > 0:	return +1
-		if r < 0:	return -1
+		return orient(a, b, p)
+	return (p[0] - b[0])*(a[1] - b[1]) - (p[1] - b[1])*(a[0] - b[0])
+
+def _vxh_key(p):
+	"""
+	Sort key matching TriangleSweep._vxh: sorting on this key
+	puts the lowest vertex first and the highest vertex last.
+	"""
+	return (p[1], -p[0])
+
+def signed_area(vertices):
+	"""
+	The area of the polygon through the vertices: positive
+	when they wind anti-clockwise, negative when clockwise.
+	"""
+	r = 0
+	for i in range(len(vertices)):
+		a = vertices[i-1]
+		b = vertices[i]
+		r += a[0]*b[1] - b[0]*a[1]
+	return r/2
+
+def _in_corner(e, p):
+	"""
+	True if the segment from the origin of half-edge E to point P
+	starts inside the face left of E: in the corner that turns
+	anti-clockwise from E to the half-edge coming in (E.prev).
+	"""
+	v = e.origin
+	n = e.next.origin
+	w = e.prev.origin
+	after = _sld(v, n, p, sign = True) > 0		# P is left of the outgoing edge
+	before = _sld(w, v, p, sign = True) > 0		# P is left of the incoming edge
+	if _sld(w, v, n, sign = True) > 0:
+		return after and before
 	else:
-		return r
+		return after or before
+
+def _ccw_before(v, base, a, b):
+	"""
+	True if, turning anti-clockwise around V from the direction
+	of BASE, the direction of A comes before the one of B.
+	"""
+	def half(p):
+		s = _sld(v, base, p, sign = True)
+		if s == 0:
+			# on the line through V and BASE: ahead of V or behind it
+			ahead = (p[0] - v[0])*(base[0] - v[0]) + (p[1] - v[1])*(base[1] - v[1]) > 0
+			return 0 if ahead else 1
+		return 0 if s > 0 else 1
+	ha = half(a)
+	hb = half(b)
+	if ha != hb:
+		return ha < hb
+	return _sld(v, a, b, sign = True) > 0
+
+def _find_corner(n, edge_at, p):
+	"""
+	Binary search for the corner the segment to P leaves through,
+	among the N half-edges edge_at(0) .. edge_at(N-1) that start at
+	one vertex, in anti-clockwise order from the wall half-edge
+	edge_at(0). Returns the index of the one whose face corner
+	that is (see _in_corner), or -1.
+	"""
+	if n == 1:
+		return 0
+	first = edge_at(0)
+	v = first.origin
+	base = first.next.origin
+	lo, hi = 0, n
+	# edge_at(lo) turns no further than P, edge_at(hi) further
+	while hi - lo > 1:
+		mid = (lo + hi)//2
+		if _ccw_before(v, base, p, edge_at(mid).next.origin):
+			hi = mid
+		else:
+			lo = mid
+	return lo if _in_corner(edge_at(lo), p) else -1
+
+def _segments_meet(a, b, c, d):
+	"""
+	True if the closed segments AB and CD have a point in common.
+	"""
+	d1 = _sld(c, d, a, sign = True)
+	d2 = _sld(c, d, b, sign = True)
+	d3 = _sld(a, b, c, sign = True)
+	d4 = _sld(a, b, d, sign = True)
+	if d1 == d2 == 0:
+		# collinear: the projections have to overlap
+		return min(a[0], b[0]) <= max(c[0], d[0]) and min(c[0], d[0]) <= max(a[0], b[0]) \
+				and min(a[1], b[1]) <= max(c[1], d[1]) and min(c[1], d[1]) <= max(a[1], b[1])
+	return min(d1, d2) <= 0 <= max(d1, d2) and min(d3, d4) <= 0 <= max(d3, d4)
+
+def _in_ring(p, ring):
+	"""
+	True if point P lies strictly inside the polygon 'ring'
+	(points on its boundary may go either way).
+	"""
+	r = False
+	for i in range(len(ring)):
+		a = ring[i-1]
+		b = ring[i]
+		if (a[1] > p[1]) != (b[1] > p[1]):
+			if p[0] < a[0] + (p[1] - a[1])*(b[0] - a[0])/(b[1] - a[1]):
+				r = not r
+	return r
+
+def _triangle_meets_ring(tri, ring):
+	"""
+	True if the triangle (three points) and the polygon 'ring'
+	overlap or touch.
+	"""
+	for i in range(3):
+		for j in range(len(ring)):
+			if _segments_meet(tri[i-1], tri[i], ring[j-1], ring[j]):
+				return True
+	if _in_ring(tri[0], ring):
+		return True
+	p = ring[0]
+	return _sld(tri[0], tri[1], p, sign = True) >= 0 and _sld(tri[1], tri[2], p, sign = True) >= 0 and _sld(tri[2], tri[0], p, sign = True) >= 0
+
+def _monotone_diagonals(points):
+	"""
+	Triangulates a y-monotone polygon (monotone in the order of
+	TriangleSweep._vxh), given as its points (x, y) in
+	anti-clockwise order. Returns the diagonals as pairs of
+	indices into 'points'.
+
+	Walking anti-clockwise from the top, the left chain runs down
+	to the bottom, and the right chain runs back up: both are
+	sorted already, so the order of the sweep is a merge of the
+	two, and so is the chain of every vertex. This takes O(k)
+	time for k points.
+	"""
+	k = len(points)
+	if k <= 3:
+		return []
+	keys = [(y, -x) for x, y in points]
+	top = keys.index(max(keys))
+	bottom = keys.index(min(keys))
+
+	# walk anti-clockwise from the top: down the left chain to
+	# the bottom, then up the right chain
+	order = list(range(top, k)) + list(range(top))
+	end = (bottom - top) % k
+	left = order[1:end + 1]
+	right = order[:end:-1]
+	# +1 for the left chain, -1 for the right chain (and the top)
+	chain = [-1]*k
+	for i in left:
+		chain[i] = +1
+
+	#1: 'Merge the vertices on the left chain and the vertices on the right chain of P
+	#	into one sequence, sorted on decreasing y-coordinate. If two vertices have
+	#	the same y-coordinate, then the leftmost one comes first.'
+	u = [top]
+	a = b = 0
+	nl = len(left)
+	nr = len(right)
+	while a < nl and b < nr:
+		if keys[left[a]] > keys[right[b]]:
+			u += [left[a]]
+			a += 1
+		else:
+			u += [right[b]]
+			b += 1
+	u += left[a:] + right[b:]
+
+	r = []
+	#2: 'Initialize an empty stack S, and push u_1 and u_2 onto it'
+	S = [u[0], u[1]]
+	#3: 'for j=3 to n−1'
+	for j in range(2, k - 1):
+		uj = u[j]
+		#4: 'do if u_j and the vertex on top of S are on different chains'
+		if chain[S[-1]] != chain[uj]:
+			#5: 'Pop all vertices from S'
+			while len(S) > 1:
+				#6: 'Insert into D a diagonal from u_j to each popped vertex, except the last one'
+				r += [(uj, S.pop())]
+			S.pop()	# the last one
+			#7: 'Push u_j−1 and u_j onto S
+			S += [u[j-1], uj]
+		#8: 'else pop one vertex from S'
+		else:
+			p = S.pop()
+			#9: 'Pop the other vertices from S as long as the diagonals from
+			#	u_j to them are inside P. Insert these diagonals into D. Push
+			#	the last vertex that has been popped back onto S.'
+			while S and orient(points[S[-1]], points[uj], points[p]) == -chain[uj]:
+				p = S.pop()
+				r += [(uj, p)]
+			S += [p]
+			#10: 'Push u_j onto S'
+			S += [uj]
+	#11: 'Add diagonals from u_n to all stack vertices except the first and the last one'
+	un = u[-1]
+	for s in S[1:-1]:
+		r += [(un, s)]
+	return r
+
+def _pack_pieces(pieces):
+	# the arguments of _monotone_batch for a list of pieces
+	xy = array('d')
+	starts = array('i', [0])
+	for m in pieces:
+		for v in m:
+			xy.append(v.x)
+			xy.append(v.y)
+		starts.append(starts[-1] + len(m))
+	return xy, starts
+
+def _monotone_batch(xy, starts):
+	"""
+	_monotone_diagonals of several pieces, packed for a worker
+	process: 'xy' holds the coordinates of all their points, x and
+	y interleaved, and piece i is points starts[i] to starts[i+1].
+	Returns the diagonals of all of them as one array of point
+	indices into 'xy', two per diagonal, and the number of
+	diagonals per piece.
+	"""
+	r = array('i')
+	counts = array('i')
+	for i in range(len(starts) - 1):
+		first = starts[i]
+		points = [(xy[2*j], xy[2*j+1]) for j in range(first, starts[i+1])]
+		d = _monotone_diagonals(points)
+		for a, b in d:
+			r.append(first + a)
+			r.append(first + b)
+		counts.append(len(d))
+	return r, counts
 
 class ConnEdge:
 	"""
@@ -78,72 +323,145 @@ class DCEL:
 	See ConnEdge documentation for more.
 
 	This object also remembers how many faces it handles.
-	This object also remembers the edges.
+	This object also remembers the edges, and where each one is
+	in that list, so taking one out does not need a search.
+	This object also remembers one half-edge per face
+	('face_edge'), so faces can be visited without a search.
 
 	Multiple DCELs will have different objects of
 	ConnEdge, as they are different polygons.
 	"""
 	def from_svg(file_path):
-		root = ET.parse(file_path).getroot()
-		print(list(root))
-		print(root.get("height"))
-		print()
-		path = root.find('{http://www.w3.org/2000/svg}g').find('{http://www.w3.org/2000/svg}path')
-		print(path)
-		
-		height = float(root.get("height")[0:-2])
-		width = float(root.get("width")[0:-2])
-		
-		verts = []
-		raw_coords = path.attrib['d'].split()
-		del raw_coords[0]
-		del raw_coords[-1]
-		for raw_coord in raw_coords:
-			vals = raw_coord.split(",")
-			verts += [Vertex(float(vals[0]) - width/2, height-float(vals[1]) - height/2)]
-		
-		return DCEL(verts)
+		"""
+		The DCEL of the first path in an SVG file.
+		See DCEL.iter_svg; raises a ValueError if there is no path.
+		"""
+		paths = DCEL.iter_svg(file_path)
+		try:
+			return next(paths)
+		except StopIteration:
+			raise ValueError("No path in {}".format(file_path))
+		finally:
+			paths.close()
+
+	def iter_svg(file_path):
+		"""
+		Streams an SVG file and lazily yields one DCEL per path (see
+		svg.iter_rings for what is read). The largest subpath of a
+		path is its outline, the other subpaths are obstacles in it;
+		they are oriented as the DCEL wants them.
+		"""
+		for rings in svg.iter_rings(file_path):
+			yield DCEL.from_rings(rings)
+
+	def from_rings(rings):
+		"""
+		A DCEL of rings of (x, y): the one with the largest area is
+		the outer boundary and the others are holes, in any winding.
+		"""
+		rings = sorted(rings, key=lambda ring: -abs(signed_area(ring)))
+		r = []
+		for ring in rings:
+			ring = list(ring)
+			if (signed_area(ring) > 0) != (len(r) == 0):
+				ring.reverse()
+			r += [Vertex.tuples_to_vertices(ring)]
+		return DCEL(r[0], holes = r[1:])
 	
-	def __init__(self, vertices, update_vertices = True):
+	def __init__(self, vertices, update_vertices = True, holes = ()):
+		"""
+		The vertices are the outer boundary, anti-clockwise.
+		Every ring in 'holes' is the boundary of an obstacle,
+		clockwise, so the inside of the polygon is always
+		to the left of a half-edge. All rings start out in face 0.
+		"""
 		self.faces = 1
 		self.edges = []
-		for vertex in vertices:
-			self.edges += [ConnEdge(vertex, 0, None, None, None)]
-		for i in range(len(self.edges)):
-			e = self.edges[i]
-			e.next = self.edges[ (i+1) % len(self.edges) ]
-			e.prev = self.edges[ (i-1) % len(self.edges) ]
+		# the index of every half-edge in self.edges
+		self._where = {}
+		# Per vertex, the half-edges that start there, anti-clockwise
+		# from its wall half-edge (see _find_corner). The keys double
+		# as the registry of vertices, in the order they were given.
+		self.incident = {}
+		for ring in [vertices] + list(holes):
+			ring_edges = []
+			for vertex in ring:
+				ring_edges += [ConnEdge(vertex, 0, None, None, None)]
+				self.incident[vertex] = [ring_edges[-1]]
+			for i in range(len(ring_edges)):
+				e = ring_edges[i]
+				e.next = ring_edges[ (i+1) % len(ring_edges) ]
+				e.prev = ring_edges[ (i-1) % len(ring_edges) ]
+			self._add_edges(ring_edges)
 
 		if update_vertices:
 			for e in self.edges:
 				e.origin.e = e	# Cool syntax bro
-
-	def insert(self, src, tgt):
-		starters = []			# All edges that start at the source
-		enders = []				# All edges that start at the target
+		self._index_faces()
+
+	def _add_edges(self, edges):
+		for e in edges:
+			self._where[e] = len(self.edges)
+			self.edges += [e]
+
+	def _drop_edge(self, e):
+		# the last half-edge takes the place of E, so this is O(1)
+		i = self._where.pop(e)
+		last = self.edges.pop()
+		if last is not e:
+			self.edges[i] = last
+			self._where[last] = i
+
+	def _index_faces(self):
+		"""
+		Sets face_edge from scratch: per face label, its first
+		half-edge in self.edges. Insert and remove keep it up to
+		date after that.
+		"""
+		self.face_edge = {}
 		for e in self.edges:
-			if e.origin is src:
-				starters += [e]
-			elif e.origin is tgt:
-				enders += [e]
-
-		# If starter and ender dont have the same face,
-		# it means the diagonal cuts through multiple
-		# faces. This is not handled, and returns a ValueError
-		se_pair = None
-		face = None
-		for starter in starters:
-			for ender in enders:
-				if starter.face == ender.face:
-					se_pair = (starter, ender)
-					face = starter.face
-		if not se_pair:
+			if e.face not in self.face_edge:
+				self.face_edge[e.face] = e
+
+	def _corner(self, v, p):
+		"""
+		The index in incident[V] of the half-edge whose face corner
+		at V the segment from V to P leaves through, or -1. This
+		is a binary search, so a fan of diagonals stays cheap.
+		"""
+		edges = self.incident.get(v, [])
+		if not edges:
+			return -1
+		return _find_corner(len(edges), edges.__getitem__, p)
+
+	def _order_incident(self, v):
+		# puts incident[v] back in order after appending to it
+		edges = self.incident[v]
+		base = edges[0].next.origin
+		before = lambda a, b: -1 if _ccw_before(v, base, a.next.origin, b.next.origin) else 1
+		edges[1:] = sorted(edges[1:], key = functools.cmp_to_key(before))
+
+	def _link(self, src, tgt):
+		"""
+		Links the two half-edges of the diagonal from src to tgt
+		into the boundary cycles, and returns them (src -> tgt,
+		tgt -> src). Both still carry the face label of the corner
+		at src: faces are for the caller to update.
+		"""
+		# The diagonal leaves src through one corner of a face and
+		# arrives at tgt through another one. If there is no such
+		# pair, the diagonal is not inside the polygon. This is not
+		# handled, and returns a ValueError
+		i = self._corner(src, tgt)
+		j = self._corner(tgt, src)
+		if i == -1 or j == -1:
 			raise ValueError("Cannot find a starter/ender-pair on the same face")
+		starter = self.incident[src][i]
+		ender = self.incident[tgt][j]
 
 		# Cool syntax bro
-		new_face = self.new_face()
-		left_edge = ConnEdge(src, face, None, se_pair[0].prev, se_pair[1])
-		right_edge = ConnEdge(tgt, new_face, None, se_pair[1].prev, se_pair[0])
+		left_edge = ConnEdge(src, starter.face, None, starter.prev, ender)
+		right_edge = ConnEdge(tgt, starter.face, None, ender.prev, starter)
 		left_edge.twin = right_edge
 		right_edge.twin = left_edge
 
@@ -152,80 +470,495 @@ class DCEL:
 		right_edge.prev.next = right_edge
 		right_edge.next.prev = right_edge
 
-		# Update the new face
-		e = right_edge.next
-		while e is not right_edge:
-			e.face = new_face
-			e = e.next
+		self._add_edges([left_edge, right_edge])
+		# each turns anti-clockwise right after the corner it splits
+		self.incident[src].insert(i + 1, left_edge)
+		self.incident[tgt].insert(j + 1, right_edge)
+		return left_edge, right_edge
 
-		self.edges += [left_edge]
-		self.edges += [right_edge]
+	def insert(self, src, tgt):
+		"""
+		Inserts the diagonal from src to tgt. Only the smaller of the
+		two sides it splits a face into is relabelled, with a new
+		face: both are walked in lockstep until one of them is done,
+		so this takes time in the size of that side, not the face.
+		If the diagonal joins two boundaries (an obstacle to what
+		surrounds it) instead of splitting a face, the walks run
+		into the new half-edges the other way round, and the
+		smaller boundary takes the label of the other one.
+		"""
+		left_edge, right_edge = self._link(src, tgt)
+		a = right_edge.next
+		b = left_edge.next
+		while True:
+			if a is right_edge or a is left_edge:
+				first, stop = right_edge, a
+				break
+			if b is left_edge or b is right_edge:
+				first, stop = left_edge, b
+				break
+			a = a.next
+			b = b.next
+
+		if stop is first:
+			# split: the small side gets a new face
+			old_face = first.face
+			face = self.new_face()
+			self.face_edge[old_face] = first.twin
+		else:
+			# joined: the small boundary takes the label of the
+			# other one, so the new half-edges and it are relabelled
+			old_face = first.next.face
+			face = first.twin.next.face
+			left_edge.face = right_edge.face = face
+		e = first
+		while True:
+			e.face = face
+			e = e.next
+			if e is stop:
+				break
+		self.face_edge[face] = first
+		if old_face in self.face_edge and self.face_edge[old_face].face != old_face:
+			# joined: what is left of the old face is not walkable
+			del self.face_edge[old_face]
+
+	def insert_many(self, diagonals):
+		"""
+		Inserts the diagonals, pairs (src, tgt), as insert does one
+		after another, but updates the faces once at the end: every
+		cycle through a new half-edge is walked once, instead of
+		once per diagonal that splits it. One of the pieces of a
+		face keeps its label, the others get new ones. Returns the
+		labels of the faces through the new half-edges.
+		"""
+		new = []
+		for src, tgt in diagonals:
+			new += self._link(src, tgt)
+
+		claimed = set()
+		old = set()
+		seen = set()
+		for e0 in new:
+			if e0 in seen:
+				continue
+			f = e0.face
+			if f in claimed:
+				f = self.new_face()
+			claimed.add(f)
+			self.face_edge[f] = e0
+			e = e0
+			while True:
+				seen.add(e)
+				old.add(e.face)
+				e.face = f
+				e = e.next
+				if e is e0:
+					break
+		for f in old - claimed:
+			# joined into another face
+			self.face_edge.pop(f, None)
+		return list(claimed)
+
+	def insert_triangles(self, triangles):
+		"""
+		Splits the faces into the given triangles, triples of
+		vertices anti-clockwise, such as a triangulation of this
+		DCEL read back from a cache. Nothing is checked or
+		searched: the half-edges along a triangle's sides are
+		the ones already there, or new ones twinned by their
+		endpoints, so this takes linear time. Returns the face
+		label of every triangle, in order.
+		"""
+		sides = {}
+		for e in self.edges:
+			sides[(e.origin, e.next.origin)] = e
+		claimed = set()
+		old = set()
+		labels = []
+		grown = set()
+		for t in triangles:
+			cycle = []
+			for i in range(3):
+				src, tgt = t[i], t[(i+1) % 3]
+				e = sides.get((src, tgt))
+				if e is None:
+					e = ConnEdge(src, None, None, None, None)
+					twin = sides.get((tgt, src))
+					if twin is not None:
+						e.twin = twin
+						twin.twin = e
+					sides[(src, tgt)] = e
+					self._add_edges([e])
+					self.incident[src] += [e]
+					grown.add(src)
+				else:
+					old.add(e.face)
+				cycle += [e]
+			# the first triangle on a wall of a face keeps its label
+			f = None
+			for e in cycle:
+				if e.face is not None and e.face not in claimed:
+					f = e.face
+					break
+			if f is None:
+				f = self.new_face()
+			claimed.add(f)
+			for i in range(3):
+				cycle[i].face = f
+				cycle[i].next = cycle[(i+1) % 3]
+				cycle[i].prev = cycle[(i-1) % 3]
+			self.face_edge[f] = cycle[0]
+			labels += [f]
+		for v in grown:
+			self._order_incident(v)
+		for f in old - claimed:
+			self.face_edge.pop(f, None)
+		return labels
 
 	def new_face(self):
 		self.faces += 1
 		return self.faces - 1
 
-	def gen_face_data(self, q=["faces","colours"]):
-		l = logg.get("DCEL")
+	def _face_cycles(self):
+		"""
+		Per face in face_edge: its label, the origins of its
+		half-edges in order and, per half-edge, the label of the
+		face across it (None on a wall).
+		"""
+		for f, e0 in self.face_edge.items():
+			verts = []
+			across = []
+			e = e0
+			while True:
+				verts += [e.origin]
+				across += [e.twin.face if e.twin is not None else None]
+				e = e.next
+				if e is e0:
+					break
+			yield f, verts, across
+
+	def gen_face_data(self, q=("faces", "network", "colours")):
+		"""
+		Data per face label, for what the query 'q' asks:
+			"faces"		"polys": the vertices of the face, in order
+			"network"	"network": the set of neighbouring faces
+			"colours"	"colours": a colour 0, 1, 2, ... such that
+						neighbours differ (greedy; at most 4 for
+						a triangulation)
+		Every half-edge is visited once, from face_edge: O(E).
+		"""
 		data = {}
-
+		network = {}
+		polygons = {}
+		links = "network" in q or "colours" in q
+		for f, verts, across in self._face_cycles():
+			if "faces" in q:
+				polygons[f] = verts
+			if links:
+				network[f] = set(g for g in across if g is not None and g != f)
 		if "faces" in q:
-			data["network"] = {}
-			polygons = {}
-			roots = [self.edges[0]]
-			Sf = [self.edges[0].face]
-			#per polygon
-			while roots:
-				e0 = roots.pop()
-				e = e0.next
-				verts = [e0.origin]
-				data["network"][e.face] = []
-				#per edge
-				while e != e0:
-					if e.twin != None:
-						data["network"][e.face] += [e.twin.face]
-						if e.twin.face not in Sf:
-							roots += [e.twin]
-							Sf += [e.twin.face]
-					verts += [e.origin]
-					e = e.next
-				if e.twin != None:
-					data["network"][e.face] += [e.twin.face]
-				polygons[e.face] = verts
-				Sf.remove(e.face)
 			data["polys"] = polygons
+		if "network" in q:
+			data["network"] = network
 
 		if "colours" in q:
-			if "faces" not in q:
-				l.warning("Cannot generate data for DCEL colours if faces are not generated!")
-			else:
-				data["colours"] = {}
+			colours = {}
+			for f in network:
+				used = set(colours[g] for g in network[f] if g in colours)
 				c = 0
-				for face in data["network"].keys():
-					potentialis = [0,1,2,3]
-					# check neighbors
-					for n in data["network"][face]:
-						if n in data["colours"]:
-							potentialis.remove(data["colours"][n])
-					data["colours"][face] = potentialis[c % len(potentialis)]
-					c+=1
+				while c in used:
+					c += 1
+				colours[f] = c
+			data["colours"] = colours
 		return data
 
 	def get_vertices(self):
+		return list(self.incident)
+
+	def _corners(self):
+		"""
+		Per vertex, in the order of get_vertices: its coordinates and
+		those of the vertices before and after it (through its 'e'),
+		as an array of shape (6, n): x, y, prev x, prev y, next x,
+		next y. The dtype is whatever numpy makes of the coordinates.
+		"""
 		r = []
-		for edge in self.edges:
-			if not edge.origin in r:
-				r += [edge.origin]
-		return r
+		for v in self.incident:
+			e = v.e
+			p = e.prev.origin
+			n = e.next.origin
+			r += [(v.x, v.y, p.x, p.y, n.x, n.y)]
+		return np.array(r).reshape(-1, 6).T
+
+	def remove(self, edge):
+		"""
+		Removes a diagonal (EDGE and its twin) that was added with
+		insert. The faces on both sides become one, with the label
+		of the face left of EDGE.
+		"""
+		self._unlink(edge)
+		self.face_edge.pop(edge.twin.face, None)
+		self.face_edge[edge.face] = edge.prev
+		e = edge.prev.next
+		stop = e
+		while True:
+			e.face = edge.face
+			e = e.next
+			if e is stop:
+				break
+
+	def _unlink(self, edge):
+		"""
+		Takes EDGE and its twin out of the DCEL without touching any
+		face labels. Boundary edges (without a twin) cannot be removed.
+		"""
+		twin = edge.twin
+		if twin is None:
+			raise ValueError("Only diagonals can be removed, {} is on a boundary".format(edge))
+		edge.prev.next = twin.next
+		twin.next.prev = edge.prev
+		twin.prev.next = edge.next
+		edge.next.prev = twin.prev
+		self.incident[edge.origin].remove(edge)
+		self.incident[twin.origin].remove(twin)
+		self._drop_edge(edge)
+		self._drop_edge(twin)
+
+	def locate_face(self, p, hint = None):
+		"""
+		A half-edge of the triangle that contains point P, or None
+		if P is outside. Walks from the triangle of the half-edge
+		'hint' towards P, so a close hint makes this cheap; without
+		one, it starts from the closest of a few random half-edges
+		(jump and walk). When an obstacle blocks the walk, it goes
+		around it, through the open edges closest to P first. All
+		faces have to be triangles.
+		"""
+		rng = random.Random(len(self.edges))
+		e = hint
+		if e is None:
+			best = None
+			for _ in range(int(len(self.edges)**(1/3)) + 1):
+				f = rng.choice(self.edges)
+				d = (f.origin.x - p[0])**2 + (f.origin.y - p[1])**2
+				if best is None or d < best:
+					e, best = f, d
+		for _ in range(len(self.edges)):
+			edges = [e, e.next, e.next.next]
+			away = [f for f in edges if _sld(f.origin, f.next.origin, p, sign = True) < 0]
+			if not away:
+				return e
+			away = [f for f in away if f.twin is not None]
+			if not away:
+				break
+			# a stochastic walk: a random step, so it never cycles
+			e = rng.choice(away).twin
+
+		# best first, by the distance from P to the middle of the
+		# edge crossed; it only runs out if P is not in the polygon
+		heap = [(0, 0, e)]
+		seen = {e.face}
+		while heap:
+			_, _, e = heapq.heappop(heap)
+			edges = [e, e.next, e.next.next]
+			if all(_sld(f.origin, f.next.origin, p, sign = True) >= 0 for f in edges):
+				return e
+			for f in edges:
+				if f.twin is not None and f.twin.face not in seen:
+					seen.add(f.twin.face)
+					dx = (f.origin.x + f.next.origin.x)/2 - p[0]
+					dy = (f.origin.y + f.next.origin.y)/2 - p[1]
+					heapq.heappush(heap, (dx*dx + dy*dy, len(seen), f.twin))
+		return None
+
+	def _cavity(self, faces, vertices):
+		"""
+		Grows the set of triangles 'faces' (face label -> a half-edge)
+		until their union has no pinched vertex: a vertex around which
+		the triangles of the set form more than one fan. Every vertex
+		is on a wall, so adding all triangles around such a vertex
+		merges its fans. 'vertices' are the vertices to look at.
+		"""
+		todo = list(vertices)
+		while todo:
+			v = todo.pop()
+			fans = 0
+			for e in self.incident[v]:
+				if e.face in faces and (e.twin is None or e.twin.face not in faces):
+					fans += 1
+			if fans > 1:
+				for e in self.incident[v]:
+					if e.face not in faces:
+						faces[e.face] = e
+						todo += [e.next.origin, e.next.next.origin]
+		return faces
+
+	def _retriangulate(self, faces, ring = (), drop = ()):
+		"""
+		Removes the diagonals between the triangles 'faces' (face
+		label -> a half-edge of it) and triangulates the hole this
+		leaves again, with the new boundary 'ring' (clockwise
+		ConnEdges) added to it and the boundary edges 'drop' taken
+		out. The sweep runs on copies of the vertices of the hole
+		only, and its diagonals are then inserted here. Returns the
+		labels of the new triangles.
+		"""
+		edges = []
+		for e in faces.values():
+			edges += [e, e.next, e.next.next]
+		gone = set()
+		for e in edges:
+			if e.twin is not None and e.twin.face in faces and id(e) not in gone:
+				gone.update([id(e), id(e.twin)])
+				self._unlink(e)
+		for e in drop:
+			gone.add(id(e))
+			del self.incident[e.origin]
+			self._drop_edge(e)
+
+		# what is left are the boundaries of the hole
+		for f in faces:
+			self.face_edge.pop(f, None)
+		face = self.new_face()
+		rings = []
+		copies = {}
+		for e in edges + list(ring):
+			if id(e) in gone:
+				continue
+			first = e
+			cycle = []
+			while id(e) not in gone:
+				gone.add(id(e))
+				e.face = face
+				cycle += [Vertex(e.origin.x, e.origin.y)]
+				copies[cycle[-1]] = e.origin
+				e = e.next
+			rings += [cycle]
+			if signed_area(cycle) > 0:
+				self.face_edge[face] = first
+		outer = [r for r in rings if signed_area(r) > 0]
+		if len(outer) != 1:
+			raise ValueError("The hole to triangulate has {} outer boundaries".format(len(outer)))
+		holes = [r for r in rings if r is not outer[0]]
+
+		sweep = TriangleSweep(DCEL(outer[0], holes = holes))
+		sweep.sweep()
+		# with no diagonals, the hole was a triangle already
+		return self.insert_many([(copies[a], copies[b]) for a, b in sweep.diagonals]) or [face]
+
+	def add_ring(self, vertices, hint = None):
+		"""
+		Adds an obstacle to a triangulated DCEL and triangulates
+		only the triangles it overlaps (plus a few around them).
+		The obstacle must lie strictly inside free space; it is
+		oriented clockwise here. Returns the labels of the faces
+		this removed and of those it created, as two lists, so
+		what is kept per face can be updated for just those.
+		'hint' is a half-edge near it, see locate_face.
+
+		Raises a ValueError if it is outside or touches a wall.
+		"""
+		vertices = list(vertices)
+		if signed_area(vertices) > 0:
+			vertices.reverse()
+		seed = self.locate_face(vertices[0], hint)
+		if seed is None:
+			raise ValueError("The obstacle starts outside the polygon, at {}".format(vertices[0]))
+
+		# flood the triangles the obstacle overlaps
+		faces = {seed.face: seed}
+		touched = set()
+		todo = [seed]
+		while todo:
+			e0 = todo.pop()
+			for e in [e0, e0.next, e0.next.next]:
+				touched.add(e.origin)
+				if e.twin is None:
+					for i in range(len(vertices)):
+						if _segments_meet(e.origin, e.next.origin, vertices[i-1], vertices[i]):
+							raise ValueError("The obstacle crosses the wall from {} to {}".format(e.origin, e.next.origin))
+				elif e.twin.face not in faces:
+					t = e.twin
+					if _triangle_meets_ring([t.origin, t.next.origin, t.next.next.origin], vertices):
+						faces[t.face] = t
+						todo += [t]
+		for v in touched:
+			if _in_ring(v, vertices):
+				raise ValueError("The obstacle covers the wall vertex {}".format(v))
+		self._cavity(faces, touched)
+
+		ring = []
+		for vertex in vertices:
+			ring += [ConnEdge(vertex, None, None, None, None)]
+			self.incident[vertex] = [ring[-1]]
+			vertex.e = ring[-1]
+		for i in range(len(ring)):
+			ring[i].next = ring[(i+1) % len(ring)]
+			ring[i].prev = ring[i-1]
+		self._add_edges(ring)
+		return list(faces), self._retriangulate(faces, ring)
+
+	def remove_ring(self, vertex):
+		"""
+		Removes the obstacle that VERTEX is on from a triangulated
+		DCEL, and triangulates only the triangles around it again.
+		Returns the labels of the faces removed and created, as
+		add_ring does.
+		"""
+		# the boundary edge of each vertex is vertex.e, and
+		# diagonals may follow it in the face, so step by vertex
+		ring = [vertex.e]
+		while ring[-1].next.origin is not vertex:
+			ring += [ring[-1].next.origin.e]
+		if any(e is self.edges[0] for e in ring):
+			raise ValueError("The outer boundary cannot be removed")
+		# every diagonal at the obstacle is between two of these
+		# triangles, so once they are gone the obstacle is a cycle
+		# of its own, and can be dropped
+		faces = {}
+		touched = set()
+		for e0 in ring:
+			for e in self.incident[e0.origin]:
+				if e.face not in faces:
+					faces[e.face] = e
+					touched.update([e.next.origin, e.next.next.origin])
+		self._cavity(faces, touched)
+		return list(faces), self._retriangulate(faces, drop = ring)
+
+	def move_ring(self, vertex, vertices):
+		"""
+		Moves the obstacle that VERTEX is on to 'vertices': it is
+		removed, then added again. Returns the labels of the faces
+		removed and created, as add_ring does, over both steps.
+		If it cannot go there, it stays where it was.
+		"""
+		old = [vertex]
+		while old[-1].e.next.origin is not vertex:
+			old += [old[-1].e.next.origin]
+		removed, created = self.remove_ring(vertex)
+		near = self.face_edge[created[0]]
+		try:
+			gone, new = self.add_ring(vertices, near)
+		except ValueError:
+			self.add_ring(old, near)
+			raise
+		gone = set(gone)
+		return removed + [f for f in gone if f not in created], [f for f in created if f not in gone] + new
 
 	def __str__(self):
 		return "A DCEL containing: {}".format(self.edges)
 
+def _coord(c):
+	# numpy scalars as the Python number they hold: the predicates
+	# filter floats with the error bound of a float64, and take
+	# ints and Fractions as exact
+	return c.item() if isinstance(c, np.generic) else c
+
 class Vertex:
 	def tuples_to_vertices(tuples):
 		r = []
 		for t in tuples:
-			r += [Vertex(t[0], t[1])]
+			r += [Vertex(_coord(t[0]), _coord(t[1]))]
 		return r
 
 	def vertices_to_tuples(vertices, whole = False):
@@ -274,6 +1007,73 @@ class Vertex:
 	def __repr__(self):
 		return "Vertex({}, {})".format(self.x, self.y)
 
+class SweepStats:
+	"""
+	What one TriangleSweep.sweep did and where its time went.
+
+	'times' maps each phase to its wall time in seconds, in the
+	order they run:
+
+		queue		sorting the vertices (_q)
+		classify	the type of every vertex (_classify)
+		handle		the rest of the handlers: status and helpers
+		insert		DCEL.insert of the partition diagonals (queueD)
+		faces		gen_face_data, to find the monotone pieces
+		monotone	_monotone_triangulation of every piece
+		triangles	DCEL.insert of the diagonals of the pieces
+
+	'types' counts the vertices of each type, 'peak_status' is the
+	most edges T held at once, 'diagonals' the number of diagonals
+	inserted and 'monotones' the size of every monotone piece. If
+	the sweep was profiled, 'profile' is the profiler.
+	"""
+	PHASES = ('queue', 'classify', 'handle', 'insert', 'faces', 'monotone', 'triangles')
+
+	def __init__(self):
+		self.times = dict.fromkeys(SweepStats.PHASES, 0.0)
+		self.types = dict.fromkeys(('start', 'split', 'end', 'merge', 'regular'), 0)
+		self.peak_status = 0
+		self.diagonals = 0
+		self.monotones = []
+		self.profile = None
+
+	@property
+	def total(self):
+		return sum(self.times.values())
+
+	def sizes(self):
+		"""
+		The distribution of monotone sizes: a dict from the number
+		of vertices to the number of pieces that have it.
+		"""
+		r = {}
+		for k in sorted(self.monotones):
+			r[k] = r.get(k, 0) + 1
+		return r
+
+	def as_dict(self):
+		return {
+			'times': dict(self.times),
+			'total': self.total,
+			'types': dict(self.types),
+			'peak_status': self.peak_status,
+			'diagonals': self.diagonals,
+			'monotones': len(self.monotones),
+			'sizes': self.sizes(),
+		}
+
+	def __str__(self):
+		total = self.total or 1
+		lines = ["{:<10}{:10.6f} s {:5.1f}%".format(k, t, 100*t/total) for k, t in self.times.items()]
+		lines += ["{:<10}{:10.6f} s".format("total", self.total)]
+		lines += ["vertices  " + ", ".join("{} {}".format(n, k) for k, n in self.types.items())]
+		lines += ["status    peak {}".format(self.peak_status)]
+		lines += ["diagonals {}".format(self.diagonals)]
+		if self.monotones:
+			m = sorted(self.monotones)
+			lines += ["monotones {} of {} to {} vertices, median {}".format(len(m), m[0], m[-1], m[len(m)//2])]
+		return "\n".join(lines)
+
 class TriangleSweep:
 	def triangulate(dcel, visualise = False):
 		r = TriangleSweep(dcel)
@@ -282,7 +1082,6 @@ class TriangleSweep:
 	def __init__(self, dcel):
 		self.D = dcel
 		self.l = logg.get("TRI")
-		self._l = logg.get("~TRI~")
 
 	def _vxh(self, p, q):
 		"""
@@ -298,6 +1097,10 @@ class TriangleSweep:
 		"""
 		Priority Queue
 
+		The order is the one of _vxh, but built with a single
+		key sort instead of comparing every pair: a vertex with
+		a lower y (or the same y and a higher x) sorts first.
+
 		Args:
 			vertices (list of lists of 2: [[a,b],[c,d]])
 		Returns:
@@ -305,32 +1108,55 @@ class TriangleSweep:
 			compatible with list.pop() (First pop is highest priority).
 
 		"""
-		q = []
+		return sorted(vertices, key=_vxh_key)
 
-		for vertex in vertices:
-			if not q:
-				q += [vertex]
-			else:
-				inserted = False
-				for entry in q:
-					if not inserted and not self._vxh(vertex, entry):
-						q.insert(q.index(entry), vertex)
-						inserted = True
-				if not inserted:
-					q += [vertex]
+	# the vertex types, by their code in _classify
+	TYPES = ('start', 'split', 'end', 'merge', 'regular')
 
-		return q
+	def _classify(self):
+		"""
+		Sets self.types, the type of every vertex of D, in one pass
+		over the arrays of D._corners. The convexity test is the
+		float determinant of predicates.orient with its error bound;
+		the few vertices within the bound are decided exactly.
+		Coordinates that are not floats (or ints that floats hold
+		exactly) go through _vertex_type_of one by one instead.
+		"""
+		c = self.D._corners()
+		if c.dtype.kind not in 'fiu' or (c.dtype.kind != 'f' and c.size and np.abs(c).max() >= 2**53):
+			self.types = {v: self._vertex_type_of(v) for v in self.vertices}
+			return
+		x, y, px, py, nx, ny = c.astype(np.float64)
+		above_prev = (y > py) | ((y == py) & (x < px))
+		above_next = (y > ny) | ((y == ny) & (x < nx))
+		# orient(prev, vertex, next) > 0: the interior angle is below pi
+		left = (px - nx)*(y - ny)
+		right = (py - ny)*(x - nx)
+		det = left - right
+		bound = ORIENT_BOUND*(np.abs(left) + np.abs(right))
+		convex = det > bound
+		for i in np.flatnonzero(np.abs(det) <= bound).tolist():
+			convex[i] = orient_exact(px[i], py[i], x[i], y[i], nx[i], ny[i]) > 0
+		code = np.where(above_prev & above_next, np.where(convex, 0, 1),
+				np.where(~above_prev & ~above_next, np.where(convex, 2, 3), 4))
+		names = TriangleSweep.TYPES
+		self.types = dict(zip(self.vertices, [names[k] for k in code.tolist()]))
 
 	def _vertex_type(self, vertex):
+		return self.types[vertex]
+
+	def _vertex_type_of(self, vertex):
 		above_prev = self._vxh(vertex, vertex.prev())
 		above_next = self._vxh(vertex, vertex.next())
+		# the interior angle is below pi if the next vertex is left of prev -> vertex
+		convex = _sld(vertex.prev(), vertex, vertex.next(), sign = True) > 0
 		if above_prev and above_next:
-			if vertex.prev().x >= vertex.next().x:
+			if convex:
 				return "start"
 			else:
 				return "split"
 		elif not above_prev and not above_next:
-			if vertex.prev().x <= vertex.next().x:
+			if convex:
 				return "end"
 			else:
 				return "merge"
@@ -338,46 +1164,37 @@ class TriangleSweep:
 			return "regular"
 
 	def _handle(self, vertex):
-		t = self._vertex_type(vertex)
-
-		self.l.debug("Handling\t%-52s%-18s", str(vertex), t)
+		t = self.types[vertex]
+		self.stats.types[t] += 1
+		if self.trace is not None:
+			self.trace.record("vertex", vertex.x, vertex.y, t)
 
+		self.T.y = vertex.y
 		m = getattr(self, "_handle_"+t)
 		m(vertex)
 
 	def _handle_start(self, vertex):
 		#1: 'Insert e_i in T and set helper(e_i) to v_i'
-		self.T += [vertex]
+		self.T.insert(vertex.e)
 		vertex.e.helper = vertex
 
 	def _handle_end(self, vertex):
 		#1: 'if helper(e_i-1) is a merge vertex'
-		if self._vertex_type(vertex.prev()) == "merge":
+		if self._vertex_type(vertex.prev().help()) == "merge":
 			#2: 'then Insert the diagonal connecting v_i to helper(e_i-1) in D'
 			self.queueD += [(vertex, vertex.prev().help())]
 		#3: 'Delete e_i-1 from T'
-		self.T.remove(vertex.prev())
+		self.T.remove(vertex.prev().e)
 
 	def _handle_split(self, vertex):
 		#1: 'Search in T to find the edge e_j directly left of v_i'
-		left_edge = None
-		left_edge_xt = float('inf')
-		for v in self.T: # TODO: T should contain only edges, not vertices
-			edge = v.e
-			if (edge.origin.y >= vertex.y and edge.next.origin.y <= vertex.y) \
-					or (edge.origin.y <= vertex.y and edge.next.origin.y >= vertex.y):
-				xt = ((vertex.y-edge.origin.y)/(edge.next.origin.y-edge.origin.y)) \
-						*(edge.next.origin.x-edge.origin.x)+edge.origin.x
-				if xt < vertex.x and xt < left_edge_xt:
-					# Found it ~!
-					left_edge_xt = xt
-					left_edge = edge
+		left_edge = self.T.left_of(vertex)
 		#2: 'Insert the diagonal connecting v_i to helper(e_j) in D'
 		self.queueD += [(vertex, left_edge.helper)]
 		#3: 'helper(e_j) = v_i'
 		left_edge.helper = vertex
 		#4: 'Insert e_i in T and set helper(e_i) to v_i'
-		self.T += [vertex]
+		self.T.insert(vertex.e)
 		vertex.e.helper = vertex
 
 	def _handle_merge(self, vertex):
@@ -386,20 +1203,9 @@ class TriangleSweep:
 			#2: 'then Insert the diagonal connecting v_i to helper(e_i-1) in D'
 			self.queueD += [(vertex, vertex.prev().help())]
 		#3: 'Delete e_i-1 from T'
-		self.T.remove(vertex.prev())
+		self.T.remove(vertex.prev().e)
 		#4: 'Search in T to find the edge e_j directly left of v_i'
-		left_edge = None
-		left_edge_xt = float('inf')
-		for v in self.T: # TODO: T should contain only edges, not vertices
-			edge = v.e
-			if (edge.origin.y >= vertex.y and edge.next.origin.y <= vertex.y) \
-					or (edge.origin.y <= vertex.y and edge.next.origin.y >= vertex.y):
-				xt = ((vertex.y-edge.origin.y)/(edge.next.origin.y-edge.origin.y)) \
-						*(edge.next.origin.x-edge.origin.x)+edge.origin.x
-				if xt < vertex.x and xt < left_edge_xt:
-					# Found it ~!
-					left_edge_xt = xt
-					left_edge = edge
+		left_edge = self.T.left_of(vertex)
 		#5: 'if helper(e_j) is a merge vertex'
 		if self._vertex_type(left_edge.helper) == "merge":
 			#6: 'then Insert the diagonal connecting v_i to helper(e_j) in D'
@@ -409,30 +1215,19 @@ class TriangleSweep:
 
 	def _handle_regular(self, vertex):
 		#1: 'if the interior of P lies to the right of v_i'
-		if vertex.prev().y > vertex.y:	# TODO: I don't think this works
+		if self._vxh(vertex.prev(), vertex):
 			#2: 'then if helper(e_i-1) is a merge vertex'
 			if self._vertex_type(vertex.prev().help()) == "merge":
 				#3: 'then Insert the diagonal connecting v_i to helper(e_i-1) in D'
 				self.queueD += [(vertex, vertex.prev().help())]
 			#4: 'Delete e_i-1 from T'
-			self.T.remove(vertex.prev())
+			self.T.remove(vertex.prev().e)
 			#5: 'Insert e_i in T and set helper(e_i) to v_i'
-			self.T += [vertex]
+			self.T.insert(vertex.e)
 			vertex.e.helper = vertex
 		#6: 'else Search in T to find the edge e_j directly left of v_i'
 		else:
-			left_edge = None
-			left_edge_xt = float('inf')
-			for v in self.T: # TODO: T should contain only edges, not vertices
-				edge = v.e
-				if (edge.origin.y >= vertex.y and edge.next.origin.y <= vertex.y) \
-						or (edge.origin.y <= vertex.y and edge.next.origin.y >= vertex.y):
-					xt = ((vertex.y-edge.origin.y)/(edge.next.origin.y-edge.origin.y)) \
-							*(edge.next.origin.x-edge.origin.x)+edge.origin.x
-					if xt < vertex.x and xt < left_edge_xt:
-						# Found it ~!
-						left_edge_xt = xt
-						left_edge = edge
+			left_edge = self.T.left_of(vertex)
 			#7: 'if helper(e_j) is a merge vertex'
 			if self._vertex_type(left_edge.helper) == "merge":
 				#8: 'then Insert the diagonal connecting v_i to helper(e_j) in D'
@@ -441,132 +1236,226 @@ class TriangleSweep:
 			left_edge.helper = vertex
 
 	def _monotone_triangulation(self, vertices):
+		"""
+		The diagonals that triangulate one monotone piece, given as
+		its vertices in order, as pairs of those vertices; see
+		_monotone_diagonals.
+		"""
 		if len(vertices) == 3:
 			return []
-	
-		D = DCEL(vertices)
-		r = []
-	
-		#1: 'Merge the vertices on the left chain and the vertices on the right chain of P
-		#	into one sequence, sorted on decreasing y-coordinate. If two vertices have
-		#	the same y-coordinate, then the leftmost one comes first.'
-		q = self._q(vertices)
-		self._l.debug("Monotone queue: {}".format(q))
-		#2: 'Initialize an empty stack S, and push u_1 and u_2 onto it'
-		S = [q.pop(), q.pop()]
-		#3: 'for j=3 to n−1'
-		uj_prev = S[1]
-		while len(q) > 1:
-			uj = q.pop()
-			#4: 'do if u_j and the vertex on top of S are on different chains'
-			
-			if self._chain(D, S[-1]) != self._chain(D, uj):
-				#5: 'Pop all vertices from S'
-				while len(S) > 1:
-					p = S.pop()
-					#6: 'Insert into D a diagonal from u_j to each popped vertex, except the last one'
-					r += [(uj, p)]
-				S.pop()	# the last one
-				#7: 'Push u_j−1 and u_j onto S
-				S += [uj_prev]
-				S += [uj]
-			#8: 'else pop one vertex from S'
-			else:
-				p = S.pop()
-				#9: 'Pop the other vertices from S as long as the diagonals from
-				#	u_j to them are inside P. Insert these diagonals intoD. Push
-				#	the last vertex that has been popped back onto S.'
-				try:
-					while self._chain(D, uj) != _sld(S[-1], uj, p, sign = True):
-						p = S.pop()
-						r += [(uj, p)]
-				except IndexError:
-					pass
-				S += [p]
-				#10: 'Push u_j onto S'
-				S += [uj]
-			uj_prev = uj
-		#11: 'Add diagonals from u_n to all stack vertices except the first and the last one'
-		del S[0]
-		del S[-1]
-		un = q[-1]
-		for s in S:
-			r += [(un, s)]
-		return r
+		points = [(v.x, v.y) for v in vertices]
+		return [(vertices[i], vertices[j]) for i, j in _monotone_diagonals(points)]
 
-	def _chain(self, dcel, vert):
+	def _monotone_pool(self, workers):
 		"""
-		+1 for the Left chain;
-		-1 for the Right chain;
+		The diagonals of every monotone piece, as _monotone_triangulation
+		gives them, computed on a pool (see sweep). The pieces go to
+		the workers as coordinate arrays (see _monotone_batch), in
+		about four batches per worker of the same number of points;
+		for an Executor given as 'workers', whose size it does not
+		tell, as if it had one worker per core.
 		"""
-		if self._vxh(vert.prev(), vert):
-			return +1
+		pieces = [m for m in self.monotones if len(m) > 3]
+		if isinstance(workers, Executor):
+			pool = workers
+			count = os.cpu_count() or 1
 		else:
-			return -1
+			count = workers or os.cpu_count() or 1
+			pool = ProcessPoolExecutor(max_workers = count)
+		try:
+			per_batch = max(sum(len(m) for m in pieces)//(4*count), 1)
+			batches = []
+			batch = []
+			size = 0
+			for m in pieces:
+				batch += [m]
+				size += len(m)
+				if size >= per_batch:
+					batches += [batch]
+					batch = []
+					size = 0
+			if batch:
+				batches += [batch]
+			futures = [pool.submit(_monotone_batch, *_pack_pieces(batch)) for batch in batches]
+
+			r = {}
+			for batch, future in zip(batches, futures):
+				pairs, counts = future.result()
+				points = [v for m in batch for v in m]
+				pos = 0
+				for m, c in zip(batch, counts):
+					r[id(m)] = [(points[pairs[j]], points[pairs[j+1]]) for j in range(pos, pos + 2*c, 2)]
+					pos += 2*c
+		finally:
+			if pool is not workers:
+				pool.shutdown()
+		return [r.get(id(m), []) for m in self.monotones]
+
+	def _show(self, visualise, stage):
+		"""
+		Shows D at a stage of the sweep ("input", "monotone" or
+		"triangles"): sends it to the viewer, if there is one; if
+		'visualise' is a file name, it is rendered headless to that
+		PNG, with '{stage}' in the name replaced by the stage. A name
+		without '{stage}' gets '_' and the stage before its extension,
+		so the stages do not overwrite each other.
+		"""
+		if self.viewer is not None:
+			self.viewer.snapshot(self.D, stage)
+		elif visualise:
+			surface = vis.render_DCEL(self.D, (1280,720), shrink = 5.72)
+			if '{stage}' in visualise:
+				path = visualise.format(stage = stage)
+			else:
+				root, ext = os.path.splitext(visualise)
+				path = root + '_' + stage + ext
+			vis.save_png(surface, path)
 
-	def sweep(self, visualise = False):
+	def sweep(self, visualise = False, profile = None, workers = 1):
+		"""
+		Triangulates D. With 'visualise' True (or a vis.Viewer), the
+		sweep is shown live while it runs, see vis.Viewer; the viewer
+		is kept in self.viewer. With a file name, the stages are
+		rendered to PNGs instead, see _show.
+
+		What the run did is kept in self.stats, a SweepStats. With
+		'profile' True, the run is profiled with cProfile; it can also
+		be any profiler with enable() and disable(), such as a
+		cProfile.Profile to add this run to. Either way, it is kept
+		in self.stats.profile.
+
+		The monotone pieces are triangulated on 'workers' processes
+		(None for one per core), or on a concurrent.futures.Executor
+		given instead (the work is then split as for one worker per
+		core); with 1, the default, in this process. Either
+		way, their diagonals are put in D with one insert_many.
+
+		Returns D.
+		"""
+		self.stats = SweepStats()
+		if profile is True:
+			profile = cProfile.Profile()
+		self.stats.profile = profile
+		if profile is not None:
+			profile.enable()
+		try:
+			return self._sweep(visualise, workers)
+		finally:
+			if profile is not None:
+				profile.disable()
+
+	def _sweep(self, visualise, workers):
+		times = self.stats.times
+		clock = time.perf_counter
+		if visualise is True:
+			visualise = vis.Viewer()
+		self.viewer = visualise if isinstance(visualise, vis.Viewer) else None
 		# These are iterative arrays
 		self.vertices = self.D.get_vertices()
-		print(self.vertices)
+		# see logg.Trace; None when tracing is off
+		self.trace = logg.tracing()
 		# These are status objects
-		self.T = []
+		self.T = EdgeStatus()
 		#self.D exists
 		self.queueD = []
-		# TODO: add handling for holes
+		# Every diagonal inserted in D, in order
+		self.diagonals = []
+		# Holes need nothing special: their vertices are in the same
+		# queue, and the diagonals from their split and merge vertices
+		# join them to the rest of the polygon
 
+		t = clock()
 		self.q = self._q(self.vertices)
-		self.l.info("Priority Queue (LIFO): %s", self.q)
+		times['queue'] = clock() - t
+		self.l.debug("Priority Queue (LIFO): %s", self.q)
+
+		t = clock()
+		self._classify()
+		times['classify'] = clock() - t
 
 		# Here starts step 3
+		peak = 0
+		t = clock()
 		while self.q:
 			vertex = self.q.pop()
+			queued = len(self.queueD)
 			self._handle(vertex)
-			self.l.info("T: {}".format(self.T))
+			if len(self.T) > peak:
+				peak = len(self.T)
+			if self.trace is not None:
+				for a, b in self.queueD[queued:]:
+					self.trace.record("diagonal", a.x, a.y, b.x, b.y)
+				self.trace.record("status", len(self.T))
+			if self.viewer is not None:
+				self.viewer.event("vertex", [vertex])
+				for a, b in self.queueD[queued:]:
+					self.viewer.event("diagonal", [a, b])
+		times['handle'] = clock() - t
+		self.stats.peak_status = peak
 
 		self.l.info("Done partition shape in y-monotone subsets ...")
-		self.l.info("T: {}".format(self.T))
-		self.l.debug("Diagonals to add: {}".format(self.queueD))
+		self.l.debug("Diagonals to add: %s", self.queueD)
 
-		if visualise:
-			screen = vis.open_window(size = (1280,720))
-			vis.draw_DCEL(screen, self.D, scalar = 2, shrink = 5.72)
+		self._show(visualise, "input")
 
 		# update D
-		for queuedItem in self.queueD:
-			self.D.insert(queuedItem[0], queuedItem[1])
+		t = clock()
+		self.D.insert_many(self.queueD)
+		times['insert'] = clock() - t
+		self.diagonals += self.queueD
 		self.l.debug("self.D has been updated")
 
 		# now for the monotone handling ...
+		t = clock()
 		data = self.D.gen_face_data(q=["faces"])
+		times['faces'] = clock() - t
 		self.monotones = []
 		for polydex in data["polys"]:
 			self.monotones += [ data["polys"][polydex] ]
-		self.l.info("Monotone count: {}".format(len(self.monotones)))
+		self.stats.monotones = [len(m) for m in self.monotones]
+		self.l.info("Monotone count: %d", len(self.monotones))
 
-		if visualise:
-			screen = vis.open_window(size = (1280,720))
-			vis.draw_DCEL(screen, self.D, scalar = 2, shrink = 5.72)
+		self._show(visualise, "monotone")
 
 		# per monotone ...
-		for monotone in self.monotones:
-			qd = self._monotone_triangulation(monotone)
-			self._l.info("Monotone returned {}".format(qd))
-			for qi in qd:
-				self.D.insert(qi[0], qi[1])
-	
+		t = clock()
+		if workers == 1:
+			per_monotone = [self._monotone_triangulation(m) for m in self.monotones]
+		else:
+			per_monotone = self._monotone_pool(workers)
+		times['monotone'] = clock() - t
+		qd = []
+		for monotone, d in zip(self.monotones, per_monotone):
+			if self.trace is not None:
+				self.trace.record("monotone", len(monotone), len(d))
+				for a, b in d:
+					self.trace.record("diagonal", a.x, a.y, b.x, b.y)
+			if self.viewer is not None:
+				for qi in d:
+					self.viewer.event("diagonal", qi)
+			qd += d
+		t = clock()
+		self.D.insert_many(qd)
+		times['triangles'] = clock() - t
+		self.diagonals += qd
+		self.stats.diagonals = len(self.diagonals)
+
+		self._show(visualise, "triangles")
 		return self.D
 
 if __name__ == '__main__':
-	file_path = "/home/borgert/Pictures/polygons/drawing.svg"
-	dcel_input = DCEL.from_svg(file_path)
-
-	#tuples = [(-1,-2),(0,-1),(1,-2),(2,0),(1,2),(0,1),(-1,2),(-2,0)]
-	#dcel_polygon = DCEL(Vertex.tuples_to_vertices(tuples))
-	dcel_output = TriangleSweep.triangulate(dcel_input, visualise = True)
-
-	# check if there is a correct output!
-	screen = vis.open_window(size = (1280,720))
-	#vis.draw_DCEL(screen, dcel_input, scalar = 1.7)
-	vis.draw_DCEL(screen, dcel_output, scalar = 2.2, shrink = 5.72)
+	import sys
+	import polygons
+	if len(sys.argv) > 1:
+		dcel_input = DCEL.from_svg(sys.argv[1])
+	else:
+		# no file given: a random polygon with holes, see polygons.py
+		outer, holes = polygons.holes(60, seed = 1)
+		dcel_input = DCEL.from_rings([outer] + holes)
 
+	sweep = TriangleSweep(dcel_input)
+	sweep.sweep(visualise = True)
+	print(sweep.stats)
 
+	# check if there is a correct output! (the last frame)
+	sweep.viewer.join()
@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+from collections import namedtuple
+from fractions import Fraction
+import logg
+import tri
+from status import EdgeStatus, _dx_down
+
+_Point = namedtuple('_Point', 'x y')
+
+def _key(p):
+	"""
+	The sweep order: top to bottom, and left to right on the same
+	height (the order of TriangleSweep._vxh). A smaller key is met first.
+	"""
+	return (-p.y, p.x)
+
+def _cross(o, a, b):
+	return (a.x - o.x)*(b.y - o.y) - (a.y - o.y)*(b.x - o.x)
+
+class _Segment:
+	"""
+	A piece of a ring edge, from its upper end A to its lower end B.
+
+	'wind' is how much the winding number grows when crossing it
+	from left to right: +1 if the ring runs down it, -1 if up.
+	'left' and 'right' are the winding numbers on both sides.
+	"""
+	__slots__ = ('a', 'b', 'wind', 'left', 'right')
+
+	def __init__(self, a, b, wind):
+		self.a = a
+		self.b = b
+		self.wind = wind
+		self.left = 0
+		self.right = 0
+
+	def __repr__(self):
+		return "_Segment({} -> {}, {:+d})".format(tuple(map(float, self.a)), tuple(map(float, self.b)), self.wind)
+
+class _Status(EdgeStatus):
+	"""
+	The sweep status over _Segments. The sweep visits the points
+	on one height from left to right, so a horizontal segment
+	crosses the sweep line at the current event point 'x' while
+	it spans it.
+	"""
+	def __init__(self):
+		EdgeStatus.__init__(self)
+		self.x = 0
+
+	def _ends(self, s):
+		return s.a, s.b
+
+	def _x(self, s, y):
+		a = s.a
+		b = s.b
+		if a.y == b.y:
+			return min(max(self.x, a.x), b.x)
+		return a.x + (y - a.y)*(b.x - a.x)/(b.y - a.y)
+
+def _crossing(s, t):
+	"""
+	The point where segments S and T cross or touch, or None. Two
+	segments on one line only meet at the end of one of them,
+	which is an event anyway, so this gives None for them.
+	"""
+	d1 = _cross(s.a, s.b, t.a)
+	d2 = _cross(s.a, s.b, t.b)
+	if (d1 > 0 and d2 > 0) or (d1 < 0 and d2 < 0) or d1 == d2:
+		return None
+	d3 = _cross(t.a, t.b, s.a)
+	d4 = _cross(t.a, t.b, s.b)
+	if (d3 > 0 and d4 > 0) or (d3 < 0 and d4 < 0):
+		return None
+	f = d1/(d1 - d2)
+	return _Point(t.a.x + (t.b.x - t.a.x)*f, t.a.y + (t.b.y - t.a.y)*f)
+
+def _check(s, t, p, events):
+	# queue where S and T meet, if the sweep has not passed it yet
+	if s is None or t is None:
+		return
+	q = _crossing(s, t)
+	if q is not None and _key(q) > _key(p):
+		heapq.heappush(events, (_key(q), q))
+
+def _emit(pieces, a, b, s):
+	# keep the piece from A to B of S if it is on the boundary of the
+	# union, directed so that the union lies to its left
+	if (s.left > 0) != (s.right > 0):
+		if s.right > 0:
+			pieces += [(a, b)]
+		else:
+			pieces += [(b, a)]
+
+def _sweep(rings):
+	"""
+	A Bentley-Ottmann sweep over the edges of all rings: it splits
+	the edges where they cross, touch or overlap, keeps the winding
+	number on both sides of every piece, and returns the pieces
+	that separate winding number 0 from 1 or more.
+	"""
+	starts = {}
+	events = []
+	for ring in rings:
+		points = [_Point(Fraction(p[0]), Fraction(p[1])) for p in ring]
+		for i in range(len(points)):
+			p = points[i-1]
+			q = points[i]
+			if p == q:
+				continue
+			if _key(p) < _key(q):
+				s = _Segment(p, q, +1)
+			else:
+				s = _Segment(q, p, -1)
+			starts.setdefault(s.a, []).append(s)
+			heapq.heappush(events, (_key(s.a), s.a))
+			heapq.heappush(events, (_key(s.b), s.b))
+
+	T = _Status()
+	pieces = []
+	last = None
+	while events:
+		k, p = heapq.heappop(events)
+		if p == last:
+			continue
+		last = p
+		T.y = p.y
+		T.x = p.x
+
+		# Take out the segments through P: the ones that end here, and
+		# the ones that cross or touch something here, which are split
+		left = T.left_of(p)
+		through = []
+		s = T.after(left)
+		while s is not None and T._x(s, p.y) == p.x:
+			through += [s]
+			s = T.after(s)
+		new = starts.pop(p, [])
+		for s in through:
+			T.remove(s)
+			if s.b == p:
+				_emit(pieces, s.a, s.b, s)
+			else:
+				_emit(pieces, s.a, p, s)
+				new += [_Segment(p, s.b, s.wind)]
+
+		# Segments leaving P in the same direction overlap: they become
+		# one up to the nearest end, the rest starts again from there
+		new.sort(key=lambda s: _dx_down(s.a, s.b))
+		merged = []
+		i = 0
+		while i < len(new):
+			slope = _dx_down(new[i].a, new[i].b)
+			j = i
+			while j < len(new) and _dx_down(new[j].a, new[j].b) == slope:
+				j += 1
+			end = min([s.b for s in new[i:j]], key=_key)
+			wind = 0
+			for s in new[i:j]:
+				wind += s.wind
+				if s.b != end:
+					starts.setdefault(end, []).append(_Segment(end, s.b, s.wind))
+			# a piece that winds nothing changes nothing
+			if wind != 0:
+				merged += [_Segment(p, end, wind)]
+			i = j
+
+		# put them in, left to right, and count the winding number
+		w = left.right if left is not None else 0
+		for s in merged:
+			s.left = w
+			w += s.wind
+			s.right = w
+			T.insert(s)
+
+		if merged:
+			_check(T.before(merged[0]), merged[0], p, events)
+			_check(merged[-1], T.after(merged[-1]), p, events)
+		else:
+			_check(left, T.after(left), p, events)
+	return pieces
+
+def _cw_rank(d0, d):
+	"""
+	How far direction D turns clockwise from direction D0:
+	0 for less than half a turn, 1 for exactly half a turn, 2 for
+	more, 3 for none (D0 itself). Within 0 or 2, compare with _cross.
+	"""
+	c = d0.x*d.y - d0.y*d.x
+	if c < 0:
+		return 0
+	if c == 0:
+		return 1 if d0.x*d.x + d0.y*d.y < 0 else 3
+	return 2
+
+def _first_cw(v, u, targets):
+	"""
+	Of the edges from V to 'targets', the first one met when
+	turning clockwise from the edge from V to U.
+	"""
+	o = _Point(0, 0)
+	d0 = _Point(u.x - v.x, u.y - v.y)
+	best = None
+	for w in targets:
+		d = _Point(w.x - v.x, w.y - v.y)
+		r = _cw_rank(d0, d)
+		if best is None or r < best[0] or (r == best[0] and r in (0, 2) and _cross(o, best[1], d) > 0):
+			best = (r, d, w)
+	return best[2]
+
+def _rings(pieces):
+	"""
+	Links the boundary pieces into rings. At a vertex, every piece
+	coming in goes on with the first piece going out clockwise from
+	it, so the union is always to the left and rings that touch in
+	a vertex come out as separate rings.
+	"""
+	out = {}
+	into = {}
+	for a, b in pieces:
+		out.setdefault(a, []).append(b)
+		into.setdefault(b, []).append(a)
+	follow = {}
+	for v in into:
+		for u in into[v]:
+			follow[(u, v)] = _first_cw(v, u, out[v])
+	r = []
+	while follow:
+		first, w = follow.popitem()
+		ring = [first[0]]
+		e = (first[1], w)
+		while e != first:
+			ring += [e[0]]
+			e = (e[1], follow.pop(e))
+		# drop the vertices in the middle of a straight stretch
+		ring = [ring[i] for i in range(len(ring)) if _cross(ring[i-1], ring[i], ring[(i+1) % len(ring)]) != 0]
+		r += [ring]
+	return r
+
+def union(rings):
+	"""
+	The union of polygons given as rings of [x, y]: anti-clockwise
+	rings add area, clockwise rings (obstacles) take it out again.
+	A point is in the union if its winding number over all rings
+	is 1 or more; so for a list of rooms, each given as its outer
+	ring and its obstacles, it is in the union if it is in the
+	free space of any room.
+
+	All rings are merged in one plane sweep, in O((n + k) log n)
+	expected time for n edges and k crossings. Coordinates are
+	converted to Fractions, so crossings and overlaps (walls that
+	two rooms share) are found exactly.
+
+	Returns:
+		A list of (outer, holes), one per separate part of the
+		union: 'outer' is a ring winding anti-clockwise and 'holes'
+		a list of rings winding clockwise, all lists of (x, y).
+		Rings that touch each other in a single point are kept
+		as separate rings.
+	"""
+	l = logg.get("UNION")
+	rings = _rings(_sweep(rings))
+	outers = [ring for ring in rings if tri.signed_area(ring) > 0]
+	holes = [ring for ring in rings if tri.signed_area(ring) < 0]
+	outers.sort(key=tri.signed_area)
+	parts = [(outer, []) for outer in outers]
+
+	for hole in holes:
+		if len(parts) == 1:
+			parts[0][1].append(hole)
+			continue
+		# the smallest outer ring around one of its vertices
+		# (a vertex they share does not tell)
+		for outer, inner in parts:
+			corners = set(outer)
+			p = next((p for p in hole if p not in corners), None)
+			if p is not None and tri._in_ring(p, outer):
+				inner.append(hole)
+				break
+		else:
+			l.warning("Dropped a hole that is not inside any part of the union")
+	l.debug("Union of %d rings: %d parts, %d holes", len(rings), len(parts), len(holes))
+
+	def floats(ring):
+		return [(float(p.x), float(p.y)) for p in ring]
+	return [(floats(outer), [floats(h) for h in inner]) for outer, inner in parts]
+
+def to_dcel(part):
+	"""
+	A DCEL of one part (outer, holes) of a union, ready
+	for TriangleSweep.
+	"""
+	outer, holes = part
+	return tri.DCEL(tri.Vertex.tuples_to_vertices(outer),
+			holes = [tri.Vertex.tuples_to_vertices(h) for h in holes])
@@ -2,9 +2,15 @@
 # -*- coding: utf-8 -*-
 
 import logg
-from math import sqrt # I don't trust 'import' to load only one thing
+import queue
+import threading
+import numpy as np
 import pygame
 
+# cycles through HSV with H = [0,90,180,270], S = 100%, V = 80%
+#color_wheel = [(128,0,0), (64,128,0), (0,128,128), (64,0,128)]
+color_wheel = [(204,0,0), (102,204,0), (0,204,204), (102,0,204)]
+
 def open_window(size = (640,480)):
 	# initialize the pygame module
 	pygame.init()
@@ -15,6 +21,11 @@ def open_window(size = (640,480)):
 	screen.fill([255,255,255])
 	return screen
 
+def _wait_for_quit():
+	# sleeps until the window is closed, instead of polling
+	while pygame.event.wait().type != pygame.QUIT:
+		pass
+
 def draw_room(screen, room, scalar=100):
 	"""
 	Room must be an object with attribute 'shape'.
@@ -23,61 +34,17 @@ def draw_room(screen, room, scalar=100):
 	l = logg.get('VIS')
 	pygame.display.set_caption('The CatTerroriser: Room \'{}\''.format(room.name))
 	
-	pointlist = []
-	for v in room.shape:
-		pointlist += [[v[0]*scalar + 320, -v[1]*scalar + 240]]
-	
-	l.debug('Pointlist: %s', pointlist)
-	
-	pygame.draw.lines(screen, (255,0,0), True, pointlist, 1)
+	render_room(room, scalar = scalar, surface = screen)
 	pygame.display.flip()
 	
 	l.info('Opening window ...')
 	l.warning('The program will be blocked until the window is closed')
 	
-	running = True
-	# main loop
-	while running:
-		# event handling, gets all event from the event queue
-		for event in pygame.event.get():
-			# only do something if the event is of type QUIT
-			if event.type == pygame.QUIT:
-				# change the value to False, to exit the main loop
-				running = False
+	_wait_for_quit()
 	
 	l.info('Window closed!')
 	l.debug('Continuing program ...')
 
-def _vec_getnorm(vec):
-	return sqrt(vec[0]**2 + vec[1]**2)
-
-def _vec_setnorm(vec, newnorm):
-	l = _vec_getnorm(vec)
-	vec[0] *= newnorm/l
-	vec[1] *= newnorm/l
-
-def _to_screen(vertices, screen, scalar = 100, shrink = 3.72):
-	w, h = screen.get_size()
-	vr = []
-	if shrink:
-		sumx = 0
-		sumy = 0
-		for v in vertices:
-			vr += [[int(v[0])*scalar+w/2,-int(v[1])*scalar+h/2]]
-			sumx += vr[-1][0]
-			sumy += vr[-1][1]
-		mx = sumx/len(vr)
-		my = sumy/len(vr)
-		for v in vr:
-			dir_to_m = [mx-v[0], my-v[1]]
-			_vec_setnorm(dir_to_m, shrink)
-			v[0] += int(dir_to_m[0])
-			v[1] += int(dir_to_m[1])
-	else:
-		for v in vertices:
-			vr += [[int(v[0])*scalar+w/2,-int(v[1])*scalar+h/2]]
-	return vr
-
 def draw_DCEL(screen, dcel, scalar=100, msg="", shrink = 3.72):
 	l = logg.get('VIS')
 	if msg:
@@ -85,32 +52,287 @@ def draw_DCEL(screen, dcel, scalar=100, msg="", shrink = 3.72):
 	else:
 		pygame.display.set_caption('The CatTerroriser: a DCEL')
 	
-	# cycles through HSV with H = [0,90,180,270], S = 100%, V = 80%
-	#color_wheel = [(128,0,0), (64,128,0), (0,128,128), (64,0,128)]
-	color_wheel = [(204,0,0), (102,204,0), (0,204,204), (102,0,204)]
-	
-	data = dcel.gen_face_data()
-	for f in data["polys"].keys():
-		polygon = data["polys"][f]
-		pl = _to_screen(polygon, screen, scalar, shrink)
-		pygame.draw.polygon(screen, color_wheel[data["colours"][f]], pl, 3)
+	render_DCEL(dcel, scalar = scalar, shrink = shrink, surface = screen)
 	pygame.display.flip()
 	
 	l.info('Opening window ...')
 	l.warning('The program will be blocked until the window is closed')
 	
-	running = True
-	# main loop
-	while running:
-		# event handling, gets all event from the event queue
-		for event in pygame.event.get():
-			# only do something if the event is of type QUIT
-			if event.type == pygame.QUIT:
-				# change the value to False, to exit the main loop
-				running = False
-				
+	_wait_for_quit()
+	
 	l.info('Window closed!')
 	l.debug('Continuing program ...')
 
+def _fit(xy, size, scalar = None, margin = 10):
+	"""
+	The (scale, centre) that maps world points to pixels: with
+	a 'scalar', the world origin is in the middle of the surface;
+	without, the points 'xy' are fitted into it, 'margin' pixels
+	from the sides.
+	"""
+	w, h = size
+	if scalar is not None:
+		return scalar, np.zeros(2)
+	xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+	lo = xy.min(0)
+	hi = xy.max(0)
+	span = np.maximum(hi - lo, 1e-12)
+	return min((w - 2*margin)/span[0], (h - 2*margin)/span[1]), (lo + hi)/2
+
+def _points_to_screen(xy, size, fit):
+	scalar, centre = fit
+	w, h = size
+	return (np.asarray(xy, dtype=np.float64) - centre)*[scalar, -scalar] + [w/2, h/2]
+
+def _batch_to_screen(polygons, size, scalar = None, shrink = 0, fit = None):
+	"""
+	Maps polygons from world coordinates to pixels (y up), all
+	in one numpy transform; see _fit for 'scalar', or pass the
+	result of _fit as 'fit'. With 'shrink', every polygon is
+	pulled that many pixels towards its centre, so neighbours
+	do not overlap.
+	Returns one (n, 2) int array per polygon.
+	"""
+	counts = np.array([len(p) for p in polygons], dtype=np.int64)
+	if not counts.sum():
+		return [np.zeros((0, 2), dtype=np.int64) for p in polygons]
+	xy = np.array([(v[0], v[1]) for p in polygons for v in p], dtype=np.float64)
+	if fit is None:
+		fit = _fit(xy, size, scalar)
+	xy = _points_to_screen(xy, size, fit)
+
+	starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+	if shrink:
+		centres = np.add.reduceat(xy, starts)/np.maximum(counts, 1)[:, None]
+		d = np.repeat(centres, counts, axis=0) - xy
+		norm = np.hypot(d[:, 0], d[:, 1])
+		norm[norm == 0] = 1
+		xy += d/norm[:, None]*shrink
+	return np.split(np.rint(xy).astype(np.int64), starts[1:])
+
+def render_DCEL(dcel, size = (1280,720), scalar = None, shrink = 3.72, width = 3, surface = None):
+	"""
+	Draws the faces of a DCEL, each in its colour from
+	gen_face_data, without a display: on 'surface', or on a new
+	offscreen pygame.Surface of 'size'. All faces are transformed
+	in one go and drawn in one pass. See _fit for 'scalar' and
+	_batch_to_screen for 'shrink'.
+	Returns the surface; see to_array and save_png.
+	"""
+	if surface is None:
+		surface = pygame.Surface(size)
+		surface.fill((255,255,255))
+	data = dcel.gen_face_data()
+	faces = list(data["polys"])
+	polygons = _batch_to_screen([data["polys"][f] for f in faces], surface.get_size(), scalar, shrink)
+	for f, pl in zip(faces, polygons):
+		if len(pl) >= 3:
+			pygame.draw.polygon(surface, color_wheel[data["colours"][f] % len(color_wheel)], pl.tolist(), width)
+	return surface
+
+def render_room(room, size = (640,480), scalar = None, surface = None):
+	"""
+	Draws the shape and the obstacles of a room (red and black)
+	without a display, like render_DCEL. Returns the surface.
+	"""
+	if surface is None:
+		surface = pygame.Surface(size)
+		surface.fill((255,255,255))
+	rings = [room.shape] + [o for o in room.obstacles if len(o) >= 3]
+	rings = _batch_to_screen(rings, surface.get_size(), scalar)
+	for i in range(len(rings)):
+		if len(rings[i]) >= 2:
+			pygame.draw.lines(surface, (255,0,0) if i == 0 else (0,0,0), True, rings[i].tolist(), 1)
+	return surface
+
+def to_array(surface):
+	"""
+	The pixels of a surface as a numpy array of shape
+	(height, width, 3), dtype uint8.
+	"""
+	return pygame.surfarray.array3d(surface).transpose(1, 0, 2)
+
+def save_png(surface, path):
+	pygame.image.save(surface, path)
+
+class Viewer:
+	"""
+	A live window on an algorithm that changes a DCEL, such as
+	TriangleSweep.sweep(visualise = True).
+
+	The window has its own thread, which redraws at most 'fps'
+	times a second and sleeps in between, so the algorithm never
+	waits for it. The algorithm sends snapshots of the DCEL
+	(snapshot) and events with points (event) through a queue of
+	at most 'maxsize' items (0 for no limit); when it is full, the
+	oldest item is dropped. Each frame, the viewer takes all the
+	items waiting, or 'per_frame' of them, and only draws the
+	newest snapshot among them, so it keeps up with the algorithm
+	instead of trailing it. An event marks its points (a dot, or a
+	line for two) on top of the last snapshot, until the next one.
+
+	Space pauses and resumes, the right arrow (or N) steps one item
+	while paused, and Escape or closing the window stops the viewer;
+	after that, snapshots and events are dropped. With 'wait', the
+	algorithm waits for the viewer when the queue is full instead,
+	so pausing the view pauses the algorithm too, and every item is
+	shown with per_frame = 1.
+
+	The window runs off the main thread. SDL does not support that
+	on macOS, where it has to be on the main thread: use
+	render_DCEL there instead.
+	"""
+	def __init__(self, size = (1280,720), fps = 30, per_frame = None, maxsize = 256, wait = False, scalar = None, shrink = 3.72):
+		self.l = logg.get('VIS')
+		self.size = size
+		self.fps = fps
+		self.per_frame = per_frame
+		self.wait = wait
+		self.scalar = scalar
+		self.shrink = shrink
+		self.queue = queue.Queue(maxsize)
+		self.paused = False
+		self.closed = threading.Event()
+		self._steps = 0
+		self._lock = threading.Lock()
+		self._thread = threading.Thread(target = self._run, name = 'Viewer')
+		self._thread.start()
+
+	def snapshot(self, dcel, msg = ''):
+		"""
+		Sends the faces of 'dcel' as they are now (copied, so the
+		algorithm can go on changing it).
+		"""
+		if self.closed.is_set():
+			return
+		data = dcel.gen_face_data()
+		faces = [([(v[0], v[1]) for v in data["polys"][f]], data["colours"][f]) for f in data["polys"]]
+		self._put(('snapshot', faces, msg))
+
+	def event(self, kind, points = (), msg = ''):
+		"""
+		Sends an event of some 'kind' (a name), with the points it
+		is about, as (x, y).
+		"""
+		if self.closed.is_set():
+			return
+		self._put(('event', kind, [(p[0], p[1]) for p in points], msg))
+
+	def _put(self, item):
+		if not self.wait:
+			while True:
+				try:
+					self.queue.put_nowait(item)
+					return
+				except queue.Full:
+					# drop the oldest item, unless the viewer just did
+					try:
+						self.queue.get_nowait()
+					except queue.Empty:
+						pass
+		while not self.closed.is_set():
+			try:
+				self.queue.put(item, timeout = 0.1)
+				return
+			except queue.Full:
+				pass
+
+	def pause(self):
+		self.paused = True
+
+	def resume(self):
+		self.paused = False
+
+	def step(self, n = 1):
+		"""
+		Shows the next n items while paused.
+		"""
+		with self._lock:
+			self._steps += n
+
+	def close(self):
+		self.closed.set()
+
+	def join(self, timeout = None):
+		"""
+		Waits until the window is closed.
+		"""
+		self._thread.join(timeout)
+
+	def _run(self):
+		pygame.init()
+		screen = pygame.display.set_mode(self.size)
+		clock = pygame.time.Clock()
+		fit = None
+		faces = []
+		marks = []
+		caption = ''
+		items = 0
+		while not self.closed.is_set():
+			for event in pygame.event.get():
+				if event.type == pygame.QUIT:
+					self.close()
+				elif event.type == pygame.KEYDOWN:
+					if event.key == pygame.K_ESCAPE:
+						self.close()
+					elif event.key == pygame.K_SPACE:
+						self.paused = not self.paused
+					elif event.key in (pygame.K_RIGHT, pygame.K_n):
+						self.step()
+
+			with self._lock:
+				if self.paused:
+					take = self._steps
+				elif self.per_frame is None:
+					take = self.queue.qsize()
+				else:
+					take = self._steps + self.per_frame
+				self._steps = 0
+			taken = []
+			for _ in range(take):
+				try:
+					taken += [self.queue.get_nowait()]
+				except queue.Empty:
+					break
+			items += len(taken)
+			# a snapshot replaces what came before it, so only the
+			# newest one is drawn, with the events after it
+			for i in range(len(taken) - 1, 0, -1):
+				if taken[i][0] == 'snapshot':
+					taken = taken[i:]
+					break
+			for item in taken:
+				if item[0] == 'snapshot':
+					polygons = [p for p, c in item[1]]
+					if fit is None and polygons:
+						fit = _fit([v for p in polygons for v in p], self.size, self.scalar)
+					if fit is not None:
+						polygons = _batch_to_screen(polygons, self.size, shrink = self.shrink, fit = fit)
+					faces = list(zip(polygons, [c for p, c in item[1]]))
+					marks = []
+					caption = item[2]
+				else:
+					kind, points, msg = item[1:]
+					if fit is not None and points:
+						marks += [np.rint(_points_to_screen(points, self.size, fit)).astype(np.int64).tolist()]
+					caption = '{} {}'.format(kind, msg).strip()
+
+			screen.fill((255,255,255))
+			for pl, c in faces:
+				if len(pl) >= 3:
+					pygame.draw.polygon(screen, color_wheel[c % len(color_wheel)], pl.tolist(), 3)
+			for i in range(len(marks)):
+				colour = (0,0,0) if i < len(marks) - 1 else (255,0,255)
+				if len(marks[i]) == 1:
+					pygame.draw.circle(screen, colour, marks[i][0], 4)
+				else:
+					pygame.draw.lines(screen, colour, False, marks[i], 2)
+			pygame.display.set_caption('The CatTerroriser: {} [{}{}]'.format(caption, items,
+					', paused' if self.paused else ''))
+			pygame.display.flip()
+			clock.tick(self.fps)
+		pygame.display.quit()
+		self.l.info('Viewer closed after %d items', items)
+
 if __name__ == '__main__':
 	print("This module is not supposed to be executed.")